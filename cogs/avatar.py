@@ -1,14 +1,56 @@
 import discord
 from discord.ext import commands
 from typing import Optional, Union
+import time
 import requests
 from PIL import Image
 from io import BytesIO
+from module.executor import shared_executor
 
 class Avatar(commands.Cog):
+    # 下載頭貼的整體期限（秒），需短於 shared_executor.run 的 timeout，超時後執行緒不會被卡住
+    DOWNLOAD_DEADLINE = 10
+    MAX_AVATAR_BYTES = 10 * 1024 * 1024
+
     def __init__(self, bot):
         self.bot = bot
 
+    @classmethod
+    def _download_avatar(cls, avatar_url):
+        # requests 的 timeout 只限制連線與每次讀取的間隔，以整體期限避免伺服器緩慢傳送時一直佔用執行緒
+        deadline = time.monotonic() + cls.DOWNLOAD_DEADLINE
+        with requests.get(avatar_url, timeout=(5, 5), stream=True) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if size > cls.MAX_AVATAR_BYTES:
+                    raise ValueError(f"頭貼檔案超過 {cls.MAX_AVATAR_BYTES} bytes")
+                if time.monotonic() > deadline:
+                    raise requests.Timeout(f"下載頭貼超過 {cls.DOWNLOAD_DEADLINE} 秒")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _average_color(content):
+        image = Image.open(BytesIO(content))
+        image = image.convert("RGB")
+        pixels = image.getdata()
+        r_avg = 0
+        g_avg = 0
+        b_avg = 0
+        for pixel in pixels:
+            r, g, b = pixel
+            r_avg += r
+            g_avg += g
+            b_avg += b
+        num_pixels = image.size[0] * image.size[1]
+        r_avg //= num_pixels
+        g_avg //= num_pixels
+        b_avg //= num_pixels
+        return (r_avg, g_avg, b_avg)
+
     @discord.app_commands.command(name="查看成員頭貼", description="顯示目標成員的頭貼，可擇一使用選擇用戶或輸入用戶id")
     @discord.app_commands.describe(
         member="選擇你想查看的成員",
@@ -55,23 +97,9 @@ class Avatar(commands.Cog):
             member = user
 
         avatar_url = member.avatar.url
-        response = requests.get(avatar_url)
-        image = Image.open(BytesIO(response.content))
-        image = image.convert("RGB")
-        pixels = image.getdata()
-        r_avg = 0
-        g_avg = 0
-        b_avg = 0
-        for pixel in pixels:
-            r, g, b = pixel
-            r_avg += r
-            g_avg += g
-            b_avg += b
-        num_pixels = image.size[0] * image.size[1]
-        r_avg //= num_pixels
-        g_avg //= num_pixels
-        b_avg //= num_pixels
-        avg_color = (r_avg, g_avg, b_avg)
+        # 下載與計算平均色都在共用執行緒池中進行，不阻塞事件迴圈
+        content = await shared_executor.run(self._download_avatar, avatar_url, pool="io", timeout=15)
+        avg_color = await shared_executor.run(self._average_color, content, pool="cpu")
         color = discord.Color.from_rgb(*avg_color)
         embed = discord.Embed(title=f"{member.name} 的頭貼", description=f"[ :link: [完整大圖連結]]({avatar_url})\n", color=color)
         embed.set_image(url=avatar_url)
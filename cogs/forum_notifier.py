@@ -1,16 +1,31 @@
 import discord
 from discord.ext import commands, tasks
+import asyncio
 import json
 import os
-from module.forum_notifier.scraper import Scraper
-from module.forum_notifier.data_manager import load_data, save_data, update_data
+from asyncio_throttle import Throttler
+from module.forum_notifier.scraper import Scraper, format_stage_latency
+from module.forum_notifier.http_client import create_client_session, format_connection_stats
+from module.forum_notifier.response_cache import ResponseCache
+from module.forum_notifier.author_cache import AuthorCache
+from module.forum_notifier.embed_batcher import EmbedBatcher
+from module.forum_notifier.data_manager import load_data, save_data, update_data, get_high_water_mark
 from loguru import logger
 
+# Discuz 的頭貼網址可直接由 UID 組成，不需要抓取作者頁面；設為 null 時改為從作者頁面抓取
+DEFAULT_AVATAR_URL_TEMPLATE = "uc_server/avatar.php?uid={uid}&size=middle"
+
+
 class ForumNotifier(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.settings = None  # 儲存設定的主變數
         self.data_file = "data/forum_notifier.json"  # 資料儲存位置
+        self.session = None  # 所有 Scraper 共用的 ClientSession，於 cog_load 建立
+        self.connection_stats = {}  # 連線統計（新建 / 重用連線、DNS 快取）
+        self.response_cache = ResponseCache()  # 列表頁的條件式請求與內容快取，未變更的板塊不重新解析
+        self.send_throttler = Throttler(rate_limit=5, period=5)  # Discord 頻道發送上限約為每 5 秒 5 則訊息
+        self.stage_stats = {}  # 每個檢查週期的各階段請求耗時（列表頁、分類、文章頁、頭貼）
 
         # 嘗試載入設定
         try:
@@ -19,13 +34,25 @@ class ForumNotifier(commands.Cog):
             logger.error(f"載入設定失敗：{e}")
             raise
 
-        # 動態設置循環間隔並啟動循環任務
+        # 作者頭貼快取（記憶體 + 磁碟），過期後才重新抓取作者頁面
+        self.author_cache = AuthorCache(
+            ttl=int(self.settings.get("author_cache_hours", 24) * 3600),
+            file_path="data/forum_author_cache.json"
+        )
+
+    async def cog_load(self):
+        """建立共用的 HTTP 連線池，動態設置循環間隔並啟動循環任務"""
+        self.session = create_client_session(self.connection_stats)
         self.check_new_threads.change_interval(minutes=self.settings["interval_minutes"])
         self.check_new_threads.start()
 
-    def cog_unload(self):
-        """停止循環任務"""
+    async def cog_unload(self):
+        """停止循環任務並關閉連線池"""
         self.check_new_threads.cancel()
+        if self.session:
+            await self.session.close()
+            self.session = None
+        logger.info(f"論壇通知已卸載，連線統計：{format_connection_stats(self.connection_stats)}")
 
     def load_settings(self, file_path):
         """載入設定，並檢查參數有效性"""
@@ -61,64 +88,152 @@ class ForumNotifier(commands.Cog):
         self.settings = notifier_settings
         logger.info(f"成功載入設定：{notifier_settings}")
 
+    def _create_scraper(self):
+        """建立共用連線池與快取的 Scraper"""
+        return Scraper(
+            self.settings["base_url"],
+            self.settings,
+            session=self.session,
+            response_cache=self.response_cache,
+            author_cache=self.author_cache,
+            avatar_url_template=self.settings.get("avatar_url_template", DEFAULT_AVATAR_URL_TEMPLATE),
+            stage_stats=self.stage_stats,
+            parser_backend=self.settings.get("html_parser")
+        )
+
     @tasks.loop(minutes=10)  # 使用預設值，動態設置間隔
     async def check_new_threads(self):
         """定期檢查新文章的任務"""
+        # 分片模式下只有通知頻道所在分片的行程負責抓取與推播，避免多個行程重複發送
+        if self.bot.get_channel(self.settings["channel_id"]) is None:
+            logger.warning(f"找不到通知頻道 {self.settings['channel_id']}（不在此分片或頻道不存在），略過本次檢查")
+            return
+
         logger.info("開始檢查新文章")
+        self.stage_stats.clear()
 
         # 加載現有的資料
         existing_data = await load_data(self.data_file)
 
+        try:
+            await self._check_boards(existing_data)
+        except Exception as e:
+            # 列表頁快取已記錄本次的內容，保留的話下次這些板塊會被視為未變更而略過，未推播或未保存的文章就此遺失
+            self.response_cache.clear()
+            logger.error(f"檢查新文章時發生錯誤，已清空列表頁快取，下次重新比對：{e}")
+            logger.exception(e)
+            return
+
+        logger.info("檢查新文章完成")
+        logger.info(f"連線統計：{format_connection_stats(self.connection_stats)}")
+        cache_stats = self.response_cache.stats
+        logger.info(f"列表頁快取：304 未修改 {cache_stats['not_modified']} 次，內容相同 {cache_stats['unchanged']} 次，已變更 {cache_stats['changed']} 次")
+        logger.info(f"請求階段耗時：{format_stage_latency(self.stage_stats)}")
+
+    async def _check_boards(self, existing_data):
+        """
+        抓取各板塊的文章列表、推播新文章並保存資料
+        保存失敗時拋出例外，讓呼叫端清空列表頁快取
+        :param existing_data: dict, load_data 的結果
+        """
         # 如果首次啟動，僅初始化資料，不發推播
         if not existing_data:
             logger.info("首次啟動，僅初始化資料，不發推播")
-            async with Scraper(self.settings["base_url"], self.settings) as scraper:
+            async with self._create_scraper() as scraper:
                 latest_threads = await scraper.FetchThreadIDs(self.settings)
-                # 初始化資料
-                for forum_id, threads in latest_threads.items():
-                    combined_threads = {
-                        "stickthread": threads.get("stickthread", []),
-                        "normalthread": threads.get("normalthread", []),
-                    }
-                    _, existing_data = update_data(existing_data, combined_threads, forum_id)
-                await save_data(self.data_file, existing_data)
+            # 初始化資料
+            for forum_id, threads in latest_threads.items():
+                combined_threads, _ = self._split_records(threads)
+                _, existing_data = update_data(existing_data, combined_threads, forum_id)
+            await self._save_data(existing_data)
             return
 
-        # 非首次啟動，正常推播
-        async with Scraper(self.settings["base_url"], self.settings) as scraper:
-            latest_threads = await scraper.FetchThreadIDs(self.settings)
+        # 非首次啟動，正常推播；傳入各板塊的高水位，第一頁看不到上次的文章時會繼續翻頁
+        high_water_marks = {forum_id: get_high_water_mark(existing_data, forum_id) for forum_id in existing_data}
+        async with self._create_scraper() as scraper:
+            latest_threads = await scraper.FetchThreadIDs(self.settings, high_water_marks)
             logger.debug(f"最新文章ID列表：{latest_threads}")
 
+        jobs = []
         for forum_id, threads in latest_threads.items():
             logger.debug(f"正在處理板塊 {forum_id}，獲取的文章數據：{threads}")
-            combined_threads = {
-                "stickthread": threads.get("stickthread", []),
-                "normalthread": threads.get("normalthread", []),
-            }
-            updated_threads, existing_data = update_data(existing_data, combined_threads, forum_id)
+            combined_threads, records = self._split_records(threads)
+            updated_threads, existing_data = update_data(existing_data, combined_threads, forum_id, complete=threads.get("complete", True))
+            jobs.extend((forum_id, thread, True, records.get(thread)) for thread in updated_threads["stickthread"])
+            jobs.extend((forum_id, thread, False, records.get(thread)) for thread in updated_threads["normalthread"])
 
-            # 推播置頂文章
-            for thread in updated_threads["stickthread"]:
-                await self.send_notification(forum_id, thread, top_status=True)
+        await self._notify_new_threads(jobs)
+        await self._save_data(existing_data)
 
-            # 推播普通文章
-            for thread in updated_threads["normalthread"]:
-                await self.send_notification(forum_id, thread, top_status=False)
+    async def _save_data(self, data):
+        """
+        保存資料，寫入失敗時拋出例外（save_data 在內容未變更時也回傳 False，以重新讀取的內容區分）
+        :param data: dict, 資料
+        """
+        if not await save_data(self.data_file, data) and await load_data(self.data_file) != data:
+            raise IOError(f"無法保存資料檔：{self.data_file}")
 
-        await save_data(self.data_file, existing_data)
-        logger.info("檢查新文章完成")
+    @check_new_threads.before_loop
+    async def before_check_new_threads(self):
+        """等待機器人就緒，頻道快取建立後才開始檢查"""
+        await self.bot.wait_until_ready()
 
-    async def send_notification(self, forum_id, thread_id, top_status=False):
-        """發送推播通知"""
-        logger.info(f"發送推播通知，板塊ID：{forum_id}，文章ID：{thread_id}，置頂狀態：{top_status}")
+    @staticmethod
+    def _split_records(threads):
+        """
+        將列表頁提取的文章資訊拆成 update_data 使用的 ID 列表與以 ID 查詢的 record
+        :param threads: dict, {'stickthread': [record], 'normalthread': [record]}
+        :return: (dict, dict), ({'stickthread': [id], 'normalthread': [id]}, {id: record})
+        """
+        combined_threads = {
+            "stickthread": [record["id"] for record in threads.get("stickthread", [])],
+            "normalthread": [record["id"] for record in threads.get("normalthread", [])],
+        }
+        records = {record["id"]: record for category in ("stickthread", "normalthread") for record in threads.get(category, [])}
+        return combined_threads, records
 
-        # 獲取文章詳細資訊
-        async with Scraper(self.settings["base_url"], self.settings) as scraper:
-            thread_detail = await scraper.FetchThreadDetail(forum_id, thread_id, top_status=top_status)
-
-        if not thread_detail:
-            logger.error(f"無法獲取文章詳細資訊，板塊ID：{forum_id}，文章ID：{thread_id}")
+    async def _notify_new_threads(self, jobs):
+        """
+        以有限的並行數抓取新文章的詳細資訊，並依發文順序推播
+        抓取同時進行，推播則依文章 ID（隨發文時間遞增）逐一等待對應的結果，較早的文章一定先送出；
+        Embed 交給 EmbedBatcher 合併成多 Embed 訊息
+        :param jobs: list, [(forum_id, thread_id, top_status, record)]
+        """
+        if not jobs:
             return
+        jobs = sorted(jobs, key=lambda job: int(job[1]))
+        semaphore = asyncio.Semaphore(self.settings.get("detail_concurrency", 5))
+        batcher = EmbedBatcher(self._send_embeds, window=self.settings.get("batch_window_seconds", 2))
+        logger.info(f"共 {len(jobs)} 篇新文章，開始並行抓取詳細資訊")
+
+        async with self._create_scraper() as scraper:
+            async def fetch_detail(forum_id, thread_id, top_status, record):
+                async with semaphore:
+                    return await scraper.FetchThreadDetail(forum_id, thread_id, top_status=top_status, record=record)
+
+            tasks = [asyncio.create_task(fetch_detail(*job)) for job in jobs]
+            try:
+                for (forum_id, thread_id, _, _), task in zip(jobs, tasks):
+                    thread_detail = await task
+                    if not thread_detail:
+                        logger.error(f"無法獲取文章詳細資訊，板塊ID：{forum_id}，文章ID：{thread_id}")
+                        continue
+                    await self.send_notification(thread_detail, batcher)
+            finally:
+                # 推播中途失敗或任務被取消時，停止尚未完成的抓取，已建立的 Embed 仍會送出
+                for task in tasks:
+                    task.cancel()
+                await batcher.close()
+        logger.info(f"推播完成：{batcher.stats['embeds']} 篇文章，共 {batcher.stats['messages']} 則訊息")
+
+    async def send_notification(self, thread_detail, batcher):
+        """
+        建立推播通知的 Embed 並加入批次
+        :param thread_detail: dict, FetchThreadDetail 的結果
+        :param batcher: EmbedBatcher
+        """
+        top_status = thread_detail.get("top_status", False)
+        logger.info(f"發送推播通知，板塊ID：{thread_detail['forum']['id']}，文章ID：{thread_detail['article_id']}，置頂狀態：{top_status}")
 
         # 提取板塊資訊
         forum_config = self.settings["forums"].get(thread_detail["forum"]["name"], {})
@@ -157,10 +272,17 @@ class ForumNotifier(commands.Cog):
         )
         embed.description = "\n".join(description_lines)
         embed.set_footer(text=f"發佈於: {thread_detail['post_time']}")
+        await batcher.add(embed)
 
+    async def _send_embeds(self, embeds):
+        """
+        以一則訊息發送多個 Embed（依頻道發送上限控制速度）
+        :param embeds: list, discord.Embed 列表
+        """
         channel = self.bot.get_channel(self.settings["channel_id"])
         if channel:
-            await channel.send(embed=embed)
+            async with self.send_throttler:
+                await channel.send(embeds=embeds)
         else:
             logger.error(f"無法找到頻道ID：{self.settings['channel_id']}")
 
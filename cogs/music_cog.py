@@ -3,95 +3,168 @@ import discord
 from discord.ext import commands, tasks
 #--------------------------Module----------------------------------
 from module.ffmpeg.ffmpeg_manager import check_and_download_ffmpeg
+from module.sharding import owns_guild
 from module.music_player import (
     MusicPlayerController,
     MusicPlaylistManager,
     YTDLPDownloader,
     MusicEmbedManager,
     MusicPlayerButtons,
-    PaginationButtons
+    MusicControlButton,
+    PaginationButtons,
+    MusicSessionStore,
+    AudioCache
 )
 #--------------------------Other-----------------------------------
 import asyncio
+from collections import OrderedDict
 from loguru import logger
 import time
-import shutil
-import subprocess
 import os
+import json
 #------------------------------------------------------------------
 
 class MusicPlayerCog(commands.Cog):
+    # 閒置自動離開的寬限時間（秒），可在 settings.json 的 music_player 區塊覆寫
+    DEFAULT_PLAYER_SETTINGS = {
+        "idle_alone_seconds": 180,  # 語音頻道中沒有其他成員
+        "idle_finished_seconds": 300,  # 播放清單播完或停止播放
+        "idle_paused_seconds": 1800  # 暫停中
+    }
+
     def __init__(self, bot):
         self.bot = bot
         self.ffmpeg_path = None
         self.player_controller = None
         self.yt_dlp_manager = None
+        self.audio_cache = None
         self.playlist_manager = MusicPlaylistManager()
         self.embed_manager = MusicEmbedManager()
-        self.buttons_view = MusicPlayerButtons(self.button_action_handler)
+        self.buttons_view = MusicPlayerButtons(0)  # 綁定伺服器後由 _bind_guild 重建，按鈕 custom_id 含伺服器 ID
         self.player_message = None
         self.playlist_message = None
-        self.last_yt_dlp_check = None # 上次檢查 yt-dlp 更新的時間戳
         self.update_task = self.update_embed
         self.playlist_per_page = 5  # 播放清單每頁顯示歌曲數量
-        self.current_playlist_page = 1
-        self.total_playlist_pages = 1
-        self.total_playlist_songs = 0
+        self.playlist_cursor = None  # 播放清單訊息目前顯示頁面的游標（以歌曲物件為錨點）
+        self.playlist_render_cache = OrderedDict()  # 已查詢的播放清單頁面，鍵包含清單版本號
+        self.playlist_render_cache_size = 32
         self.last_voice_channel = None  # 保存最後連接的語音頻道
         self.manual_disconnect = False  # 標記是否為手動斷開連接
         self.reconnect_attempts = 0
         self.max_reconnect_attempts = 15  # 增加到15次重試
         self.reconnect_backoff_threshold = 5  # 第5次後開始延長間隔
+        self.guild_id = None  # 目前播放器所在的伺服器
+        self.session_store = MusicSessionStore("./data/music_sessions")  # 播放清單與進度的持久化紀錄
+        self.playlist_manager.on_change = self._on_playlist_change
+        self.resume_task = None  # 啟動時接續播放的背景任務
+        self.button_latency_stats = {}  # 按鈕回應延遲統計（依回應路徑分類）
+        self.player_settings = self.load_player_settings("config/settings.json")
+        self.listener_count = None  # 機器人所在語音頻道中的成員數（不含機器人），見 _count_listeners
+        self.idle_reason = None  # 目前的閒置原因（alone / finished / paused）
+        self.idle_since = None  # 開始閒置的時間（time.monotonic）
 
     async def cog_load(self):
+        # 註冊播放器按鈕的分派器：依 custom_id 處理按鈕事件，重新啟動後舊播放器訊息的按鈕仍可使用
+        MusicControlButton.dispatcher = self.dispatch_player_button
+        self.bot.add_dynamic_items(MusicControlButton)
+
         os.makedirs("./temp/music", exist_ok=True)
         logger.info("確認 ./temp/music 目錄存在")
         result = await check_and_download_ffmpeg()
         if result["status_code"] == 0:
             self.ffmpeg_path = result["relative_path"] # 使用相對路徑，如果異常就改成絕對路徑吧 absolute_path
+            self.audio_cache = AudioCache("./temp/music")  # 下載器、播放器與 cog 共用的音訊索引
             self.player_controller = MusicPlayerController(
                 self.ffmpeg_path,
                 "./temp/music",
                 loop=asyncio.get_event_loop(),
-                on_song_end=self.on_song_end  # 設置callback
+                on_song_end=self.on_song_end,  # 設置callback
+                audio_cache=self.audio_cache
             )
-            self.yt_dlp_manager = YTDLPDownloader("./temp/music", self.ffmpeg_path)
+            self.yt_dlp_manager = YTDLPDownloader("./temp/music", self.ffmpeg_path, audio_cache=self.audio_cache)
+            self._restore_session()
+            self.idle_reaper.start()
+            self.yt_dlp_update_task.start()
 
         else:
             logger.error("FFmpeg 初始化失敗，無法正常啟動音樂播放器！")
 
     async def cog_unload(self):
-        await self.cleanup_resources()
+        # 重新載入或關閉時保留工作階段，下次載入可以接續播放
+        if self.idle_reaper.is_running():
+            self.idle_reaper.cancel()
+        if self.yt_dlp_update_task.is_running():
+            self.yt_dlp_update_task.cancel()
+        await self.cleanup_resources(discard_session=False)
+        self.bot.remove_dynamic_items(MusicControlButton)
+        MusicControlButton.dispatcher = None
         logger.info("[MusicPlayerCog] 已卸載，資源已清理。")
 
-    async def cleanup_resources(self):
+    def load_player_settings(self, file_path):
+        """
+        載入音樂播放器設定（settings.json 的 music_player 區塊），未設定的項目使用預設值
+        :param file_path: str, 設定檔路徑
+        :return: dict
+        """
+        player_settings = dict(self.DEFAULT_PLAYER_SETTINGS)
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                player_settings.update(json.load(f).get("music_player", {}))
+        except FileNotFoundError:
+            logger.warning(f"設定檔案 {file_path} 不存在，音樂播放器使用預設設定")
+        except Exception as e:
+            logger.error(f"載入音樂播放器設定失敗，使用預設設定：{e}")
+        logger.debug(f"音樂播放器設定：{player_settings}")
+        return player_settings
+
+    async def cleanup_resources(self, discard_session: bool = True, clear_files: bool = True):
         """
         清理資源，包括斷開語音連接、重置狀態等
+        :param discard_session: bool, 是否一併刪除保存的工作階段（使用者離開頻道時刪除，卸載 cog 時保留）
+        :param clear_files: bool, 刪除工作階段時是否一併清空下載的音訊檔案，False 時只釋放本伺服器的引用，檔案交由 AudioCache 淘汰
         """
         try:
+            if self.resume_task and not self.resume_task.done():
+                self.resume_task.cancel()
+
+            # 保留工作階段時，先記錄目前進度並寫入快照，之後清空播放清單不寫入紀錄
+            if not discard_session and self.guild_id is not None:
+                self._persist_player_state()
+                self.session_store.compact(self.guild_id)
+                self.playlist_manager.on_change = None
+
             # 停止播放並斷開語音連接
             if self.player_controller and self.player_controller.voice_client:
                 await self.player_controller.stop()
                 await self.player_controller.voice_client.disconnect()
+                await self.player_controller.set_voice_client(None)
+            self.listener_count = None
+            self.idle_reason = None
+            self.idle_since = None
 
             # 清空播放清單
             if self.playlist_manager:
                 self.playlist_manager.clear()
+            self.playlist_manager.on_change = self._on_playlist_change
 
             # 停止嵌入更新任務
             if self.update_task.is_running():
                 self.update_task.stop()
                 logger.info("已停止嵌入更新任務")
 
-            # 清空下載目錄的暫存檔案
-            self.yt_dlp_manager.clear_temp_files()
+            # 清空下載目錄的暫存檔案（保留工作階段時一併保留，還原後不需重新下載）
+            if discard_session and clear_files and self.yt_dlp_manager:
+                self.yt_dlp_manager.clear_temp_files()
+            if discard_session and clear_files and self.player_controller:
+                self.player_controller.clear_cache()
+            if discard_session and not clear_files and self.audio_cache:
+                self.audio_cache.release(self.guild_id)
 
             # 重置與播放相關的狀態
             self.player_message = None
             self.playlist_message = None
-            self.current_playlist_page = 1
-            self.total_playlist_pages = 1
-            self.total_playlist_songs = 0
+            self.playlist_cursor = None
+            self.playlist_render_cache.clear()
             
             # 根據手動斷開狀態決定是否重置語音頻道
             if self.manual_disconnect:
@@ -154,6 +227,7 @@ class MusicPlayerCog(commands.Cog):
                 embed = self.embed_manager.playing_embed(
                     current_song,
                     is_looping=self.playlist_manager.loop,
+                    is_shuffling=self.playlist_manager.shuffle,
                     is_playing=False
                 )
                 await self.update_buttons_view()
@@ -170,10 +244,9 @@ class MusicPlayerCog(commands.Cog):
             logger.info(f"自動切換到下一首: {next_song['title']}")
             
             # 檢查檔案是否已存在，存在就直接播放
-            opus_path = os.path.join("./temp/music", f"{next_song['id']}.opus")
-            if os.path.exists(opus_path):
+            if self.audio_cache.contains(next_song["id"]):
                 await self.player_controller.play_song(next_song["id"])
-                embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_playing=True)
+                embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=True)
                 await self.update_buttons_view()
                 if self.player_message:
                     await self.player_message.edit(embed=embed, view=self.buttons_view)
@@ -181,7 +254,7 @@ class MusicPlayerCog(commands.Cog):
                 
             # 檔案不存在，需要下載
             # 先切換嵌入到新歌資訊，狀態顯示下載中
-            embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_playing=False)
+            embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=False)
             embed.set_field_at(0, name="狀態", value="下載中...", inline=False)
             if self.player_message:
                 await self.player_message.edit(embed=embed, view=self.buttons_view)
@@ -232,40 +305,178 @@ class MusicPlayerCog(commands.Cog):
                 embed = self.embed_manager.playing_embed(
                     current_song,
                     is_looping=self.playlist_manager.loop,
+                    is_shuffling=self.playlist_manager.shuffle,
                     is_playing=False
                 )
                 await self.update_buttons_view()
                 if self.player_message:
                     await self.player_message.edit(embed=embed, view=self.buttons_view)
 
-    async def check_and_update_yt_dlp(self):
+    def _bind_guild(self, guild_id: int):
+        """
+        將播放器綁定到伺服器，並以該伺服器 ID 重建播放器按鈕
+        """
+        if self.audio_cache:
+            if self.guild_id is not None and self.guild_id != guild_id:
+                self.audio_cache.release(self.guild_id)
+            # 播放清單中的歌曲不會被音訊快取淘汰
+            self.audio_cache.retain(guild_id, lambda: [song["id"] for song in list(self.playlist_manager.playlist)])
+        self.guild_id = guild_id
+        if self.buttons_view.guild_id != guild_id:
+            self.buttons_view = MusicPlayerButtons(guild_id)
+
+    async def dispatch_player_button(self, interaction: discord.Interaction, guild_id: int, action: str):
+        """
+        播放器按鈕的分派器（由 MusicControlButton 呼叫）
+        - 按鈕所屬的伺服器沒有進行中的工作階段時，告知使用者重新啟動播放器
+        - 按下的是還原前的舊播放器訊息時，直接沿用該訊息作為播放器訊息，不重新發送嵌入
+        - 語音尚未連線（例如還原時無法自動加入）時，加入按下按鈕的使用者所在的語音頻道
+        """
+        if guild_id != self.guild_id or not self.player_controller or not self.playlist_manager.playlist:
+            await interaction.response.send_message("這個播放器已經結束，請使用 `/音樂-啟動播放器` 重新啟動。", ephemeral=True)
+            return
+
+        if interaction.message and (not self.player_message or self.player_message.id != interaction.message.id):
+            logger.info(f"播放器重新連結到訊息 {interaction.message.id}")
+            self.player_message = interaction.message
+
+        voice_client = self.player_controller.voice_client
+        if action != "leave" and not (voice_client and voice_client.is_connected()):
+            if not interaction.user.voice or not interaction.user.voice.channel:
+                await interaction.response.send_message("請先加入語音頻道再操作播放器。", ephemeral=True)
+                return
+            # 連線語音可能超過回應期限，先 defer，之後由 _respond_player 改為編輯訊息
+            await interaction.response.defer()
+            channel = interaction.user.voice.channel
+            voice_client = interaction.guild.voice_client or await channel.connect()
+            self.last_voice_channel = channel
+            self.manual_disconnect = False
+            await self.player_controller.set_voice_client(voice_client)
+
+        await self.button_action_handler(interaction, action)
+
+    def _on_playlist_change(self, op: dict):
+        """
+        播放清單變更時寫入工作階段紀錄
+        """
+        if self.guild_id is not None:
+            self.session_store.append(self.guild_id, op)
+
+    def _persist_player_state(self):
+        """
+        記錄播放進度、語音頻道與播放器訊息，供重新啟動後還原
+        """
+        if self.guild_id is None or not self.playlist_manager.playlist:
+            return
+        status = self.player_controller.get_current_status() if self.player_controller else {}
+        self.session_store.append(self.guild_id, {
+            "op": "update",
+            "offset": status.get("current_sec", 0),
+            "paused": bool(status.get("is_paused")),
+            "voice_channel_id": self.last_voice_channel.id if self.last_voice_channel else None,
+            "channel_id": self.player_message.channel.id if self.player_message else None,
+            "message_id": self.player_message.id if self.player_message else None
+        })
+
+    def _restore_session(self):
+        """
+        從保存的工作階段還原播放清單（直接使用保存的歌曲資訊，不重新解析），並在背景接續播放
+        """
+        # 分片模式下只還原此行程負責的伺服器，其餘由對應分片的行程還原
+        guild_ids = [guild_id for guild_id in self.session_store.guild_ids() if owns_guild(self.bot, guild_id)]
+        for guild_id in guild_ids:
+            state = self.session_store.load(guild_id)
+            if state:
+                break
+        else:
+            return
+
+        if len(guild_ids) > 1:
+            logger.warning(f"找到 {len(guild_ids)} 個伺服器的工作階段，播放器同時只能服務一個伺服器，僅還原最近的伺服器 {guild_id}")
+        self._bind_guild(guild_id)
+        self.playlist_manager.restore_state(state)
+        self.resume_task = asyncio.create_task(self._resume_session(state))
+
+    async def _resume_session(self, state: dict):
         """
-        檢查 yt-dlp 是否有更新，並自動更新至最新版（若有需要）
+        等待機器人就緒後重新加入語音頻道，從保存的進度接續播放並更新原本的播放器訊息
+        :param state: dict, MusicSessionStore.load 回傳的工作階段
         """
+        await self.bot.wait_until_ready()
         try:
-            yt_dlp_path = shutil.which("yt-dlp")
-            if yt_dlp_path:
-                logger.info("[YT-DLP] 檢查 yt-dlp 是否需要更新...")
-                result = subprocess.run(
-                    ["yt-dlp", "-U"],  # 自動更新
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                logger.debug(f"[YT-DLP] 更新輸出：\n{result.stdout.strip()}")
-            else:
-                logger.warning("[YT-DLP] 找不到 yt-dlp，可執行檔未加入 PATH 或尚未安裝。")
+            guild = self.bot.get_guild(self.guild_id)
+            if not guild:
+                logger.warning(f"找不到伺服器 {self.guild_id}，無法接續播放")
+                return
+
+            # 不重新抓取訊息，直接以 ID 建立可編輯的訊息物件
+            channel = guild.get_channel_or_thread(state["channel_id"]) if state.get("channel_id") else None
+            if channel and state.get("message_id"):
+                self.player_message = channel.get_partial_message(state["message_id"])
+
+            voice_channel = guild.get_channel(state["voice_channel_id"]) if state.get("voice_channel_id") else None
+            current_song = self.playlist_manager.get_current_song()
+            if not voice_channel or not current_song:
+                logger.info("播放清單已還原，但沒有可接續的語音頻道或歌曲，等待使用者操作")
+                return
+
+            voice_client = guild.voice_client or await voice_channel.connect()
+            self.last_voice_channel = voice_channel
+            self.manual_disconnect = False
+            await self.player_controller.set_voice_client(voice_client)
+
+            # 只有目前這首需要音訊檔案，其餘歌曲維持原本播放時才下載的流程
+            if not self.audio_cache.contains(current_song["id"]):
+                song_info, file_path = await self.yt_dlp_manager.async_download(current_song["url"])
+                if not file_path:
+                    logger.warning(f"接續播放時無法下載目前歌曲：{current_song['title']}")
+                    return
+
+            # 直播或長度未知的歌曲 duration 可能為 None，此時不限制進度
+            offset = state.get("offset") or 0
+            duration = MusicPlaylistManager._duration_of(current_song)
+            if duration:
+                offset = min(offset, duration - 1)
+            await self.player_controller.play_song(current_song["id"], start_offset=offset)
+            if state.get("paused"):
+                await self.player_controller.pause()
+            logger.info(f"已接續播放：{current_song['title']}，從 {offset} 秒開始")
+
+            embed = self.embed_manager.playing_embed(
+                current_song,
+                is_looping=self.playlist_manager.loop,
+                is_shuffling=self.playlist_manager.shuffle,
+                is_playing=not state.get("paused"),
+                current_time=offset
+            )
+            await self.update_buttons_view()
+            await self.buttons_view.update_buttons({
+                "loop": {"style": discord.ButtonStyle.green if self.playlist_manager.loop else discord.ButtonStyle.grey},
+                "shuffle": {"style": discord.ButtonStyle.green if self.playlist_manager.shuffle else discord.ButtonStyle.grey}
+            })
+            if self.player_message:
+                await self.player_message.edit(content=None, embed=embed, view=self.buttons_view)
+            if not self.update_task.is_running():
+                self.update_task.start()
+        except Exception as e:
+            logger.error(f"接續播放先前的工作階段時發生錯誤：{e}")
+            logger.exception(e)
+
+    @tasks.loop(hours=24)
+    async def yt_dlp_update_task(self):
+        """
+        每 24 小時在背景更新 yt-dlp（非同步子行程，不會阻塞指令）
+        """
+        try:
+            await self.yt_dlp_manager.self_update()
         except Exception as e:
-            logger.error(f"[YT-DLP] 檢查或更新 yt-dlp 時發生錯誤：{e}")
+            logger.error(f"[YT-DLP] 排程更新 yt-dlp 時發生錯誤：{e}")
 
     @discord.app_commands.command(name="音樂-啟動播放器", description="啟動音樂播放器並播放指定的 URL")
     @discord.app_commands.rename(url="youtube網址")
     @discord.app_commands.describe(url="YouTube 影片或播放清單的網址")
     async def start_player(self, interaction: discord.Interaction, url: str):
         await interaction.response.defer()
-        if time.time() - (self.last_yt_dlp_check or 0) > 86400:  # 每 24 小時檢查一次更新
-            await self.check_and_update_yt_dlp() # 檢查 yt-dlp 更新
-            self.last_yt_dlp_check = time.time()
         # 檢查 FFmpeg 初始化
         if not self.ffmpeg_path or not self.player_controller:
             await interaction.followup.send("FFmpeg 尚未初始化，請稍後再試。")
@@ -286,6 +497,13 @@ class MusicPlayerCog(commands.Cog):
             is_playlist = self.yt_dlp_manager.is_playlist(url)
             original_msg = await interaction.original_response()
             self.player_message = await original_msg.channel.fetch_message(original_msg.id)
+            if self.guild_id is not None and self.guild_id != interaction.guild_id:
+                # 播放器同時只服務一個伺服器，換到其他伺服器時結束先前還原的工作階段
+                self.playlist_manager.clear()
+            if not self.playlist_manager.playlist:
+                # 新的工作階段：捨棄這個伺服器先前留下的紀錄，避免與新的清單混在一起
+                self.session_store.discard(interaction.guild_id)
+            self._bind_guild(interaction.guild_id)
             if is_playlist:
                 await interaction.followup.send("⏳ 正在解析撥放清單，請稍候...")
                 await self._handle_playlist_start(interaction, url)
@@ -323,8 +541,9 @@ class MusicPlayerCog(commands.Cog):
                 await self.add_musicplayer_message.edit(content=None, embed=embed, view=None)
                 return
                 
-            # 新增歌曲到播放清單，並用 add 回傳的 song_info（含 index）
-            song_info = self.playlist_manager.add(song_info)
+            # 新增歌曲到播放清單，並切換到這首（清單中可能還有還原的工作階段留下的歌曲）
+            added_song = self.playlist_manager.add(song_info)
+            song_info = self.playlist_manager.jump_to(added_song["index"] - 1)
             # 嘗試加入語音頻道
             try:
                 channel = interaction.user.voice.channel
@@ -338,8 +557,9 @@ class MusicPlayerCog(commands.Cog):
                 await self.player_message.edit(content=None, embed=embed, view=None)
                 return
             await self.player_controller.play_song(song_info["id"])
+            self._persist_player_state()
             # 這裡一定要用 add 後的 song_info
-            embed = self.embed_manager.playing_embed(song_info, is_looping=False, is_playing=True)
+            embed = self.embed_manager.playing_embed(song_info, is_looping=False, is_shuffling=self.playlist_manager.shuffle, is_playing=True)
             await self.update_buttons_view()
             await self.player_message.edit(content=None, embed=embed, view=self.buttons_view)
             if not self.update_task.is_running():
@@ -405,9 +625,17 @@ class MusicPlayerCog(commands.Cog):
                 await self.player_message.edit(content=None, embed=embed, view=None)
                 return
                 
-            # 批次 add 進 playlist_manager，並取得 add 後的第一首（含 index）
-            added_entries = self.playlist_manager.add_many(playlist_entries)
-            first_added_song = added_entries[0] if added_entries else None
+            # 批次 add 進 playlist_manager，並切換到要播放的第一首（含 index）
+            add_result = self.playlist_manager.add_many(playlist_entries)
+            position = self._start_position_of(song_info["id"], add_result["songs"])
+            if position is None:
+                logger.error(f"啟動播放清單時找不到要播放的歌曲：{song_info['id']}")
+                embed = self.embed_manager.error_embed("無法將歌曲加入播放清單，請稍後再試。")
+                await self.player_message.edit(content=None, embed=embed, view=None)
+                return
+            if not add_result["songs"]:
+                logger.info("播放清單中的歌曲都已在清單中，改為播放既有的歌曲")
+            first_added_song = self.playlist_manager.jump_to(position)
             # 嘗試加入語音頻道
             try:
                 channel = interaction.user.voice.channel
@@ -420,9 +648,10 @@ class MusicPlayerCog(commands.Cog):
                 embed = self.embed_manager.error_embed("無法加入語音頻道，請確認機器人是否有權限。")
                 await self.player_message.edit(content=None, embed=embed, view=None)
                 return
-            await self.player_controller.play_song(song_info["id"])
+            await self.player_controller.play_song(first_added_song["id"])
+            self._persist_player_state()
             # 這裡一定要用 add 後的 first_added_song
-            embed = self.embed_manager.playing_embed(first_added_song, is_looping=False, is_playing=True)
+            embed = self.embed_manager.playing_embed(first_added_song, is_looping=False, is_shuffling=self.playlist_manager.shuffle, is_playing=True)
             await self.update_buttons_view()
             await self.player_message.edit(content=None, embed=embed, view=self.buttons_view)
             if not self.update_task.is_running():
@@ -432,6 +661,19 @@ class MusicPlayerCog(commands.Cog):
             embed = self.embed_manager.error_embed(f"啟動播放清單時發生錯誤：{e}")
             await self.player_message.edit(content=None, embed=embed, view=None)
 
+    def _start_position_of(self, song_id, added_songs):
+        """
+        取得啟動播放器時要播放的歌曲位置
+        優先使用這次新增的歌曲；沒有新增（清單中已有同一首，例如還原的工作階段）時使用清單中既有的那一首
+        :param song_id: str, 歌曲 ID
+        :param added_songs: list, add_many 回傳的新增歌曲
+        :return: int or None, 歌曲位置（0-based）
+        """
+        for song in added_songs:
+            if song["id"] == song_id:
+                return song["index"] - 1
+        return next((i for i, song in enumerate(self.playlist_manager.playlist) if song["id"] == song_id), None)
+
     @discord.app_commands.command(name="音樂-新增音樂到播放清單", description="新增音樂到播放清單")
     @discord.app_commands.describe(url="YouTube 影片或播放清單的網址")
     @discord.app_commands.rename(url="youtube網址")
@@ -496,7 +738,7 @@ class MusicPlayerCog(commands.Cog):
             # 🆕 若已播完最後一首又加新歌，就自動切到新加的那一首
             if not self.player_controller.is_playing and not self.playlist_manager.loop:
                 # 直接讓 current_index 指向最後一首
-                self.playlist_manager.current_index = len(self.playlist_manager.playlist) - 1
+                self.playlist_manager.jump_to(len(self.playlist_manager.playlist) - 1)
                 logger.debug(f"播放已結束，自動將 current_index 移至新歌曲：{self.playlist_manager.current_index}")
                 
                 # 開始播放新加入的歌曲
@@ -504,7 +746,7 @@ class MusicPlayerCog(commands.Cog):
                 
                 # 更新播放訊息
                 if self.player_message:
-                    play_embed = self.embed_manager.playing_embed(song_info, is_looping=False, is_playing=True)
+                    play_embed = self.embed_manager.playing_embed(song_info, is_looping=False, is_shuffling=self.playlist_manager.shuffle, is_playing=True)
                     await self.player_message.edit(embed=play_embed, view=self.buttons_view)
 
             # 更新按鈕狀態
@@ -547,22 +789,24 @@ class MusicPlayerCog(commands.Cog):
                 await interaction.followup.send("無法解析播放清單或播放清單為空，請確認 URL 是否正確。", ephemeral=True)
                 return
                 
-            # 批次加入播放清單
-            added_entries = self.playlist_manager.add_many(playlist_entries)
-            added_count = len(added_entries)
+            # 批次加入播放清單（已存在於清單中的歌曲會被略過）
+            add_result = self.playlist_manager.add_many(playlist_entries)
+            added_count = add_result["added"]
             
             # 如果沒有成功添加任何歌曲
             if added_count == 0:
-                await interaction.followup.send("播放清單中沒有可播放的歌曲，請嘗試其他播放清單。", ephemeral=True)
+                if add_result["duplicate"] > 0:
+                    await interaction.followup.send(f"播放清單中的 {add_result['duplicate']} 首歌曲都已在佇列中，沒有新增任何歌曲。", ephemeral=True)
+                else:
+                    await interaction.followup.send("播放清單中沒有可播放的歌曲，請嘗試其他播放清單。", ephemeral=True)
                 return
             
-            # 統計有效和無效歌曲數量
-            filtered_count = len(playlist_entries) - added_count
-            
             # 顯示添加結果
             playlist_msg = f"已將播放清單新增至佇列，共 {added_count} 首歌曲。"
-            if filtered_count > 0:
-                playlist_msg += f"\n⚠️ {filtered_count} 首歌曲因無法播放或已存在而被過濾。"
+            if add_result["duplicate"] > 0:
+                playlist_msg += f"\n⚠️ {add_result['duplicate']} 首歌曲已存在於佇列中而被略過。"
+            if add_result["invalid"] > 0:
+                playlist_msg += f"\n⚠️ {add_result['invalid']} 首歌曲因資訊不完整無法播放而被過濾。"
                 
             embed = discord.Embed(
                 title="✅ 已新增播放清單",
@@ -574,7 +818,7 @@ class MusicPlayerCog(commands.Cog):
             if not self.player_controller.is_playing and not self.playlist_manager.loop:
                 # 取得新增後的第一首歌曲的索引
                 first_new_song_index = len(self.playlist_manager.playlist) - added_count
-                self.playlist_manager.current_index = first_new_song_index
+                self.playlist_manager.jump_to(first_new_song_index)
                 logger.debug(f"播放已結束，自動將 current_index 移至播放清單第一首：{self.playlist_manager.current_index}")
                 
                 # 取得歌曲資訊
@@ -585,7 +829,7 @@ class MusicPlayerCog(commands.Cog):
                     
                     # 更新播放訊息
                     if self.player_message:
-                        play_embed = self.embed_manager.playing_embed(first_song, is_looping=False, is_playing=True)
+                        play_embed = self.embed_manager.playing_embed(first_song, is_looping=False, is_shuffling=self.playlist_manager.shuffle, is_playing=True)
                         await self.player_message.edit(embed=play_embed, view=self.buttons_view)
             
             # 更新按鈕狀態
@@ -615,37 +859,21 @@ class MusicPlayerCog(commands.Cog):
                     logger.error(f"清除舊播放清單按鈕時發生錯誤：{e}")
                 self.playlist_message = None
 
-            # 獲取第一頁清單資料
-            playlist_page = self.playlist_manager.get_playlist_paginated(page=1, per_page=self.playlist_per_page)
-            embed = self.embed_manager.playlist_embed(playlist_page)
-            
-            # 保存當前頁面信息到實例屬性中
-            self.current_playlist_page = 1
-            self.total_playlist_pages = playlist_page["total_pages"]
-            self.total_playlist_songs = playlist_page["total_songs"]
-            logger.debug(f"初始化播放清單分頁狀態: 當前頁={self.current_playlist_page}, 總頁數={self.total_playlist_pages}, 總歌曲數={self.total_playlist_songs}")
+            # 從第一首開始渲染播放清單
+            page = self._render_playlist_page(*self.playlist_manager.resolve_page_range(None, per_page=self.playlist_per_page))
+            self.playlist_cursor = page["cursor"]
+            logger.debug(f"初始化播放清單分頁狀態: 當前頁={page['current_page']}, 總頁數={page['total_pages']}")
 
-            # 初始化翻頁按鈕
+            # 初始化翻頁按鈕，並依是否有上一頁/下一頁設定按鈕狀態
             self.pagination_buttons = PaginationButtons(
                 self.pagination_button_callback, self.playlist_view_timeout_callback)
-
-            # 更新按鈕狀態 - 根據總頁數禁用按鈕
-            # 如果只有一頁或沒有歌曲，禁用所有翻頁按鈕
-            if self.total_playlist_pages <= 1:
-                await self.pagination_buttons.update_buttons({
-                    "previous_page": {"disabled": True},
-                    "next_page": {"disabled": True}
-                })
-                logger.debug(f"播放清單只有 {self.total_playlist_pages} 頁，禁用所有翻頁按鈕")
-            else:
-                await self.pagination_buttons.update_buttons({
-                    "previous_page": {"disabled": self.current_playlist_page == 1},
-                    "next_page": {"disabled": self.current_playlist_page >= self.total_playlist_pages}
-                })
-                logger.debug(f"播放清單有 {self.total_playlist_pages} 頁，設置翻頁按鈕狀態：previous={self.current_playlist_page == 1}, next={self.current_playlist_page >= self.total_playlist_pages}")
+            await self.pagination_buttons.update_buttons({
+                "previous_page": {"disabled": not page["has_previous"]},
+                "next_page": {"disabled": not page["has_next"]}
+            })
 
             # 發送訊息並保存原始訊息
-            await interaction.followup.send(embed=embed, view=self.pagination_buttons)
+            await interaction.followup.send(embed=page["embed"], view=self.pagination_buttons)
             response = await interaction.original_response()
             self.playlist_message = await response.channel.fetch_message(response.id)
         except Exception as e:
@@ -655,6 +883,7 @@ class MusicPlayerCog(commands.Cog):
     async def pagination_button_callback(self, interaction: discord.Interaction, action: str):
         """
         翻頁按鈕的callback
+        以游標計算新頁面並從渲染快取取得嵌入，直接以 interaction 回應編輯訊息（單次 API 呼叫）
         """
         try:
             # 確保 playlist_message 存在
@@ -663,44 +892,20 @@ class MusicPlayerCog(commands.Cog):
                 await interaction.response.send_message("無法找到播放清單，請重新執行查看播放清單指令。", ephemeral=True)
                 return
 
-            # 獲取最新的播放清單數據
-            temp_page = self.playlist_manager.get_playlist_paginated(page=1, per_page=self.playlist_per_page)
-            self.total_playlist_pages = temp_page["total_pages"]
-            self.total_playlist_songs = temp_page["total_songs"]
-            logger.debug(f"翻頁操作獲取最新狀態: 當前頁={self.current_playlist_page}, 總頁數={self.total_playlist_pages}, 總歌曲數={self.total_playlist_songs}")
-
-            # 計算新頁碼
-            new_page = self.current_playlist_page - 1 if action == "previous_page" else self.current_playlist_page + 1
-            logger.debug(f"計算新頁碼: {new_page} (從 {self.current_playlist_page})")
-            
-            # 頁碼範圍檢查
-            if new_page < 1:
-                new_page = 1
-                logger.debug(f"頁碼小於1，設置為第1頁")
-            elif new_page > self.total_playlist_pages:
-                new_page = self.total_playlist_pages 
-                logger.debug(f"頁碼大於總頁數，設置為最後一頁 {self.total_playlist_pages}")
-                
-            # 獲取新頁面的數據
-            playlist_page = self.playlist_manager.get_playlist_paginated(page=new_page, per_page=self.playlist_per_page)
-            logger.debug(f"獲取第{new_page}頁資料，實際返回頁碼:{playlist_page['current_page']}, 總頁數:{playlist_page['total_pages']}")
-
-            # 更新當前頁面
-            self.current_playlist_page = playlist_page["current_page"]
-            logger.debug(f"更新當前頁面編號為: {self.current_playlist_page}")
-
-            # 生成新嵌入
-            embed = self.embed_manager.playlist_embed(playlist_page)
+            direction = "previous" if action == "previous_page" else "next"
+            start, end = self.playlist_manager.resolve_page_range(self.playlist_cursor, direction, self.playlist_per_page)
+            page = self._render_playlist_page(start, end)
+            self.playlist_cursor = page["cursor"]
 
             # 更新按鈕狀態
             await self.pagination_buttons.update_buttons({
-                "previous_page": {"disabled": self.current_playlist_page <= 1},
-                "next_page": {"disabled": self.current_playlist_page >= self.total_playlist_pages}
+                "previous_page": {"disabled": not page["has_previous"]},
+                "next_page": {"disabled": not page["has_next"]}
             })
 
-            # 編輯原始訊息
-            await self.playlist_message.edit(embed=embed, view=self.pagination_buttons)
-            logger.debug(f"頁面已更新至第{self.current_playlist_page}頁")
+            # 直接以 interaction 回應編輯原始訊息
+            await interaction.response.edit_message(embed=page["embed"], view=self.pagination_buttons)
+            logger.debug(f"頁面已更新至第{page['current_page']}頁（位置 {start}）")
 
         except Exception as e:
             logger.error(f"翻頁處理時發生未預期錯誤：{e}")
@@ -709,6 +914,54 @@ class MusicPlayerCog(commands.Cog):
             else:
                 await interaction.followup.send("翻頁時發生錯誤，請稍後再試。", ephemeral=True)
 
+    def _render_playlist_page(self, start: int, end: int) -> dict:
+        """
+        取得指定起點的播放清單頁面與嵌入
+        頁面內容依清單版本號、頁面範圍與目前歌曲快取；預計播放時間與剩餘長度每次以目前進度重新計算後再生成嵌入
+        :param start: int, 頁面起點（0-based 位置）
+        :param end: int, 頁面終點（不含）
+        :return: dict, 包含 embed, cursor, current_page, total_pages, has_previous, has_next
+        """
+        manager = self.playlist_manager
+        current_sec = self._current_playback_seconds()
+        key = (manager.version, start, end, manager.current_index)
+
+        playlist_page = self.playlist_render_cache.get(key)
+        if playlist_page:
+            self.playlist_render_cache.move_to_end(key)
+        else:
+            playlist_page = manager.get_playlist_page(start=start, end=end, per_page=self.playlist_per_page, current_sec=current_sec)
+            # 清單版本改變後舊頁面不會再被命中，直接丟棄
+            for stale_key in [k for k in self.playlist_render_cache if k[0] != manager.version]:
+                del self.playlist_render_cache[stale_key]
+            self.playlist_render_cache[key] = playlist_page
+            while len(self.playlist_render_cache) > self.playlist_render_cache_size:
+                self.playlist_render_cache.popitem(last=False)
+
+        # 播放進度與循環/隨機模式隨時會變，時間資訊不放進快取，每首歌 O(log n)
+        page_start = playlist_page["cursor"]["start"]
+        live_page = dict(
+            playlist_page,
+            etas=[manager.get_song_eta(position, current_sec) for position in range(page_start, page_start + len(playlist_page["songs"]))],
+            remaining_duration=manager.get_remaining_duration(current_sec)
+        )
+        return {
+            "embed": self.embed_manager.playlist_embed(live_page),
+            "cursor": playlist_page["cursor"],
+            "current_page": playlist_page["current_page"],
+            "total_pages": playlist_page["total_pages"],
+            "has_previous": playlist_page["has_previous"],
+            "has_next": playlist_page["has_next"]
+        }
+
+    def _current_playback_seconds(self) -> int:
+        """
+        取得目前歌曲已播放的秒數，用於計算播放清單的預計播放時間
+        """
+        if not self.player_controller or not self.player_controller.is_playing:
+            return 0
+        return self.player_controller.get_current_status()["current_sec"]
+
     async def playlist_view_timeout_callback(self):
         logger.info("翻頁按鈕已超時，清理按鈕")
         if self.playlist_message:
@@ -736,15 +989,14 @@ class MusicPlayerCog(commands.Cog):
 
     async def song_index_autocomplete(self, interaction: discord.Interaction, current: str):
         """
-        提供播放清單歌曲編號的 Autocomplete
+        提供播放清單歌曲編號的 Autocomplete，可輸入歌曲編號或標題搜尋
         """
         try:
-            # 過濾符合當前輸入的歌曲（根據歌曲名稱或編號）
-            suggestions = [
-                discord.app_commands.Choice(name=f"{song['index']}. {song['title']}", value=song['index'])
-                for song in self.playlist_manager.playlist if current in str(song["index"])
+            # 透過播放清單的搜尋索引取得符合的歌曲（根據歌曲名稱或編號），最多 25 個選項
+            return [
+                discord.app_commands.Choice(name=f"{song['index']}. {song['title']}"[:100], value=song['index'])
+                for song in self.playlist_manager.search_songs(current, limit=25)
             ]
-            return suggestions[:25]  # 限制返回的選項數量為 25
         except Exception as e:
             logger.error(f"Autocomplete 過程中發生錯誤：{e}")
             return []
@@ -791,7 +1043,41 @@ class MusicPlayerCog(commands.Cog):
 
     async def button_action_handler(self, interaction: discord.Interaction, action: str):
         # 直接處理按鈕動作，不再使用鎖保護
-        await self._button_action_handler_core(interaction, action)
+        interaction.extras["button_started"] = time.perf_counter()
+        try:
+            await self._button_action_handler_core(interaction, action)
+        finally:
+            # 保險：任何路徑都沒有回應時補上 defer，避免使用者看到「交互失敗」
+            if not interaction.response.is_done():
+                logger.warning(f"按鈕動作 {action} 沒有回應 interaction，補上 defer")
+                await interaction.response.defer()
+
+    async def _respond_player(self, interaction: discord.Interaction, path: str = "fast", **kwargs):
+        """
+        更新播放器訊息：尚未回應 interaction 時直接以 response.edit_message 回應（一次 API 呼叫同時完成確認與編輯），
+        已回應過（例如下載前已先顯示「下載中...」）時才改為編輯訊息
+        :param interaction: discord.Interaction, 按鈕的 interaction
+        :param path: str, 回應路徑（fast：直接回應、download：需要下載的慢速路徑），用於延遲統計
+        :param kwargs: 傳給 edit 的參數（embed、view 等）
+        """
+        if interaction.response.is_done():
+            if self.player_message:
+                await self.player_message.edit(**kwargs)
+            return
+        await interaction.response.edit_message(**kwargs)
+        started = interaction.extras.get("button_started")
+        if started is not None:
+            self._record_button_latency(path, (time.perf_counter() - started) * 1000)
+
+    def _record_button_latency(self, path: str, elapsed_ms: float):
+        """
+        記錄按鈕從收到事件到回應 Discord 的延遲，分路徑統計次數、平均與最大值
+        """
+        stats = self.button_latency_stats.setdefault(path, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        stats["count"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        logger.debug(f"按鈕回應延遲（{path}）：{elapsed_ms:.1f} ms，平均 {stats['total_ms'] / stats['count']:.1f} ms，最大 {stats['max_ms']:.1f} ms，共 {stats['count']} 次")
 
     async def _button_action_handler_core(self, interaction: discord.Interaction, action: str):
         try:
@@ -813,8 +1099,8 @@ class MusicPlayerCog(commands.Cog):
                         await self.update_buttons_view()
                     else:
                         logger.warning("播放清單為空，無法播放")
-                        embed = self.embed_manager.error_embed("播放清單為空，請新增歌曲")
                         await self.update_buttons_view()
+                        await self._respond_player(interaction, view=self.buttons_view)
                         return
                 else:
                     await self.player_controller.pause()
@@ -828,17 +1114,16 @@ class MusicPlayerCog(commands.Cog):
                 if next_song:
                     # 記錄當前歌曲索引，以便在錯誤時移除
                     current_song_index = next_song['index']
-                    opus_path = os.path.join("./temp/music", f"{next_song['id']}.opus")
-                    if os.path.exists(opus_path):
+                    if self.audio_cache.contains(next_song["id"]):
                         await self.player_controller.play_song(next_song["id"])
                         current_song = next_song
                         is_playing = True
                     else:
                         # 先切換嵌入到新歌資訊，狀態顯示下載中
-                        embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_playing=False)
+                        embed = self.embed_manager.playing_embed(next_song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=False)
                         embed.set_field_at(0, name="狀態", value="下載中...", inline=False)
-                        if self.player_message:
-                            await self.player_message.edit(embed=embed, view=self.buttons_view)
+                        # 下載可能超過 interaction 的回應期限，先以「下載中...」回應，下載完成後再編輯訊息
+                        await self._respond_player(interaction, path="download", embed=embed, view=self.buttons_view)
                         # 下載新歌
                         song_info, file_path = await self.yt_dlp_manager.async_download(next_song["url"])
                         
@@ -883,17 +1168,16 @@ class MusicPlayerCog(commands.Cog):
                 if prev_song:
                     # 記錄當前歌曲索引，以便在錯誤時移除
                     current_song_index = prev_song['index']
-                    opus_path = os.path.join("./temp/music", f"{prev_song['id']}.opus")
-                    if os.path.exists(opus_path):
+                    if self.audio_cache.contains(prev_song["id"]):
                         await self.player_controller.play_song(prev_song["id"])
                         current_song = prev_song
                         is_playing = True
                     else:
                         # 先切換嵌入到新歌資訊，狀態顯示下載中
-                        embed = self.embed_manager.playing_embed(prev_song, is_looping=self.playlist_manager.loop, is_playing=False)
+                        embed = self.embed_manager.playing_embed(prev_song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=False)
                         embed.set_field_at(0, name="狀態", value="下載中...", inline=False)
-                        if self.player_message:
-                            await self.player_message.edit(embed=embed, view=self.buttons_view)
+                        # 下載可能超過 interaction 的回應期限，先以「下載中...」回應，下載完成後再編輯訊息
+                        await self._respond_player(interaction, path="download", embed=embed, view=self.buttons_view)
                         # 下載新歌
                         song_info, file_path = await self.yt_dlp_manager.async_download(prev_song["url"])
                         
@@ -932,34 +1216,43 @@ class MusicPlayerCog(commands.Cog):
                 await self.update_buttons_view()
             elif action == "loop":
                 logger.debug("按下循環開關按鈕")
-                self.playlist_manager.loop = not self.playlist_manager.loop
+                self.playlist_manager.set_loop(not self.playlist_manager.loop)
                 current_song = self.playlist_manager.get_current_song()
                 is_playing = current_status["is_playing"]
                 logger.debug(f"循環模式：{self.playlist_manager.loop}")
                 await self.update_buttons_view()
+            elif action == "shuffle":
+                logger.debug("按下隨機播放開關按鈕")
+                self.playlist_manager.set_shuffle(not self.playlist_manager.shuffle)
+                current_song = self.playlist_manager.get_current_song()
+                is_playing = current_status["is_playing"]
+                await self.update_buttons_view()
             elif action == "leave":
                 logger.debug("按下離開按鈕")
                 self.manual_disconnect = True  # 標記為手動斷開連接
                 embed = self.embed_manager.clear_playlist_embed()
-                await self.player_message.edit(embed=embed, view=None)
+                await self._respond_player(interaction, embed=embed, view=None)
                 await self.cleanup_resources()
                 return
             # 更新嵌入和按鈕狀態
             embed = self.embed_manager.playing_embed(
                 current_song,
                 is_looping=self.playlist_manager.loop,
+                is_shuffling=self.playlist_manager.shuffle,
                 is_playing=is_playing,
                 current_time=0 if action in ("next", "previous") else current_status["current_sec"]
             )
             await self.update_buttons_view()
             await self.buttons_view.update_buttons({
-                "loop": {"style": discord.ButtonStyle.green if self.playlist_manager.loop else discord.ButtonStyle.grey}
+                "loop": {"style": discord.ButtonStyle.green if self.playlist_manager.loop else discord.ButtonStyle.grey},
+                "shuffle": {"style": discord.ButtonStyle.green if self.playlist_manager.shuffle else discord.ButtonStyle.grey}
             })
-            await self.player_message.edit(embed=embed, view=self.buttons_view)
+            self._persist_player_state()
+            await self._respond_player(interaction, embed=embed, view=self.buttons_view)
         except Exception as e:
             logger.error(f"處理按鈕動作時發生錯誤：{e}")
             embed = self.embed_manager.error_embed(f"處理按鈕動作時發生錯誤：{e}")
-            await self.player_message.edit(embed=embed)
+            await self._respond_player(interaction, path="error", embed=embed)
 
     async def update_buttons_view(self):
         """
@@ -1001,6 +1294,7 @@ class MusicPlayerCog(commands.Cog):
             embed = self.embed_manager.playing_embed(
                 current_song,
                 is_looping=self.playlist_manager.loop,
+                is_shuffling=self.playlist_manager.shuffle,
                 is_playing=self.player_controller.is_playing and not self.player_controller.is_paused,
                 current_time=current_status["current_sec"]
             )
@@ -1012,6 +1306,9 @@ class MusicPlayerCog(commands.Cog):
             if self.player_message:
                 await self.player_message.edit(embed=embed, view=self.buttons_view)
                 logger.debug(f"更新播放嵌入成功：{current_song['title']} - {current_status['current_sec']}秒")
+
+            # 記錄播放進度，重新啟動後可以從這裡接續
+            self._persist_player_state()
                 
         except Exception as e:
             logger.error(f"更新播放嵌入時發生錯誤：{str(e)}")
@@ -1019,6 +1316,12 @@ class MusicPlayerCog(commands.Cog):
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
+        voice_client = self.player_controller.voice_client if self.player_controller else None
+        if voice_client and voice_client.is_connected() and voice_client.channel in (before.channel, after.channel):
+            # 有人進出機器人所在的語音頻道，更新成員數供閒置判斷使用
+            self._count_listeners()
+            logger.debug(f"語音頻道 {voice_client.channel.name} 目前有 {self.listener_count} 位成員")
+
         if member.id != self.bot.user.id:
             return
         if before.channel is not None and after.channel is None:
@@ -1028,6 +1331,82 @@ class MusicPlayerCog(commands.Cog):
                 if not self.voice_reconnect_loop.is_running():
                     self.voice_reconnect_loop.start()
 
+    def _count_listeners(self):
+        """
+        從語音頻道目前的成員計算聽眾數（不含機器人）
+        不只依賴 on_voice_state_update，機器人加入時頻道已經沒人、之後也沒有人進出的情況同樣能判斷
+        :return: int or None, 沒有連線時為 None
+        """
+        voice_client = self.player_controller.voice_client if self.player_controller else None
+        if not voice_client or not voice_client.is_connected() or not voice_client.channel:
+            self.listener_count = None
+        else:
+            self.listener_count = sum(1 for m in voice_client.channel.members if not m.bot)
+        return self.listener_count
+
+    def _idle_reason(self):
+        """
+        判斷播放器目前是否閒置
+        :return: str or None, alone（頻道沒有其他成員）、paused（暫停中）、finished（沒有在播放）或 None（使用中）
+        """
+        if self._count_listeners() == 0:
+            return "alone"
+        if self.player_controller.is_paused:
+            return "paused"
+        if not self.player_controller.is_playing:
+            return "finished"
+        return None
+
+    @tasks.loop(seconds=15)
+    async def idle_reaper(self):
+        """
+        定期檢查播放器是否閒置，超過設定的寬限時間後自動離開語音頻道並釋放資源
+        """
+        try:
+            voice_client = self.player_controller.voice_client if self.player_controller else None
+            if not voice_client or not voice_client.is_connected():
+                self.idle_reason = None
+                self.idle_since = None
+                return
+
+            reason = self._idle_reason()
+            if reason != self.idle_reason:
+                # 閒置原因改變（或恢復使用）時重新計時
+                self.idle_reason = reason
+                self.idle_since = time.monotonic() if reason else None
+                if reason:
+                    logger.debug(f"播放器開始閒置：{reason}")
+            if reason is None:
+                return
+
+            grace = self.player_settings[f"idle_{reason}_seconds"]
+            if time.monotonic() - self.idle_since >= grace:
+                await self._reap_idle_session(reason, grace)
+        except Exception as e:
+            logger.error(f"檢查播放器閒置狀態時發生錯誤：{e}")
+            logger.exception(e)
+
+    async def _reap_idle_session(self, reason: str, grace: int):
+        """
+        結束閒置的工作階段：離開語音頻道、停止 FFmpeg、清空播放清單
+        下載的音訊檔案可能仍被其他伺服器使用，只釋放本伺服器的引用，由 AudioCache 依大小上限淘汰
+        """
+        reason_text = {
+            "alone": "語音頻道中已沒有其他成員",
+            "finished": "播放清單已播放完畢",
+            "paused": "暫停時間過長"
+        }[reason]
+        logger.info(f"播放器閒置（{reason_text}）超過 {grace} 秒，自動離開語音頻道")
+        self.manual_disconnect = True  # 主動離開，不觸發自動重連
+        if self.voice_reconnect_loop.is_running():
+            self.voice_reconnect_loop.cancel()
+        if self.player_message:
+            try:
+                await self.player_message.edit(content=None, embed=self.embed_manager.idle_disconnect_embed(reason_text), view=None)
+            except Exception as e:
+                logger.error(f"更新閒置離開訊息時發生錯誤：{e}")
+        await self.cleanup_resources(clear_files=False)
+
     def get_next_reconnect_delay(self):
         """
         根據重連嘗試次數計算下一次重連的延遲時間
@@ -1079,7 +1458,7 @@ class MusicPlayerCog(commands.Cog):
             if self.player_message:
                 current_song = self.playlist_manager.get_current_song()
                 if current_song:
-                    embed = self.embed_manager.playing_embed(current_song, is_looping=self.playlist_manager.loop, is_playing=False)
+                    embed = self.embed_manager.playing_embed(current_song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=False)
                     embed.set_field_at(0, name="狀態", value=f"重新連線至語音頻道中 (第{self.reconnect_attempts+1}/{self.max_reconnect_attempts}次)...", inline=False)
                     await self.player_message.edit(embed=embed, view=self.buttons_view)
             
@@ -1143,11 +1522,10 @@ class MusicPlayerCog(commands.Cog):
             if current_song:
                 logger.info(f"嘗試恢復播放歌曲: {current_song['title']}")
                 # 檢查歌曲檔案是否存在
-                opus_path = os.path.join("./temp/music", f"{current_song['id']}.opus")
-                if os.path.exists(opus_path):
-                    logger.info(f"找到歌曲檔案: {opus_path}")
+                if self.audio_cache.contains(current_song["id"]):
+                    logger.info(f"找到歌曲檔案: {self.audio_cache.get(current_song['id'])}")
                 else:
-                    logger.warning(f"找不到歌曲檔案: {opus_path}，將嘗試重新下載")
+                    logger.warning(f"找不到歌曲檔案: {current_song['id']}，將嘗試重新下載")
                 
                 await self.player_controller.play_song(current_song["id"])
                 
@@ -1156,6 +1534,7 @@ class MusicPlayerCog(commands.Cog):
                     embed = self.embed_manager.playing_embed(
                         current_song,
                         is_looping=self.playlist_manager.loop,
+                        is_shuffling=self.playlist_manager.shuffle,
                         is_playing=True
                     )
                     await self.update_buttons_view()
@@ -1229,7 +1608,7 @@ class MusicPlayerCog(commands.Cog):
             self.playlist_manager.remove(song_index)
         
         # 更新嵌入訊息顯示錯誤
-        embed = self.embed_manager.playing_embed(song, is_looping=self.playlist_manager.loop, is_playing=False)
+        embed = self.embed_manager.playing_embed(song, is_looping=self.playlist_manager.loop, is_shuffling=self.playlist_manager.shuffle, is_playing=False)
         embed.set_field_at(
             0, 
             name="狀態", 
@@ -8,9 +8,14 @@ from typing import List
 import os
 import sys
 import json
+import time
+import asyncio
 import traceback
 from dotenv import load_dotenv
 
+from module.sharding import shard_kwargs
+from module.command_sync import sync_command_tree
+
 version = "v1.2"
 start_time = datetime.now()
 
@@ -51,15 +56,25 @@ intents.message_content = True             # 可選：接收訊息內容（必
 # ───────────────────────────────────────────────────────── #
 #  初始化 Bot 實例：設定前綴與 Intents
 # ───────────────────────────────────────────────────────── #
+# settings.json 的 sharding.enabled 為 true 時使用 AutoShardedBot，
+# 可透過 shard_count / shard_range 讓多個行程各自負責一段分片
+
+try:
+    sharding_options = shard_kwargs(settings)
+except ValueError as e:
+    logger.critical(f"分片設定錯誤：{e}")
+    sys.exit(1)
+bot_class = commands.AutoShardedBot if sharding_options else commands.Bot
 
-bot = commands.Bot(
+bot = bot_class(
     command_prefix=commands.when_mentioned ,  # 指令觸發方式為「被提及」時才觸發，例如：@Bot hello
     # 如需更改為符號前綴（如 ! 或 -），可改為：
     # 用!當前綴: command_prefix="!" 
     # 用!或-當前綴: command_prefix=["!", "-"]
     # 用@標記機器人或!當前綴: command_prefix=commands.when_mentioned_or("!")
     # 用@標記機器人當前綴: command_prefix=commands.when_mentioned
-    intents=intents
+    intents=intents,
+    **sharding_options
 )
 
 # ───────────────────────────────────────────────────────── #
@@ -107,11 +122,14 @@ class CustomHelpCommand(commands.HelpCommand):
 bot.help_command = CustomHelpCommand()
 
 # ───────────────────────────────────────────────────────── #
-# 機器人啟動後事件：載入 Cogs、同步斜線指令、設置狀態
+# 機器人初始化：登入後、連線 Gateway 前執行一次（載入 Cogs、同步斜線指令）
 # ───────────────────────────────────────────────────────── #
+# on_ready 在每次斷線重連後都會再次觸發，因此只執行一次的初始化都放在 setup_hook
 
 @bot.event
-async def on_ready():
+async def setup_hook():
+    started = time.perf_counter()
+
     # 設定擁有者 ID（用於錯誤回報與特殊權限）
     app_info = await bot.application_info()
     bot.owner_id = app_info.owner.id
@@ -123,11 +141,23 @@ async def on_ready():
     # 載入 cogs 資料夾中所有的 Extension 模組
     await load_all_extensions()
 
-    # 同步斜線指令（確保 Discord 上已註冊）
-    logger.info("[初始化] 同步斜線指令")
-    slash_command = await bot.tree.sync()
-    logger.info(f"[初始化] 已同步 {len(slash_command)} 個斜線指令")
+    # 同步斜線指令：只有指令內容變更時才呼叫 tree.sync()
+    # 設定 command_sync.dev_guild_id 時只同步到開發用伺服器，修改指令後立即生效
+    logger.info("[初始化] 檢查斜線指令是否需要同步")
+    dev_guild_id = (settings.get("command_sync") or {}).get("dev_guild_id")
+    try:
+        await sync_command_tree(bot.tree, guild_id=dev_guild_id)
+    except Exception as e:
+        logger.error(f"[初始化] 同步斜線指令失敗：{e}\n{traceback.format_exc()}")
+
+    logger.info(f"[初始化] 初始化完成，耗時 {time.perf_counter() - started:.2f} 秒")
+
+# ───────────────────────────────────────────────────────── #
+# 機器人就緒事件：設置狀態（每次重新連線後都會觸發）
+# ───────────────────────────────────────────────────────── #
 
+@bot.event
+async def on_ready():
     logger.info("[初始化] 設定機器人的狀態")
 
     # 🎮 設定機器人的狀態顯示（可自訂顯示的內容）
@@ -148,16 +178,24 @@ async def on_ready():
 #  Extension 模組載入器：自動讀取 /cogs 資料夾中的 .py
 # ───────────────────────────────────────────────────────── #
 
+async def load_extension_timed(name: str) -> bool:
+    """載入單一 Extension 並記錄耗時"""
+    started = time.perf_counter()
+    try:
+        await bot.load_extension(f'cogs.{name}')
+        logger.info(f"[初始化] 載入 Extension: {name}（{(time.perf_counter() - started) * 1000:.0f} ms）")
+        return True
+    except Exception as exc:
+        logger.error(f"[初始化] 載入 Extension 失敗: {name}（{(time.perf_counter() - started) * 1000:.0f} ms）: {exc}\n{traceback.format_exc()}")
+        return False
+
 async def load_all_extensions():
+    """同時載入所有 Extension（各模組互不相依），總耗時取決於最慢的模組"""
+    started = time.perf_counter()
     cogs_dir = os.path.join(os.path.dirname(__file__), 'cogs')
-    for filename in os.listdir(cogs_dir):
-        if filename.endswith('.py'):
-            try:
-                logger.info(f"[初始化] 載入 Extension: {filename[:-3]}")
-                await bot.load_extension(f'cogs.{filename[:-3]}')
-            except Exception as exc:
-                logger.error(f"[初始化] 載入 Extension 失敗: {exc}\n{traceback.format_exc()}")
-    logger.info("[初始化] Extension 載入完畢")
+    names = [filename[:-3] for filename in os.listdir(cogs_dir) if filename.endswith('.py')]
+    results = await asyncio.gather(*(load_extension_timed(name) for name in names))
+    logger.info(f"[初始化] Extension 載入完畢：成功 {sum(results)}/{len(names)}，耗時 {(time.perf_counter() - started) * 1000:.0f} ms")
 
 
 # ───────────────────────────────────────────────────────── #
@@ -171,7 +209,7 @@ async def load_all_extensions():
 # 系統會自動生成錯誤 Embed，私訊發送給「Bot 擁有者（maintainer）」。
 #
 # 注意：
-# - `bot.owner_id` 會在 on_ready 事件中設定（需已啟動應用程式資訊）
+# - `bot.owner_id` 會在 setup_hook 中設定（需已啟動應用程式資訊）
 # - `get_user(id)` 為同步函式，僅從 cache 中查詢（不會從 API 抓）
 # - `traceback.format_exc()` 會捕捉並格式化最後一個例外堆疊（debug 用）
 # - 你可以依據需求改為回覆錯誤給使用者（但風險是會暴露錯誤訊息）
@@ -276,6 +314,30 @@ class ManagementCommand(commands.Cog):
     async def reload(self, interaction: discord.Interaction, extension: str):
         await self._extension_action(interaction, "reload", extension)
 
+    @discord.app_commands.command(name="同步指令", description="強制同步斜線指令（僅限擁有者）")
+    @discord.app_commands.describe(scope="同步範圍")
+    @discord.app_commands.rename(scope="範圍")
+    @discord.app_commands.choices(scope=[
+        discord.app_commands.Choice(name="全域", value="global"),
+        discord.app_commands.Choice(name="此伺服器", value="guild")
+    ])
+    async def sync_commands(self, interaction: discord.Interaction, scope: str = "global"):
+        if interaction.user.id != self.bot.owner_id:
+            await interaction.response.send_message("❌ 你不是機器人擁有者，無法使用此指令。", ephemeral=True)
+            return
+        if scope == "guild" and not interaction.guild:
+            await interaction.response.send_message("⚠ 請在伺服器中使用「此伺服器」範圍。", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            result = await sync_command_tree(self.bot.tree, guild_id=interaction.guild.id if scope == "guild" else None, force=True)
+            scope_name = "全域" if scope == "global" else interaction.guild.name
+            await interaction.followup.send(embed=discord.Embed(title="✅ 已同步斜線指令", description=f"範圍：{scope_name}\n指令數量：{result['count']}", color=0x00ff00), ephemeral=True)
+        except Exception as e:
+            await interaction.followup.send(embed=discord.Embed(title="❌ 同步失敗", description=str(e), color=0xff0000), ephemeral=True)
+            logger.error(f"[管理指令] 同步斜線指令錯誤：{e}\n{traceback.format_exc()}")
+
     @discord.app_commands.command(name="機器人狀態", description="查看機器人目前狀態")
     async def status(self, interaction: discord.Interaction):
         latency = round(self.bot.latency * 1000)
@@ -286,6 +348,12 @@ class ManagementCommand(commands.Cog):
         embed.add_field(name="指令數量", value=f"前綴: `{len(self.bot.commands)}`\t斜線: `{len(self.bot.tree.get_commands())}`", inline=True)
         embed.add_field(name="WebSocket", value="已連接" if not self.bot.is_ws_ratelimited() else "受限", inline=True)
 
+        if isinstance(self.bot, commands.AutoShardedBot):
+            # 分片模式：列出此行程負責的每個分片延遲
+            shard_lines = [f"- 分片 {shard_id}：{round(shard_latency * 1000)}ms" for shard_id, shard_latency in self.bot.latencies]
+            current_shard = f"，目前伺服器位於分片 {interaction.guild.shard_id}" if interaction.guild else ""
+            embed.add_field(name=f"分片延遲（共 {self.bot.shard_count} 個{current_shard}）", value="\n".join(shard_lines) or "（尚未連線）", inline=False)
+
         target = interaction.guild.me if interaction.guild else self.bot.user
         perms = [f"- {name}" for name, value in interaction.channel.permissions_for(target) if value]
         embed.add_field(name=f"權限（{interaction.guild.name if interaction.guild else '私訊'}）", value="\n".join(perms[:10]) or "（無）", inline=False)
@@ -0,0 +1,101 @@
+"""
+斜線指令同步
+-----------
+tree.sync() 是速率限制嚴格的 API，只有指令內容變更時才需要呼叫。
+這裡將指令樹序列化後計算 SHA-256，與上次同步時保存的雜湊比較，相同就略過同步。
+"""
+import hashlib
+import json
+import os
+from typing import Optional
+import discord
+from loguru import logger
+
+
+DEFAULT_HASH_FILE = "data/command_tree_hash.json"
+
+
+def compute_tree_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """
+    計算指令樹的雜湊（依指令類型與名稱排序，與註冊順序無關）
+    :param tree: discord.app_commands.CommandTree
+    :param guild: 伺服器，None 表示全域指令
+    :return: str, SHA-256 十六進位字串
+    """
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def load_hashes(file_path: str = DEFAULT_HASH_FILE) -> dict:
+    """
+    讀取上次同步時保存的雜湊
+    :param file_path: str, 雜湊檔案路徑
+    :return: dict, {"global": hash, "<guild_id>": hash}
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"[指令同步] 讀取雜湊檔案失敗，將重新同步：{e}")
+        return {}
+
+
+def save_hashes(hashes: dict, file_path: str = DEFAULT_HASH_FILE):
+    """
+    保存同步後的雜湊（暫存檔 + rename，避免寫到一半損毀）
+    :param hashes: dict, 雜湊
+    :param file_path: str, 雜湊檔案路徑
+    """
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, file_path)
+
+
+async def sync_command_tree(tree: discord.app_commands.CommandTree, guild_id: Optional[int] = None, force: bool = False, file_path: str = DEFAULT_HASH_FILE) -> dict:
+    """
+    指令樹有變更（或強制）時才同步
+    指定 guild_id 時會暫時把全域指令複製到該伺服器，只同步到該伺服器（開發時立即生效），
+    同步後還原指令樹，之後的全域同步不會帶到複製的指令。
+    注意：Discord 上已註冊的全域指令不會被移除，該伺服器會同時看到全域與伺服器指令（重複顯示），
+    開發用的機器人若曾全域同步過，需要先清除 Discord 上的全域指令
+    :param tree: discord.app_commands.CommandTree
+    :param guild_id: int, 開發用伺服器 ID，None 表示全域同步
+    :param force: bool, 忽略雜湊強制同步
+    :param file_path: str, 雜湊檔案路徑
+    :return: dict, {"synced": bool, "count": int, "scope": str, "hash": str}
+    """
+    guild = discord.Object(id=guild_id) if guild_id else None
+    scope = str(guild_id) if guild_id else "global"
+    guild_commands = tree.get_commands(guild=guild) if guild else None
+    if guild:
+        tree.copy_global_to(guild=guild)
+
+    try:
+        current_hash = compute_tree_hash(tree, guild=guild)
+        hashes = load_hashes(file_path)
+        if not force and hashes.get(scope) == current_hash:
+            count = len(tree.get_commands(guild=guild))
+            logger.info(f"[指令同步] 指令未變更（{scope}），略過同步，共 {count} 個指令")
+            return {"synced": False, "count": count, "scope": scope, "hash": current_hash}
+
+        synced = await tree.sync(guild=guild)
+    finally:
+        if guild:
+            # 還原成複製前的伺服器指令，避免影響同一行程之後的同步
+            tree.clear_commands(guild=guild)
+            for command in guild_commands:
+                tree.add_command(command, guild=guild)
+
+    hashes[scope] = current_hash
+    try:
+        save_hashes(hashes, file_path)
+    except Exception as e:
+        logger.error(f"[指令同步] 保存雜湊失敗，下次啟動會再次同步：{e}")
+    logger.info(f"[指令同步] 已同步 {len(synced)} 個指令（{scope}{'，強制' if force else ''}）")
+    return {"synced": True, "count": len(synced), "scope": scope, "hash": current_hash}
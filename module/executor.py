@@ -0,0 +1,156 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
+
+
+class CancelToken:
+    """
+    取消權杖：在背景執行緒中執行的工作透過它登記啟動的子行程，
+    超時或取消時終止這些子行程，讓卡住的工作立即結束並釋放執行緒
+    Python 無法中斷執行中的執行緒，沒有登記子行程的工作（同步網路請求、HTML 解析、圖片處理）
+    不會被終止，需要自行限制執行時間，例如請求的連線/讀取逾時與整體期限
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self._processes = []
+        self._lock = threading.Lock()
+
+    def register(self, process):
+        """
+        登記子行程，取消時會一併終止；若已取消則立即終止
+        :param process: subprocess.Popen
+        :return: subprocess.Popen, 傳入的子行程
+        """
+        with self._lock:
+            self._processes.append(process)
+            cancelled = self.cancelled
+        if cancelled:
+            self._kill(process)
+        return process
+
+    def cancel(self):
+        """
+        取消工作並終止所有登記的子行程
+        """
+        with self._lock:
+            self.cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            self._kill(process)
+
+    @staticmethod
+    def _kill(process):
+        try:
+            if process.poll() is None:
+                process.kill()
+        except Exception as e:
+            logger.warning(f"[Executor] 終止子行程失敗：{e}")
+
+
+class SharedExecutor:
+    """
+    全程式共用的執行緒池，分為 I/O 與 CPU 兩組，避免每次呼叫都建立新的執行緒池
+    - io：子行程（yt-dlp、FFmpeg）與同步的網路請求
+    - cpu：HTML 解析、圖片處理等運算工作
+    每組都記錄排隊中、執行中、完成與超時的數量
+    超時只會讓呼叫端不再等待，執行緒要等工作本身結束才會釋放（子行程工作見 CancelToken）；
+    io 的執行緒數量需容納同時卡在自身逾時內的網路請求與子行程
+    """
+
+    def __init__(self, io_workers: int = 8, cpu_workers: int = None):
+        """
+        :param io_workers: int, I/O 執行緒數量
+        :param cpu_workers: int, CPU 執行緒數量，預設為 CPU 核心數（最多 4）
+        """
+        cpu_workers = cpu_workers or min(4, os.cpu_count() or 1)
+        self._pools = {
+            "io": ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io"),
+            "cpu": ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="cpu")
+        }
+        self._stats = {
+            name: {"workers": pool._max_workers, "queued": 0, "active": 0, "completed": 0, "timeouts": 0, "max_queued": 0}
+            for name, pool in self._pools.items()
+        }
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        """
+        取得各執行緒池的統計
+        :return: dict, {pool: {workers, queued, active, completed, timeouts, max_queued}}
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def _wrap(self, pool: str, func, args, kwargs, state: dict):
+        stats = self._stats[pool]
+
+        def runner():
+            with self._lock:
+                if state["abandoned"]:
+                    return None  # 排隊期間已超時或被取消，不再執行
+                state["started"] = True
+                stats["queued"] -= 1
+                stats["active"] += 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self._lock:
+                    stats["active"] -= 1
+                    stats["completed"] += 1
+
+        return runner
+
+    async def run(self, func, *args, pool: str = "io", timeout: float = None, cancellable: bool = False, **kwargs):
+        """
+        在共用執行緒池中執行同步函式
+        :param func: callable, 要執行的函式
+        :param pool: str, 使用的執行緒池（io / cpu）
+        :param timeout: float, 超時秒數，None 表示不限制；非子行程的工作超時後仍佔用執行緒，函式需自行設定更短的逾時
+        :param cancellable: bool, 是否以 token 參數傳入 CancelToken；超時時會終止函式登記的子行程
+        :return: 函式的回傳值
+        :raises asyncio.TimeoutError: 超過 timeout 時
+        """
+        token = None
+        if cancellable:
+            token = kwargs["token"] = CancelToken()
+
+        stats = self._stats[pool]
+        with self._lock:
+            stats["queued"] += 1
+            stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+            queued = stats["queued"]
+        if queued > stats["workers"]:
+            logger.warning(f"[Executor] {pool} 執行緒池排隊中的工作過多：{queued}（執行緒 {stats['workers']} 個）")
+
+        state = {"started": False, "abandoned": False}
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pools[pool], self._wrap(pool, func, args, kwargs, state))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                if not state["started"]:
+                    # 還在排隊就放棄，之後輪到時直接跳過
+                    state["abandoned"] = True
+                    stats["queued"] -= 1
+                if isinstance(e, asyncio.TimeoutError):
+                    stats["timeouts"] += 1
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning(f"[Executor] {getattr(func, '__name__', func)} 執行超過 {timeout} 秒，已取消")
+            if token:
+                token.cancel()
+            raise
+
+    def shutdown(self):
+        """
+        關閉所有執行緒池，不等待尚未開始的工作
+        """
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+# 全程式共用的執行器
+shared_executor = SharedExecutor()
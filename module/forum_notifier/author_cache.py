@@ -0,0 +1,88 @@
+import json
+import os
+import re
+import time
+from typing import Optional
+from loguru import logger
+
+
+# get() 找不到有效快取時的回傳值（快取的頭貼本身可能是 None）
+MISSING = object()
+
+
+def extract_uid(author_url: Optional[str]) -> Optional[str]:
+    """
+    從 Discuz 的個人空間網址提取 UID（space-uid-123.html 或 ...&uid=123）
+    :param author_url: str, 作者網址
+    :return: str or None
+    """
+    if not author_url:
+        return None
+    match = re.search(r"space-uid-(\d+)\.html", author_url) or re.search(r"[?&]uid=(\d+)", author_url)
+    return match.group(1) if match else None
+
+
+class AuthorCache:
+    """
+    作者頭貼快取（以 UID 或作者網址為鍵），記憶體中保存並可選擇同步到磁碟，超過 TTL 後重新抓取
+    """
+
+    def __init__(self, ttl: int = 86400, file_path: Optional[str] = None):
+        """
+        :param ttl: int, 快取有效秒數
+        :param file_path: str, 磁碟快取檔案路徑，None 表示只使用記憶體
+        """
+        self.ttl = ttl
+        self.file_path = file_path
+        self._entries = {}  # key -> {"avatar": str or None, "fetched_at": float}
+        self.stats = {"hits": 0, "misses": 0}
+        self._load()
+
+    def _load(self):
+        if not self.file_path:
+            return
+        try:
+            with open(self.file_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"[AuthorCache] 讀取作者快取失敗，改用空的快取：{e}")
+            return
+        now = time.time()
+        self._entries = {key: entry for key, entry in entries.items() if now - entry.get("fetched_at", 0) < self.ttl}
+        logger.debug(f"[AuthorCache] 已載入 {len(self._entries)} 筆作者快取")
+
+    def _save(self):
+        if not self.file_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+            tmp_path = f"{self.file_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.file_path)
+        except Exception as e:
+            logger.error(f"[AuthorCache] 儲存作者快取失敗：{e}")
+
+    def get(self, key: str):
+        """
+        取得快取的頭貼
+        :param key: str, UID 或作者網址
+        :return: str / None（快取的頭貼），沒有有效快取時回傳 MISSING
+        """
+        entry = self._entries.get(key)
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            self.stats["hits"] += 1
+            return entry["avatar"]
+        self.stats["misses"] += 1
+        return MISSING
+
+    def set(self, key: str, avatar: Optional[str]):
+        """
+        保存頭貼並同步到磁碟
+        :param key: str, UID 或作者網址
+        :param avatar: str or None, 頭貼網址
+        """
+        self._entries[key] = {"avatar": avatar, "fetched_at": time.time()}
+        self._save()
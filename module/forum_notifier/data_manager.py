@@ -1,6 +1,9 @@
 import aiofiles
+import copy
 import os
 import json
+import time
+from module.executor import shared_executor
 from loguru import logger
 
 async def ensure_data_file(file_path):
@@ -15,32 +18,124 @@ async def ensure_data_file(file_path):
         except Exception as e:
             logger.error(f"創建資料檔 {file_path} 時發生錯誤：{e}")
 
+# 已讀取或寫入的資料檔快取：file_path -> {"signature": (mtime_ns, size), "data": dict, "serialized": str}
+# 檔案的修改時間與大小沒有變動時直接使用記憶體中的資料，也用來判斷內容是否需要寫入
+_cache = {}
+
+def _file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _serialize(data):
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+def _preserve_corrupt_file(file_path):
+    """將無法解析的資料檔改名保留，方便事後檢查"""
+    corrupt_path = f"{file_path}.corrupt-{int(time.time())}"
+    try:
+        os.replace(file_path, corrupt_path)
+        logger.error(f"資料檔 {file_path} 內容損毀，已保留為 {corrupt_path}，將重新初始化資料")
+    except Exception as e:
+        logger.error(f"保留損毀的資料檔 {file_path} 時發生錯誤：{e}")
+
 async def load_data(file_path):
-    """讀取 JSON 文件"""
+    """
+    讀取 JSON 文件（檔案未變更時使用記憶體中的快取）
+    :param file_path: str, 資料檔路徑
+    :return: dict, 資料的複本（呼叫端可直接修改），檔案損毀時為空字典
+    """
     await ensure_data_file(file_path)  # 確保檔案存在
     try:
+        signature = _file_signature(file_path)
+        cached = _cache.get(file_path)
+        if cached and cached["signature"] == signature:
+            logger.debug(f"使用快取的資料檔：{file_path}")
+            return copy.deepcopy(cached["data"])
+
         async with aiofiles.open(file_path, "r", encoding="utf-8") as f:
             content = await f.read()
+        try:
             data = json.loads(content)
-            logger.debug(f"成功加載資料檔：{file_path}")
-            return data
+        except json.JSONDecodeError:
+            _cache.pop(file_path, None)
+            _preserve_corrupt_file(file_path)
+            return {}
+        _cache[file_path] = {"signature": signature, "data": data, "serialized": _serialize(data)}
+        logger.debug(f"成功加載資料檔：{file_path}")
+        return copy.deepcopy(data)
     except Exception as e:
         logger.error(f"讀取資料檔 {file_path} 時發生錯誤：{e}")
         return {}
 
+def _write_atomic(file_path, serialized):
+    """寫入暫存檔並 fsync 後以 rename 取代原檔，寫到一半中斷也不會損毀原檔"""
+    directory = os.path.dirname(file_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(serialized)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    if hasattr(os, "O_DIRECTORY"):
+        # 確保 rename 本身也寫入磁碟
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return _file_signature(file_path)
+
 async def save_data(file_path, data):
-    """寫入 JSON 文件"""
+    """
+    寫入 JSON 文件（內容與上次讀寫相同時略過）
+    :param file_path: str, 資料檔路徑
+    :param data: dict, 資料
+    :return: bool, 是否實際寫入
+    """
     try:
-        async with aiofiles.open(file_path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, ensure_ascii=False, indent=4))
-            logger.debug(f"成功儲存資料到檔案：{file_path}")
+        serialized = _serialize(data)
+        cached = _cache.get(file_path)
+        if cached and cached["serialized"] == serialized and os.path.exists(file_path) \
+                and _file_signature(file_path) == cached["signature"]:
+            logger.debug(f"資料未變更，略過寫入：{file_path}")
+            return False
+
+        signature = await shared_executor.run(_write_atomic, file_path, serialized, pool="io")
+        _cache[file_path] = {"signature": signature, "data": copy.deepcopy(data), "serialized": serialized}
+        logger.debug(f"成功儲存資料到檔案：{file_path}")
+        return True
     except Exception as e:
         logger.error(f"儲存資料檔 {file_path} 時發生錯誤：{e}")
+        return False
+
+def _sorted_ids(ids):
+    """依數值排序文章 ID，相同內容每次都得到相同的列表（集合的順序不固定，會讓未變更的資料被視為變更）"""
+    return sorted(ids, key=lambda thread_id: (len(thread_id), thread_id))
 
-def update_data(existing_data, new_threads, board_id):
+def get_high_water_mark(existing_data, board_id):
+    """
+    取得板塊已見過的最大非置頂文章 ID
+    舊版資料沒有 hwm 欄位時，以保存的非置頂文章列表推算
+    :param existing_data: dict, 資料
+    :param board_id: str, 板塊 ID
+    :return: int or None（板塊沒有任何紀錄）
+    """
+    board = existing_data.get(board_id)
+    if not board:
+        return None
+    if board.get("hwm") is not None:
+        return board["hwm"]
+    normalthread = board.get("normalthread", [])
+    return max(int(thread_id) for thread_id in normalthread) if normalthread else None
+
+def update_data(existing_data, new_threads, board_id, complete=True):
     """
     比對並更新數據，處理新增和移除的文章
     new_threads 應包含 `stickthread` 和 `normalthread` 鍵，每個鍵的值為 ID 列表
+    置頂文章以集合比對；非置頂文章以高水位（hwm，已見過的最大 ID）判斷，見 get_high_water_mark
+    complete 為 False（翻頁失敗或達到頁數上限，可能還有沒看到的新文章）時不提高高水位，
+    已推播但仍高於高水位的文章記錄在 announced，下次不會重複推播
     """
     logger.debug(f"開始比對與更新板塊 {board_id} 的文章數據")
 
@@ -64,20 +159,36 @@ def update_data(existing_data, new_threads, board_id):
     # 更新結果數據和本地存儲
     updated["stickthread"].extend(added_stickthread)
     removed["stickthread"].extend(removed_stickthread)
-    existing_data[board_id]["stickthread"] = list(new_stickthread)
-
-    # 比對非置頂文章
-    current_normalthread = set(existing_data[board_id]["normalthread"])
-    new_normalthread = set(new_threads.get("normalthread", []))
+    existing_data[board_id]["stickthread"] = _sorted_ids(new_stickthread)
 
-    # 找到新增和移除的非置頂文章
-    added_normalthread = new_normalthread - current_normalthread
-    removed_normalthread = current_normalthread - new_normalthread
+    # 非置頂文章：文章 ID 隨發文時間遞增，只有大於高水位（已見過的最大 ID）的才是新文章，
+    # 被回覆頂上來的舊文章不會重複推播，也不需要與上次的列表做集合比對
+    high_water_mark = get_high_water_mark(existing_data, board_id)
+    announced = set(existing_data[board_id].get("announced", []))
+    new_normalthread = new_threads.get("normalthread", [])
+    if high_water_mark is None:
+        added_normalthread = list(new_normalthread)
+    else:
+        added_normalthread = [thread_id for thread_id in new_normalthread
+                              if int(thread_id) > high_water_mark and thread_id not in announced]
+    removed_normalthread = []  # 只依 ID 判斷新文章，不追蹤離開列表的文章
 
     # 更新結果數據和本地存儲
     updated["normalthread"].extend(added_normalthread)
-    removed["normalthread"].extend(removed_normalthread)
-    existing_data[board_id]["normalthread"] = list(new_normalthread)
+    existing_data[board_id]["normalthread"] = _sorted_ids(set(new_normalthread))
+    announced.update(added_normalthread)
+    if complete and new_normalthread:
+        latest = max(int(thread_id) for thread_id in new_normalthread)
+        high_water_mark = latest if high_water_mark is None else max(high_water_mark, latest)
+    elif not complete:
+        logger.warning(f"板塊 {board_id} 本次未取得完整的文章列表，高水位維持 {high_water_mark}")
+    if high_water_mark is not None:
+        existing_data[board_id]["hwm"] = high_water_mark
+        announced = {thread_id for thread_id in announced if int(thread_id) > high_water_mark}
+    if announced:
+        existing_data[board_id]["announced"] = _sorted_ids(announced)
+    else:
+        existing_data[board_id].pop("announced", None)
 
     # 日誌輸出
     if not added_stickthread and not removed_stickthread and not added_normalthread and not removed_normalthread:
@@ -0,0 +1,88 @@
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+import discord
+from loguru import logger
+
+
+# Discord 單則訊息最多 10 個 Embed，所有 Embed 合計最多 6000 字元
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_TOTAL_EMBED_CHARS = 6000
+
+
+class EmbedBatcher:
+    """
+    將多個 Embed 合併成多 Embed 訊息發送，減少連續發送的訊息數
+    - 批次滿 10 個，或再加入會超過字元上限時立即送出
+    - 最後一次加入後 window 秒內沒有新的 Embed 也會送出
+    - 送出依加入順序進行，批次之間不會交錯
+    """
+
+    def __init__(self, send: Callable[[List[discord.Embed]], Awaitable[None]], window: float = 2.0,
+                 max_embeds: int = MAX_EMBEDS_PER_MESSAGE, max_chars: int = MAX_TOTAL_EMBED_CHARS):
+        """
+        :param send: async callable, 接收 Embed 列表並發送一則訊息
+        :param window: float, 等待更多 Embed 的秒數
+        :param max_embeds: int, 每則訊息的 Embed 上限
+        :param max_chars: int, 每則訊息的 Embed 字元總數上限
+        """
+        self._send = send
+        self.window = window
+        self.max_embeds = max_embeds
+        self.max_chars = max_chars
+        self._pending: List[discord.Embed] = []
+        self._pending_chars = 0
+        self._lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self.stats = {"embeds": 0, "messages": 0}
+
+    async def add(self, embed: discord.Embed):
+        """
+        加入一個 Embed，必要時先送出目前的批次
+        :param embed: discord.Embed
+        """
+        size = len(embed)
+        if self._pending and (len(self._pending) >= self.max_embeds or self._pending_chars + size > self.max_chars):
+            await self.flush()
+
+        self._pending.append(embed)
+        self._pending_chars += size
+        self.stats["embeds"] += 1
+
+        if len(self._pending) >= self.max_embeds:
+            await self.flush()
+        else:
+            self._restart_timer()
+
+    def _restart_timer(self):
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        self._timer = asyncio.create_task(self._flush_after_window())
+
+    async def _flush_after_window(self):
+        await asyncio.sleep(self.window)
+        self._timer = None  # 開始送出後不再被新的 add 取消，避免訊息送到一半被中斷
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"[EmbedBatcher] 定時送出失敗：{e}")
+
+    async def flush(self):
+        """
+        送出目前累積的 Embed
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending, self._pending_chars = self._pending, [], 0
+            logger.debug(f"[EmbedBatcher] 送出 {len(batch)} 個 Embed")
+            await self._send(batch)
+            self.stats["messages"] += 1
+
+    async def close(self):
+        """
+        停止計時並送出剩餘的 Embed
+        """
+        if self._timer and not self._timer.done():
+            self._timer.cancel()
+        self._timer = None
+        await self.flush()
@@ -0,0 +1,64 @@
+import aiohttp
+from loguru import logger
+
+
+def create_trace_config(stats: dict) -> aiohttp.TraceConfig:
+    """
+    建立記錄連線狀況的 TraceConfig
+    :param stats: dict, 統計資料，會累加 new_connections（新建連線，需要 TCP/TLS 握手）、
+                  reused_connections（重用連線）、dns_lookups 與 dns_cache_hits
+    :return: aiohttp.TraceConfig
+    """
+    for key in ("requests", "new_connections", "reused_connections", "dns_lookups", "dns_cache_hits"):
+        stats.setdefault(key, 0)
+
+    def counter(key):
+        async def on_event(session, trace_config_ctx, params):
+            stats[key] += 1
+        return on_event
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(counter("requests"))
+    trace_config.on_connection_create_end.append(counter("new_connections"))
+    trace_config.on_connection_reuseconn.append(counter("reused_connections"))
+    trace_config.on_dns_resolvehost_end.append(counter("dns_lookups"))
+    trace_config.on_dns_cache_hit.append(counter("dns_cache_hits"))
+    return trace_config
+
+
+def create_client_session(stats: dict, limit_per_host: int = 5, keepalive_timeout: int = 60, dns_cache_ttl: int = 600, timeout: int = 30) -> aiohttp.ClientSession:
+    """
+    建立長時間使用的 aiohttp ClientSession（連線保持、每個主機的連線上限與 DNS 快取）
+    :param stats: dict, 連線統計（見 create_trace_config）
+    :param limit_per_host: int, 同一主機的最大連線數
+    :param keepalive_timeout: int, 閒置連線保留秒數
+    :param dns_cache_ttl: int, DNS 快取秒數
+    :param timeout: int, 單一請求的總超時秒數
+    :return: aiohttp.ClientSession
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl
+    )
+    session = aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        trace_configs=[create_trace_config(stats)]
+    )
+    logger.debug(f"已建立共用的 aiohttp ClientSession（每主機 {limit_per_host} 條連線，保持 {keepalive_timeout} 秒）")
+    return session
+
+
+def format_connection_stats(stats: dict) -> str:
+    """
+    將連線統計整理成日誌文字
+    :param stats: dict, 連線統計
+    :return: str
+    """
+    new = stats.get("new_connections", 0)
+    reused = stats.get("reused_connections", 0)
+    total = new + reused
+    reuse_rate = f"{reused / total:.0%}" if total else "-"
+    return (f"請求 {stats.get('requests', 0)} 次，新建連線 {new} 次，重用連線 {reused} 次（重用率 {reuse_rate}），"
+            f"DNS 查詢 {stats.get('dns_lookups', 0)} 次，DNS 快取命中 {stats.get('dns_cache_hits', 0)} 次")
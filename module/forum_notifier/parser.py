@@ -0,0 +1,55 @@
+"""
+論壇頁面解析
+-----------
+集中管理 BeautifulSoup 的解析器與解析範圍：
+- 有安裝 lxml 時使用 lxml（C 實作，速度明顯較快），否則退回內建的 html.parser
+- 依頁面類型只解析需要的節點（SoupStrainer），不建立整份文件樹
+"""
+import re
+from typing import Optional
+from bs4 import BeautifulSoup, SoupStrainer
+from loguru import logger
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+# 各頁面類型需要的節點，解析後的 soup 只包含這些節點與其子孫
+SCOPES = {
+    # 板塊列表頁：文章列表（置頂與一般文章的 tbody 都在其中）
+    "listing": SoupStrainer("table", id="threadlisttableid"),
+    # 文章頁：標題與樓層（作者與發佈時間在樓層內）
+    "thread": SoupStrainer(id=re.compile(r"^(thread_subject|post_\d+)$")),
+    # 作者個人空間：頭貼區塊
+    "profile": SoupStrainer("div", id="uhd"),
+}
+
+
+def available_backends() -> list:
+    """
+    取得可用的解析器
+    :return: list, 依速度由快到慢排列
+    """
+    return (["lxml"] if LXML_AVAILABLE else []) + ["html.parser"]
+
+
+DEFAULT_BACKEND = available_backends()[0]
+logger.debug(f"HTML 解析器：{DEFAULT_BACKEND}")
+
+
+def parse_html(html: str, scope: Optional[str] = None, backend: Optional[str] = None) -> BeautifulSoup:
+    """
+    解析 HTML
+    :param html: str, 頁面內容
+    :param scope: str, 頁面類型（listing / thread / profile），None 表示解析整份文件
+    :param backend: str, 解析器名稱，None 或未安裝時使用 DEFAULT_BACKEND
+    :return: BeautifulSoup
+    """
+    if backend not in available_backends():
+        if backend:
+            logger.warning(f"解析器 {backend} 無法使用，改用 {DEFAULT_BACKEND}")
+        backend = DEFAULT_BACKEND
+    return BeautifulSoup(html, backend, parse_only=SCOPES[scope] if scope else None)
@@ -0,0 +1,73 @@
+import hashlib
+from loguru import logger
+
+
+class ResponseCache:
+    """
+    論壇列表頁的回應快取，用於條件式請求與內容比對
+    - 保存每個網址上次回應的 ETag / Last-Modified，下次請求帶上 If-None-Match / If-Modified-Since
+    - 保存內容的 SHA-256，伺服器不支援條件式請求時，內容相同也視為未變更
+    未變更的頁面不需要解析與比對
+    """
+
+    def __init__(self):
+        self._entries = {}  # url -> {"etag", "last_modified", "hash"}
+        self.stats = {"not_modified": 0, "unchanged": 0, "changed": 0}
+
+    def request_headers(self, url: str) -> dict:
+        """
+        產生條件式請求的標頭
+        :param url: str, 網址
+        :return: dict, 沒有快取時為空字典
+        """
+        entry = self._entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def mark_not_modified(self, url: str):
+        """
+        記錄伺服器回應 304 Not Modified
+        :param url: str, 網址
+        """
+        self.stats["not_modified"] += 1
+        logger.debug(f"[ResponseCache] 頁面未修改（304）：{url}")
+
+    def store(self, url: str, headers, body: str) -> bool:
+        """
+        保存回應並判斷內容是否與上次相同
+        :param url: str, 網址
+        :param headers: Mapping, 回應標頭
+        :param body: str, 回應內容
+        :return: bool, 內容有變更（或第一次請求）時為 True
+        """
+        body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        previous = self._entries.get(url)
+        self._entries[url] = {
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "hash": body_hash
+        }
+        if previous and previous["hash"] == body_hash:
+            self.stats["unchanged"] += 1
+            logger.debug(f"[ResponseCache] 頁面內容與上次相同：{url}")
+            return False
+        self.stats["changed"] += 1
+        return True
+
+    def invalidate(self, url: str):
+        """
+        移除單一網址的快取，下次請求會重新取得並解析
+        :param url: str, 網址
+        """
+        self._entries.pop(url, None)
+
+    def clear(self):
+        """
+        清空所有快取（例如處理失敗，下次需要重新解析與比對）
+        """
+        self._entries.clear()
@@ -2,14 +2,57 @@ import aiohttp
 import asyncio
 from asyncio_throttle import Throttler
 import re
-from bs4 import BeautifulSoup
+import time
+from module.executor import shared_executor
+from module.forum_notifier.parser import parse_html
+from module.forum_notifier.author_cache import MISSING, extract_uid
 from loguru import logger
 
+# fetch_with_limits 在頁面未變更時的回傳值
+NOT_CHANGED = object()
+
+
+def record_stage_latency(stats, stage, elapsed):
+    """
+    累加單一階段的耗時
+    :param stats: dict, 階段統計 {stage: {"count", "total", "max"}}（秒）
+    :param stage: str, 階段名稱（listing / category / thread / avatar）
+    :param elapsed: float, 耗時秒數
+    """
+    entry = stats.setdefault(stage, {"count": 0, "total": 0.0, "max": 0.0})
+    entry["count"] += 1
+    entry["total"] += elapsed
+    entry["max"] = max(entry["max"], elapsed)
+
+
+def format_stage_latency(stats):
+    """
+    將階段耗時整理成日誌文字，依平均耗時由慢到快排列
+    :param stats: dict, 階段統計
+    :return: str
+    """
+    if not stats:
+        return "無"
+    ordered = sorted(stats.items(), key=lambda item: item[1]["total"] / item[1]["count"], reverse=True)
+    return "，".join(
+        f"{stage} {entry['count']} 次 平均 {entry['total'] / entry['count'] * 1000:.0f}ms 最長 {entry['max'] * 1000:.0f}ms"
+        for stage, entry in ordered
+    )
+
+
 class Scraper:
-    def __init__(self, base_url, forum_settings=None, max_requests_per_second=5, max_concurrent_requests=5):
+    def __init__(self, base_url, forum_settings=None, max_requests_per_second=5, max_concurrent_requests=5, session=None, response_cache=None,
+                 author_cache=None, avatar_url_template=None, stage_stats=None,
+                 parser_backend=None):
         self.base_url = base_url
-        self.session = None
+        self.session = session  # 傳入共用的 ClientSession 時沿用其連線池，不在離開時關閉
+        self._owns_session = session is None
+        self.response_cache = response_cache  # 跨檢查週期保存的 ResponseCache，用於條件式請求
+        self.author_cache = author_cache  # 作者頭貼快取（AuthorCache）
+        self.avatar_url_template = avatar_url_template  # 以 UID 組成頭貼網址的範本，例如 uc_server/avatar.php?uid={uid}&size=middle
         self.forum_settings = forum_settings
+        self.parser_backend = parser_backend  # HTML 解析器（lxml / html.parser），None 表示自動選擇
+        self.stage_stats = stage_stats if stage_stats is not None else {}  # 各階段耗時（見 record_stage_latency）
         self.throttler = Throttler(rate_limit=max_requests_per_second)  # 每秒最大請求數
         self.semaphore = asyncio.Semaphore(max_concurrent_requests)  # 同時最大併發數
         self.forum_id_to_name = {}
@@ -30,31 +73,52 @@ class Scraper:
                 logger.warning(f"無法從網址中提取板塊ID：{forum_url}")
 
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
-        logger.debug("已建立 aiohttp ClientSession")
+        if self._owns_session:
+            self.session = aiohttp.ClientSession()
+            logger.debug("已建立 aiohttp ClientSession")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.session.close()
-        logger.debug("已關閉 aiohttp ClientSession")
-
-    async def FetchThreadIDs(self, forum_settings):
-        """抓取所有板塊的文章 ID 列表"""
-        tasks = [self._fetch_forum_threads(forum_name, forum_config)
+        if self._owns_session:
+            await self.session.close()
+            logger.debug("已關閉 aiohttp ClientSession")
+
+    async def FetchThreadIDs(self, forum_settings, high_water_marks=None):
+        """
+        抓取所有板塊的文章 ID 列表
+        high_water_marks 為各板塊已知的最大一般文章 ID（{forum_id: int}），
+        第一頁看不到這個邊界時會繼續抓取後續頁面，避免兩次檢查之間新增太多文章時漏掉
+        """
+        high_water_marks = high_water_marks or {}
+        max_pages = forum_settings.get("max_pages", 5)
+        tasks = [self._fetch_forum_threads(forum_name, forum_config, high_water_marks, max_pages)
                  for forum_name, forum_config in forum_settings.get('forums', {}).items()]
         logger.info("開始並行抓取所有板塊的文章ID")
         forum_results = await asyncio.gather(*tasks)
         logger.debug(f"所有板塊文章ID抓取結果: {forum_results}")
-        return {forum_id: threads for forum_id, threads in forum_results if forum_id}
-
-    async def fetch_with_limits(self, url):
-        """結合限流與並發控制的請求"""
+        # 內容未變更的板塊不回傳，呼叫端不需要比對
+        return {forum_id: threads for forum_id, threads in forum_results if forum_id and threads is not None}
+
+    async def fetch_with_limits(self, url, conditional=False):
+        """
+        結合限流與並發控制的請求
+        conditional 為 True 且有 response_cache 時使用條件式請求（ETag / If-Modified-Since），
+        伺服器回應 304 或內容與上次相同時回傳 NOT_CHANGED
+        """
+        use_cache = conditional and self.response_cache is not None
+        headers = self.response_cache.request_headers(url) if use_cache else None
         async with self.semaphore:  # 控制最大同時請求數
             async with self.throttler:  # 控制每秒最大請求數
                 try:
-                    async with self.session.get(url) as response:
+                    async with self.session.get(url, headers=headers) as response:
+                        if use_cache and response.status == 304:
+                            self.response_cache.mark_not_modified(url)
+                            return NOT_CHANGED
                         if response.status == 200:
-                            return await response.text()
+                            html = await response.text()
+                            if use_cache and not self.response_cache.store(url, response.headers, html):
+                                return NOT_CHANGED
+                            return html
                         else:
                             logger.warning(f"請求失敗，狀態碼：{response.status}，URL：{url}")
                             return None
@@ -62,8 +126,8 @@ class Scraper:
                     logger.error(f"請求 URL 時發生錯誤：{url}, 錯誤：{e}")
                     return None
 
-    async def _fetch_forum_threads(self, forum_name, forum_config):
-        """抓取單個板塊的文章 ID 列表"""
+    async def _fetch_forum_threads(self, forum_name, forum_config, high_water_marks=None, max_pages=5):
+        """抓取單個板塊的文章 ID 列表（必要時翻頁，見 _fetch_following_pages）"""
         forum_url = forum_config.get("url")
         forum_id = self._extract_forum_id(forum_url)
         if not forum_id:
@@ -73,12 +137,22 @@ class Scraper:
         logger.info(f"正在抓取板塊：{forum_name}（ID：{forum_id}），網址：{full_url}")
 
         try:
-            html = await self.fetch_with_limits(full_url)  # 使用限流與並發控制的請求方法
+            html = await self._timed("listing", self.fetch_with_limits(full_url, conditional=True))  # 使用限流與並發控制的條件式請求
+            if html is NOT_CHANGED:
+                logger.info(f"板塊 {forum_name}（ID：{forum_id}）內容未變更，略過解析")
+                return forum_id, None
             if not html:
                 return forum_id, {'stickthread': [], 'normalthread': []}
 
-            soup = BeautifulSoup(html, "html.parser")
+            soup = await self._parse_html(html, "listing")
             threads = self._extract_thread_ids(soup)
+            high_water_mark = (high_water_marks or {}).get(forum_id)
+            if high_water_mark is not None:
+                # complete 為 False 時呼叫端不會提高高水位，見 data_manager.update_data
+                threads["complete"] = await self._fetch_following_pages(forum_id, threads, high_water_mark, max_pages)
+                if not threads["complete"] and self.response_cache is not None:
+                    # 第一頁內容沒變時下次會直接略過此板塊，尚未看到的新文章就不會再被抓取
+                    self.response_cache.invalidate(full_url)
             logger.debug(f"板塊 {forum_name}（ID：{forum_id}）文章ID提取結果: {threads}")
             return forum_id, threads
 
@@ -86,6 +160,45 @@ class Scraper:
             logger.exception(f"抓取板塊時發生錯誤：{e}")
             return forum_id, {'stickthread': [], 'normalthread': []}
 
+    async def _fetch_following_pages(self, forum_id, threads, high_water_mark, max_pages):
+        """
+        依序抓取 forum-N-2.html 之後的頁面並把文章加入 threads，直到某一頁沒有 ID 大於 high_water_mark 的一般文章
+        列表預設依最後回覆排序，被回覆頂上來的舊文章可能排在新文章之間，因此不能只看頁面的最後一篇判斷邊界
+        :return: bool, 是否已看到所有新文章；翻頁失敗或達到 max_pages 時為 False
+        """
+        seen = {record["id"] for category in ("stickthread", "normalthread") for record in threads[category]}
+        page_records = threads["normalthread"]
+        page = 1
+        while any(int(record["id"]) > high_water_mark for record in page_records):
+            page += 1
+            if page > max_pages:
+                logger.warning(f"板塊 {forum_id} 翻到第 {max_pages} 頁仍有新文章（高水位 {high_water_mark}），"
+                               f"本次不提高高水位，若持續發生請調高 max_pages")
+                return False
+            page_url = f"{self.base_url}forum-{forum_id}-{page}.html"
+            logger.info(f"板塊 {forum_id} 第 {page - 1} 頁仍有新文章，繼續抓取：{page_url}")
+            try:
+                html = await self._timed("listing", self.fetch_with_limits(page_url))
+                page_threads = self._extract_thread_ids(await self._parse_html(html, "listing")) if html else None
+            except Exception as e:
+                logger.error(f"抓取板塊 {forum_id} 第 {page} 頁時發生錯誤：{e}")
+                page_threads = None
+            if page_threads is None:
+                logger.warning(f"板塊 {forum_id} 第 {page} 頁抓取失敗，本次不提高高水位")
+                return False
+            page_records = [record for record in page_threads["normalthread"] if record["id"] not in seen]
+            # 超過最後一頁時 Discuz 會回傳最後一頁的內容，沒有新的文章列即表示已經到底
+            seen.update(record["id"] for record in page_records)
+            threads["normalthread"].extend(page_records)
+        return True
+
+    async def _parse_html(self, html, scope=None):
+        """
+        在共用 CPU 執行緒池中解析 HTML，避免大型頁面阻塞事件迴圈
+        scope 為頁面類型（見 parser.SCOPES），只解析需要的節點
+        """
+        return await shared_executor.run(parse_html, html, scope, self.parser_backend, pool="cpu")
+
     def _extract_forum_id(self, forum_url):
         """從 URL 中提取板塊 ID"""
         match = re.search(r'forum-(\d+)-', forum_url)
@@ -96,28 +209,55 @@ class Scraper:
         return None
 
     def _extract_thread_ids(self, soup):
-        """從板塊頁面提取文章 ID 列表"""
+        """
+        從板塊頁面一次提取文章資訊，詳細資訊階段不需要再抓取列表頁
+        :return: dict, {'stickthread': [record], 'normalthread': [record]}，record 格式見 _extract_thread_record
+        """
         threads = {'stickthread': [], 'normalthread': []}
-        threadlist = soup.select("div#threadlist div.bm_c table#threadlisttableid tbody[id^='stickthread_'], div#threadlist div.bm_c table#threadlisttableid tbody[id^='normalthread_']")
+        threadlist = soup.select("table#threadlisttableid tbody[id^='stickthread_'], table#threadlisttableid tbody[id^='normalthread_']")
 
-        normalthread_count = 0
         logger.debug(f"找到 {len(threadlist)} 個文章元素")
         for thread in threadlist:
             thread_id = thread.get("id", "")
             category = 'stickthread' if thread_id.startswith("stickthread_") else 'normalthread'
-            if category == 'normalthread' and normalthread_count >= 10:
-                logger.debug("已達到非置頂文章數量限制（10篇），跳過剩餘貼文")
-                continue
-
             article_id = self._extract_article_id(thread_id)
             if article_id:
-                threads[category].append(article_id)
-                if category == 'normalthread':
-                    normalthread_count += 1
+                threads[category].append(self._extract_thread_record(thread, article_id, category == 'stickthread'))
             logger.debug(f"提取文章ID：{article_id}, 分類：{category}")
 
         return threads
 
+    def _extract_thread_record(self, thread_tag, article_id, stick):
+        """
+        從列表頁的文章列（tbody）提取文章資訊
+        :return: dict, {id, stick, title, url, category: {name, url}, author: {name, url}, post_time}，列表沒有顯示的欄位為 None
+        """
+        category = {"name": None, "url": None}
+        category_tag = thread_tag.select_one("th em a")
+        if category_tag and category_tag.has_attr("href"):
+            category = {"name": category_tag.get_text(strip=True), "url": self.base_url + category_tag["href"]}
+
+        title_tag = thread_tag.select_one("th a.xst")
+        author_tag = thread_tag.select_one("td.by cite a")
+        time_tag = thread_tag.select_one("td.by em")
+        post_time = None
+        if time_tag:
+            span_tag = time_tag.find("span")
+            post_time = span_tag["title"] if span_tag and span_tag.has_attr("title") else time_tag.get_text(strip=True)
+
+        return {
+            "id": article_id,
+            "stick": stick,
+            "title": title_tag.get_text(strip=True) if title_tag else None,
+            "url": f"{self.base_url}thread-{article_id}-1-1.html",
+            "category": category,
+            "author": {
+                "name": author_tag.get_text(strip=True),
+                "url": self.base_url + author_tag["href"] if author_tag.has_attr("href") else None
+            } if author_tag else None,
+            "post_time": post_time
+        }
+
     def _extract_article_id(self, thread_id):
         """從 thread_id 中提取文章 ID"""
         match = re.search(r'_(\d+)', thread_id)
@@ -127,57 +267,47 @@ class Scraper:
         logger.warning(f"無法從 thread_id 中提取文章ID：{thread_id}")
         return None
 
-    async def FetchThreadDetail(self, forum_id, thread_id, top_status=False):
-        """抓取指定文章的詳細資訊"""
+    async def FetchThreadDetail(self, forum_id, thread_id, top_status=False, record=None):
+        """
+        抓取指定文章的詳細資訊
+        各請求之間的相依關係：
+        - 分類：有列表頁的 record 時直接使用，否則抓取列表頁，與文章頁同時進行
+        - 頭貼：依賴作者網址；record 已有作者網址時與文章頁同時抓取，否則等文章頁解析出作者後再抓取
+        文章頁缺少的標題與時間以 record 補上，所有請求都經過 fetch_with_limits 的限流與並發控制
+        """
+        avatar_task = None
         try:
-            category_info = await self._fetch_category_info(forum_id, thread_id)
-            logger.debug(f"提取分類資訊：{category_info}")
             thread_url = f"{self.base_url}thread-{thread_id}-1-1.html"
-            detail = await self._fetch_thread_detail_page(thread_url, forum_id, thread_id, category_info)
-            
-            # 增加 top_status
-            detail["top_status"] = top_status
-            return detail
+            listing_author_url = (record.get("author") or {}).get("url") if record else None
+            if listing_author_url:
+                avatar_task = asyncio.create_task(self._timed("avatar", self._fetch_author_avatar(listing_author_url)))
 
-        except Exception as e:
-            logger.exception(f"抓取文章時發生錯誤：{e}")
-            return {}
-
-    async def _fetch_category_info(self, forum_id, thread_id):
-        """從板塊頁面提取文章的分類資訊"""
-        forum_url = f"{self.base_url}forum-{forum_id}-1.html"
-        async with self.session.get(forum_url) as response:
-            if response.status != 200:
-                logger.error(f"無法連接到板塊頁面：{forum_url}，狀態碼：{response.status}")
-                return {"name": None, "url": None}
-
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            thread_tag = soup.find("tbody", id=f"normalthread_{thread_id}") or soup.find("tbody", id=f"stickthread_{thread_id}")
-            if thread_tag:
-                em_tag = thread_tag.find("em")
-                if em_tag:
-                    a_tag = em_tag.find("a")
-                    if a_tag and "href" in a_tag.attrs:
-                        logger.debug(f"找到文章分類：{a_tag.get_text(strip=True)}")
-                        return {"name": a_tag.get_text(strip=True), "url": self.base_url + a_tag["href"]}
-        logger.debug(f"文章 {thread_id} 無分類資訊")
-        return {"name": None, "url": None}
-
-    async def _fetch_thread_detail_page(self, thread_url, forum_id, thread_id, category_info):
-        """抓取文章頁面的詳細資訊"""
-        async with self.session.get(thread_url) as response:
-            if response.status != 200:
-                logger.error(f"無法連接到文章頁面：{thread_url}，狀態碼：{response.status}")
+            if record:
+                category_info = record["category"]
+                page = await self._timed("thread", self._fetch_thread_page(thread_url, thread_id))
+            else:
+                category_info, page = await asyncio.gather(
+                    self._timed("category", self._fetch_category_info(forum_id, thread_id)),
+                    self._timed("thread", self._fetch_thread_page(thread_url, thread_id))
+                )
+            logger.debug(f"提取分類資訊：{category_info}")
+            if not page:
                 return {}
 
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            title = self._extract_text(soup.find("span", id="thread_subject"))
-            post_time = self._extract_post_time(soup)
-            author_info = await self._extract_author_info(soup)
-            # 移除 top_status 設置
-            # top_status = category_info["name"] == "stickthread"
+            author_info = page["author"]
+            if author_info["url"] and avatar_task and author_info["url"] == listing_author_url:
+                author_info["avatar"] = await avatar_task
+            elif author_info["url"]:
+                author_info["avatar"] = await self._timed("avatar", self._fetch_author_avatar(author_info["url"]))
+            avatar_task = None
+
+            title, post_time = page["title"], page["post_time"]
+            if record:
+                if title == "未知" and record["title"]:
+                    title = record["title"]
+                if post_time == "未知" and record["post_time"]:
+                    post_time = record["post_time"]
 
-            logger.debug(f"文章 {thread_id} 詳細資訊：標題-{title}, 時間-{post_time}, 作者-{author_info}")
             return {
                 "article_id": thread_id,
                 "title": title,
@@ -190,9 +320,62 @@ class Scraper:
                     "url": f"{self.base_url}forum-{forum_id}-1.html",
                 },
                 "url": thread_url,
-                # "top_status": top_status,  # 移除或設為 None
+                "top_status": top_status,
             }
 
+        except Exception as e:
+            logger.exception(f"抓取文章時發生錯誤：{e}")
+            return {}
+        finally:
+            # 文章頁失敗或作者不同時，不再需要預先抓取的頭貼
+            if avatar_task and not avatar_task.done():
+                avatar_task.cancel()
+
+    async def _timed(self, stage, coro):
+        """執行 coro 並記錄該階段的耗時到 stage_stats"""
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            record_stage_latency(self.stage_stats, stage, time.perf_counter() - started)
+
+    async def _fetch_category_info(self, forum_id, thread_id):
+        """從板塊頁面提取文章的分類資訊"""
+        forum_url = f"{self.base_url}forum-{forum_id}-1.html"
+        html = await self.fetch_with_limits(forum_url)
+        if not html:
+            logger.error(f"無法取得板塊頁面：{forum_url}")
+            return {"name": None, "url": None}
+
+        soup = await self._parse_html(html, "listing")
+        thread_tag = soup.find("tbody", id=f"normalthread_{thread_id}") or soup.find("tbody", id=f"stickthread_{thread_id}")
+        if thread_tag:
+            em_tag = thread_tag.find("em")
+            if em_tag:
+                a_tag = em_tag.find("a")
+                if a_tag and "href" in a_tag.attrs:
+                    logger.debug(f"找到文章分類：{a_tag.get_text(strip=True)}")
+                    return {"name": a_tag.get_text(strip=True), "url": self.base_url + a_tag["href"]}
+        logger.debug(f"文章 {thread_id} 無分類資訊")
+        return {"name": None, "url": None}
+
+    async def _fetch_thread_page(self, thread_url, thread_id):
+        """
+        抓取文章頁面，提取標題、發佈時間與作者（頭貼由 FetchThreadDetail 另外取得）
+        :return: dict {"title", "post_time", "author"}，失敗時為 None
+        """
+        html = await self.fetch_with_limits(thread_url)
+        if not html:
+            logger.error(f"無法取得文章頁面：{thread_url}")
+            return None
+
+        soup = await self._parse_html(html, "thread")
+        title = self._extract_text(soup.find("span", id="thread_subject"))
+        post_time = self._extract_post_time(soup)
+        author_info = self._extract_author_info(soup)
+        logger.debug(f"文章 {thread_id} 詳細資訊：標題-{title}, 時間-{post_time}, 作者-{author_info}")
+        return {"title": title, "post_time": post_time, "author": author_info}
+
     def _extract_text(self, tag):
         """安全提取文字"""
         text = tag.get_text(strip=True) if tag else "未知"
@@ -213,36 +396,67 @@ class Scraper:
         logger.debug("未能提取發佈時間")
         return "未知"
 
-    async def _extract_author_info(self, soup):
-        """提取文章作者資訊"""
+    def _extract_author_info(self, soup):
+        """提取文章作者資訊（頭貼預設為 None）"""
         post_div = soup.find("div", id=re.compile(r"post_\d+"))
         if post_div:
             author_tag = post_div.find("a", class_="xw1")
             if author_tag:
-                author_url = self.base_url + author_tag["href"]
-                author_avatar = await self._fetch_author_avatar(author_url)
-                logger.debug(f"作者資訊：{author_tag.get_text(strip=True)}, 頭貼-{author_avatar}")
-                return {
+                author_info = {
                     "name": author_tag.get_text(strip=True),
-                    "url": author_url,
-                    "avatar": author_avatar,
+                    "url": self.base_url + author_tag["href"],
+                    "avatar": None,
                 }
+                logger.debug(f"作者資訊：{author_info}")
+                return author_info
         logger.debug("未能提取作者資訊")
         return {"name": "未知", "url": None, "avatar": None}
 
     async def _fetch_author_avatar(self, author_url):
-        """抓取作者頭貼"""
-        async with self.session.get(author_url) as response:
-            if response.status != 200:
-                logger.error(f"無法連接到作者頁面：{author_url}，狀態碼：{response.status}")
-                return None
-            soup = BeautifulSoup(await response.text(), "html.parser")
-            avatar_tag = soup.select_one("div#uhd .icn.avt img")
-            if avatar_tag and "src" in avatar_tag.attrs:
-                avatar_url = avatar_tag["src"]
-                full_url = avatar_url if avatar_url.startswith("http") else self.base_url + avatar_url
-                logger.debug(f"抓取作者頭貼：{full_url}")
-                return full_url
+        """
+        取得作者頭貼
+        有 UID 與頭貼網址範本時直接組成網址，不發送請求；否則依序查詢快取與作者頁面
+        """
+        uid = extract_uid(author_url)
+        if uid and self.avatar_url_template:
+            avatar_url = self.avatar_url_template.format(uid=uid)
+            return avatar_url if avatar_url.startswith("http") else self.base_url + avatar_url
+
+        cache_key = uid or author_url
+        if self.author_cache:
+            cached = self.author_cache.get(cache_key)
+            if cached is not MISSING:
+                logger.debug(f"使用快取的作者頭貼：{cached}")
+                return cached
+
+        avatar = await self._fetch_author_avatar_page(author_url)
+        if avatar is MISSING:
+            # 作者頁面抓取失敗，不寫入快取，下次再重試
+            return None
+        if self.author_cache:
+            self.author_cache.set(cache_key, avatar)
+        return avatar
+
+    async def _fetch_author_avatar_page(self, author_url):
+        """
+        從作者頁面抓取頭貼
+        :return: str（頭貼網址）/ None（頁面正常但沒有頭貼），頁面抓取或解析失敗時回傳 MISSING
+        """
+        html = await self.fetch_with_limits(author_url)
+        if not html:
+            logger.error(f"無法取得作者頁面：{author_url}")
+            return MISSING
+        try:
+            soup = await self._parse_html(html, "profile")
+        except Exception as e:
+            logger.error(f"解析作者頁面失敗：{author_url}，錯誤：{e}")
+            return MISSING
+        avatar_tag = soup.select_one("div#uhd .icn.avt img")
+        if avatar_tag and "src" in avatar_tag.attrs:
+            avatar_url = avatar_tag["src"]
+            full_url = avatar_url if avatar_url.startswith("http") else self.base_url + avatar_url
+            logger.debug(f"抓取作者頭貼：{full_url}")
+            return full_url
         logger.debug("未能提取作者頭貼")
         return None
 
@@ -279,14 +493,14 @@ if __name__ == "__main__":
 
             for forum_id, threads in thread_ids.items():
                 # 測試置頂文章
-                for thread_id in threads['stickthread'][:1]:
-                    thread_detail = await scraper.FetchThreadDetail(forum_id, thread_id, top_status=True)
+                for record in threads['stickthread'][:1]:
+                    thread_detail = await scraper.FetchThreadDetail(forum_id, record["id"], top_status=True, record=record)
                     with open(f'temp/{forum_id}_stickthread_thread_detail.json', 'w', encoding='utf-8') as f:
                         json.dump(thread_detail, f, ensure_ascii=False, indent=4)
 
                 # 測試非置頂文章
-                for thread_id in threads['normalthread'][:1]:
-                    thread_detail = await scraper.FetchThreadDetail(forum_id, thread_id, top_status=False)
+                for record in threads['normalthread'][:1]:
+                    thread_detail = await scraper.FetchThreadDetail(forum_id, record["id"], top_status=False, record=record)
                     with open(f'temp/{forum_id}_normalthread_thread_detail.json', 'w', encoding='utf-8') as f:
                         json.dump(thread_detail, f, ensure_ascii=False, indent=4)
 
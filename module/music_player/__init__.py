@@ -10,14 +10,18 @@ Music Player 子模組
 - MusicPlaylistManager：播放清單管理（增刪查改、切歌、分頁）
 - YTDLPDownloader：YouTube 音樂下載與資訊提取
 - MusicEmbedManager：Discord 嵌入訊息生成
-- MusicPlayerButtons/PaginationButtons：互動式控制按鈕
+- MusicPlayerButtons/PaginationButtons：互動式控制按鈕（MusicControlButton 為可跨重啟使用的播放器按鈕）
+- MusicSessionStore：播放工作階段的持久化（重新啟動後還原播放清單與進度）
+- AudioCache：已下載音訊檔案的記憶體索引（下載器、播放器與 cog 共用）
 """
 
 from .player_controller import MusicPlayerController
 from .playlist_manager import MusicPlaylistManager
 from .yt_dlp_manager import YTDLPDownloader
 from .embed_manager import MusicEmbedManager
-from .button_manager import MusicPlayerButtons, PaginationButtons
+from .button_manager import MusicPlayerButtons, MusicControlButton, PaginationButtons
+from .session_store import MusicSessionStore
+from .audio_cache import AudioCache
 
 __all__ = [
     "MusicPlayerController",
@@ -25,5 +29,8 @@ __all__ = [
     "YTDLPDownloader",
     "MusicEmbedManager",
     "MusicPlayerButtons",
-    "PaginationButtons"
+    "MusicControlButton",
+    "PaginationButtons",
+    "MusicSessionStore",
+    "AudioCache"
 ]
@@ -0,0 +1,175 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+from loguru import logger
+
+
+class AudioCache:
+    """
+    已下載音訊檔案的記憶體索引（歌曲 ID -> 檔案路徑）
+    下載器在下載完成時登記 yt-dlp 回報的實際路徑，播放器與 cog 直接查詢索引，
+    只有初始化時掃描一次資料夾，播放與下載流程不再列出整個資料夾
+    檔案總大小超過上限時，依最近使用順序刪除沒有被任何播放清單引用的檔案
+    """
+
+    # 同一首歌有多種格式時優先使用的順序
+    AUDIO_EXTENSIONS = (".opus", ".webm", ".mp3", ".m4a")
+
+    # 預設的檔案總大小上限（位元組）
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        :param directory: str, 音訊檔案資料夾
+        :param max_bytes: int, 檔案總大小上限（位元組），超過時淘汰最久未使用且未被引用的檔案
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._paths = OrderedDict()  # 依最近使用順序排列，最久未使用的在前
+        self._sizes = {}
+        self._owners = {}  # 引用者（例如伺服器 ID）-> 回傳其仍需要的歌曲 ID 的函式
+        self._lock = threading.Lock()  # 下載在共用執行緒池中進行，需要與事件迴圈同步
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        掃描資料夾重建索引（例如重新啟動後沿用先前下載的檔案），以修改時間作為最近使用順序
+        """
+        paths = {}
+        try:
+            for name in os.listdir(self.directory):
+                song_id, ext = os.path.splitext(name)
+                if ext not in self.AUDIO_EXTENSIONS:
+                    continue
+                current = paths.get(song_id)
+                if current is None or self.AUDIO_EXTENSIONS.index(ext) < self.AUDIO_EXTENSIONS.index(os.path.splitext(current)[1]):
+                    paths[song_id] = os.path.join(self.directory, name)
+        except FileNotFoundError:
+            pass
+        stats = {}
+        for song_id, path in paths.items():
+            try:
+                stats[song_id] = os.stat(path)
+            except OSError:
+                pass
+        ordered = OrderedDict((song_id, paths[song_id]) for song_id in sorted(stats, key=lambda i: stats[i].st_mtime))
+        with self._lock:
+            self._paths = ordered
+            self._sizes = {song_id: stats[song_id].st_size for song_id in ordered}
+        logger.debug(f"[AudioCache] 已建立音訊索引，共 {len(paths)} 個檔案")
+
+    def get(self, song_id: str) -> Optional[str]:
+        """
+        取得歌曲的音訊檔案路徑
+        :param song_id: str, 歌曲 ID
+        :return: str or None, 檔案不存在（例如被手動刪除）時移除索引並回傳 None
+        """
+        with self._lock:
+            path = self._paths.get(song_id)
+            if path:
+                self._paths.move_to_end(song_id)
+        if path and not os.path.isfile(path):
+            logger.warning(f"[AudioCache] 音訊檔案已不存在，移除索引：{path}")
+            self.remove(song_id)
+            return None
+        return path
+
+    def contains(self, song_id: str) -> bool:
+        """
+        檢查歌曲是否已下載
+        :param song_id: str, 歌曲 ID
+        :return: bool
+        """
+        return self.get(song_id) is not None
+
+    def add(self, song_id: str, path: str):
+        """
+        登記下載完成的音訊檔案
+        :param song_id: str, 歌曲 ID
+        :param path: str, 檔案路徑
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        with self._lock:
+            self._paths[song_id] = path
+            self._paths.move_to_end(song_id)
+            self._sizes[song_id] = size
+        logger.debug(f"[AudioCache] 登記音訊檔案：{song_id} -> {path}")
+        self.evict()
+
+    def remove(self, song_id: str):
+        """
+        移除歌曲的索引（不刪除檔案）
+        :param song_id: str, 歌曲 ID
+        """
+        with self._lock:
+            self._paths.pop(song_id, None)
+            self._sizes.pop(song_id, None)
+
+    def clear(self):
+        """
+        清空索引（清除暫存檔案後呼叫）
+        """
+        with self._lock:
+            self._paths.clear()
+            self._sizes.clear()
+        logger.debug("[AudioCache] 已清空音訊索引")
+
+    def retain(self, owner, song_ids: Callable[[], Iterable[str]]):
+        """
+        登記引用者，淘汰時保留其仍需要的歌曲
+        :param owner: 引用者（例如伺服器 ID）
+        :param song_ids: Callable, 回傳引用者目前需要的歌曲 ID（例如播放清單中的歌曲）
+        """
+        with self._lock:
+            self._owners[owner] = song_ids
+
+    def release(self, owner):
+        """
+        移除引用者，其歌曲之後可以被淘汰（檔案不會立即刪除）
+        :param owner: 引用者
+        """
+        with self._lock:
+            self._owners.pop(owner, None)
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        檔案總大小超過上限時，依最久未使用的順序刪除未被引用的檔案
+        :return: int, 刪除的檔案數
+        """
+        with self._lock:
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return 0
+            owners = list(self._owners.values())
+        retained = set()
+        for song_ids in owners:
+            retained.update(song_ids())
+
+        removed = 0
+        with self._lock:
+            for song_id in list(self._paths):
+                if total <= self.max_bytes:
+                    break
+                if song_id in retained:
+                    continue
+                path = self._paths.pop(song_id)
+                total -= self._sizes.pop(song_id, 0)
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"[AudioCache] 刪除音訊檔案失敗：{path}，{e}")
+        if removed:
+            logger.info(f"[AudioCache] 音訊檔案超過大小上限，已淘汰 {removed} 個最久未使用的檔案")
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return len(self._paths)
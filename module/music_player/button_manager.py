@@ -1,82 +1,102 @@
-from discord.ui import View, Button
+from typing import Awaitable, Callable, Optional
+from discord.ui import View, Button, DynamicItem
 from discord import ButtonStyle, Interaction
 from loguru import logger
 
+class MusicControlButton(DynamicItem[Button], template=r"music:(?P<guild_id>\d+):(?P<action>[a-z_]+)"):
+    """
+    音樂播放器的控制按鈕，custom_id 格式為 music:{guild_id}:{action}
+    以 bot.add_dynamic_items 註冊後，按鈕事件依 custom_id 分派，不依賴記憶體中的 View 物件，
+    bot 重新啟動後舊播放器訊息上的按鈕仍然可以使用
+    """
+
+    dispatcher: Optional[Callable[[Interaction, int, str], Awaitable[None]]] = None  # 由音樂 cog 載入時設定
+
+    def __init__(self, guild_id: int, action: str, **button_kwargs):
+        """
+        :param guild_id: int, 播放器所在的伺服器 ID
+        :param action: str, 按鈕動作（previous、play_pause、next、loop、shuffle、leave）
+        :param button_kwargs: 傳給 discord.ui.Button 的外觀參數（emoji、label、style、row）
+        """
+        super().__init__(Button(custom_id=f"music:{guild_id}:{action}", **button_kwargs))
+        self.guild_id = guild_id
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction: Interaction, item: Button, match):
+        return cls(int(match["guild_id"]), match["action"])
+
+    async def callback(self, interaction: Interaction):
+        """
+        將按鈕事件交給音樂 cog 的分派函式處理
+        """
+        logger.info(f"[MusicControlButton] 收到按鈕事件: {self.action}（伺服器 {self.guild_id}）")
+        dispatcher = MusicControlButton.dispatcher
+        if dispatcher is None:
+            logger.error("[MusicControlButton] 音樂播放器尚未載入，無法處理按鈕事件")
+            await interaction.response.send_message("音樂播放器尚未載入，請稍後再試。", ephemeral=True)
+            return
+        try:
+            await dispatcher(interaction, self.guild_id, self.action)
+        except Exception as e:
+            logger.exception(f"[MusicControlButton] 處理按鈕事件時發生錯誤: {self.action}，{e}")
+
 class MusicPlayerButtons(View):
-    def __init__(self, button_handler_callback):
+    def __init__(self, guild_id: int):
         """
         初始化音樂播放器按鈕 View
-        :param button_handler_callback: 處理按鈕事件的 callback
+        按鈕事件由 MusicControlButton 依 custom_id 分派，不需要在 View 上綁定 callback
+        不預先 defer，由 handler 算出新狀態後直接以 interaction.response.edit_message 回應，
+        只有需要下載等較慢的動作才會先回應再編輯訊息
+        :param guild_id: int, 播放器所在的伺服器 ID（寫入按鈕的 custom_id）
         """
         super().__init__(timeout=None)
-        self.button_handler_callback = button_handler_callback
+        self.guild_id = guild_id
 
         # ---- 按鈕設定 ----
-        self.previous_button = Button(emoji="⏮️", style=ButtonStyle.grey, custom_id="previous", row=0)
-        self.play_pause_button = Button(emoji="⏯️", style=ButtonStyle.blurple, custom_id="play_pause", row=0)
-        self.next_button = Button(emoji="⏭️", style=ButtonStyle.grey, custom_id="next", row=0)
-        self.loop_button = Button(emoji="🔄", style=ButtonStyle.grey, custom_id="loop", row=0)
-        self.leave_button = Button(label="離開頻道", emoji="🚪", style=ButtonStyle.red, custom_id="leave", row=1)
+        self.previous_button = MusicControlButton(guild_id, "previous", emoji="⏮️", style=ButtonStyle.grey, row=0)
+        self.play_pause_button = MusicControlButton(guild_id, "play_pause", emoji="⏯️", style=ButtonStyle.blurple, row=0)
+        self.next_button = MusicControlButton(guild_id, "next", emoji="⏭️", style=ButtonStyle.grey, row=0)
+        self.loop_button = MusicControlButton(guild_id, "loop", emoji="🔄", style=ButtonStyle.grey, row=0)
+        self.shuffle_button = MusicControlButton(guild_id, "shuffle", emoji="🔀", style=ButtonStyle.grey, row=0)
+        self.leave_button = MusicControlButton(guild_id, "leave", label="離開頻道", emoji="🚪", style=ButtonStyle.red, row=1)
 
         # ---- 添加按鈕到 view ----
         self.add_item(self.previous_button)
         self.add_item(self.play_pause_button)
         self.add_item(self.next_button)
         self.add_item(self.loop_button)
+        self.add_item(self.shuffle_button)
         self.add_item(self.leave_button)
 
-        # ---- 綁定 callback ----
-        self.previous_button.callback = self.button_callback
-        self.play_pause_button.callback = self.button_callback
-        self.next_button.callback = self.button_callback
-        self.loop_button.callback = self.button_callback
-        self.leave_button.callback = self.button_callback
-
-    async def button_callback(self, interaction: Interaction):
-        """
-        處理所有音樂控制按鈕的 callback，並記錄操作
-        """
-        await interaction.response.defer()
-        button_action = interaction.data.get("custom_id")
-        if not button_action:
-            logger.error("[MusicPlayerButtons] 按鈕回調中找不到 custom_id")
-            return
-        logger.info(f"[MusicPlayerButtons] 收到按鈕事件: {button_action}")
-        if self.button_handler_callback:
-            try:
-                await self.button_handler_callback(interaction, button_action)
-            except Exception as e:
-                logger.exception(f"[MusicPlayerButtons] 處理按鈕 callback 時發生錯誤: {button_action}，{e}")
-        else:
-            logger.error("[MusicPlayerButtons] 未設置 button_handler_callback，無法處理按鈕事件")
-
     async def update_buttons(self, updates: dict):
         """
         批量更新按鈕屬性，並記錄更新內容
-        :param updates: dict, 按鈕狀態更新資訊
+        :param updates: dict, 按鈕狀態更新資訊（鍵為按鈕動作，例如 play_pause）
         """
         if not isinstance(updates, dict):
             logger.error("[MusicPlayerButtons] 傳入的 updates 參數格式錯誤，應該是字典格式")
             raise ValueError("updates 必須是字典格式！")
         logger.debug(f"[MusicPlayerButtons] 更新按鈕狀態: {updates}")
         for child in self.children:
-            if isinstance(child, Button) and child.custom_id in updates:
-                update = updates[child.custom_id]
+            if isinstance(child, MusicControlButton) and child.action in updates:
+                update = updates[child.action]
+                button = child.item
                 if not isinstance(update, dict):
-                    logger.error(f"[MusicPlayerButtons] 按鈕 {child.custom_id} 的更新數據格式錯誤：{update}")
-                    raise ValueError(f"按鈕 {child.custom_id} 的更新數據必須是字典格式！")
+                    logger.error(f"[MusicPlayerButtons] 按鈕 {child.action} 的更新數據格式錯誤：{update}")
+                    raise ValueError(f"按鈕 {child.action} 的更新數據必須是字典格式！")
                 try:
                     if "label" in update and isinstance(update["label"], str):
-                        child.label = update["label"]
+                        button.label = update["label"]
                     if "emoji" in update and isinstance(update["emoji"], str):
-                        child.emoji = update["emoji"]
+                        button.emoji = update["emoji"]
                     if "style" in update and isinstance(update["style"], ButtonStyle):
-                        child.style = update["style"]
+                        button.style = update["style"]
                     if "disabled" in update and isinstance(update["disabled"], bool):
-                        child.disabled = update["disabled"]
+                        button.disabled = update["disabled"]
                 except Exception as e:
-                    logger.exception(f"[MusicPlayerButtons] 更新按鈕 {child.custom_id} 時發生錯誤: {e}")
-                    raise ValueError(f"更新按鈕 {child.custom_id} 的過程中出現無效資訊！")
+                    logger.exception(f"[MusicPlayerButtons] 更新按鈕 {child.action} 時發生錯誤: {e}")
+                    raise ValueError(f"更新按鈕 {child.action} 的過程中出現無效資訊！")
 
     async def remove_all_buttons(self):
         """
@@ -112,8 +132,8 @@ class PaginationButtons(View):
     async def button_callback(self, interaction: Interaction):
         """
         處理所有翻頁按鈕的 callback，並記錄操作
+        不預先 defer，由 handler 直接以 interaction.response.edit_message 回應，翻頁只需一次 API 呼叫
         """
-        await interaction.response.defer()
         button_action = interaction.data.get("custom_id")
         if not button_action:
             logger.error("[PaginationButtons] 按鈕回調中找不到 custom_id")
@@ -0,0 +1,83 @@
+from typing import Iterable
+
+
+class DurationIndex:
+    """
+    歌曲時長的前綴和索引（Fenwick Tree / Binary Indexed Tree）
+    - 附加一首歌、查詢任意前綴或區間的總時長皆為 O(log n)
+    - 從中間移除歌曲會改變後續所有位置，需以 rebuild() 於 O(n) 重建
+    位置皆為 0-based，與 playlist 的 list 位置一致
+    """
+
+    def __init__(self, durations: Iterable[int] = ()):
+        self._values = []
+        self._tree = [0]  # tree[0] 不使用，Fenwick Tree 以 1-based 運算
+        self.rebuild(durations)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def total(self) -> int:
+        """所有歌曲的總時長（秒）"""
+        return self.prefix_sum(len(self._values))
+
+    def rebuild(self, durations: Iterable[int]) -> None:
+        """
+        以 O(n) 重新建立索引
+        :param durations: Iterable[int], 依播放清單順序排列的歌曲秒數
+        """
+        self._values = [int(d) for d in durations]
+        self._tree = [0] + self._values
+        size = len(self._values)
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+
+    def append(self, duration: int) -> None:
+        """
+        在尾端附加一首歌曲的時長，O(log n)
+        :param duration: int, 歌曲秒數
+        """
+        duration = int(duration)
+        i = len(self._values) + 1
+        # 新節點涵蓋 (i - lowbit(i), i]，即前面 lowbit(i) - 1 個元素加上自己
+        node = duration + self.prefix_sum(i - 1) - self.prefix_sum(i - (i & -i))
+        self._values.append(duration)
+        self._tree.append(node)
+
+    def extend(self, durations: Iterable[int]) -> None:
+        """
+        在尾端依序附加多首歌曲的時長
+        :param durations: Iterable[int], 歌曲秒數
+        """
+        for duration in durations:
+            self.append(duration)
+
+    def value_at(self, position: int) -> int:
+        """
+        取得指定位置歌曲的時長
+        :param position: int, 0-based 位置
+        """
+        return self._values[position]
+
+    def prefix_sum(self, count: int) -> int:
+        """
+        前 count 首歌曲的總時長，O(log n)
+        :param count: int, 歌曲數量（超出範圍時自動修正）
+        """
+        i = max(0, min(count, len(self._values)))
+        result = 0
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def range_sum(self, start: int, end: int) -> int:
+        """
+        位置 [start, end) 之間歌曲的總時長，O(log n)
+        """
+        if end <= start:
+            return 0
+        return self.prefix_sum(end) - self.prefix_sum(start)
@@ -8,12 +8,13 @@ class MusicEmbedManager:
     # ---------------------
     # 播放相關嵌入
     # ---------------------
-    def playing_embed(self, song_info: dict, is_looping: bool, is_playing: bool, current_time: int = 0) -> discord.Embed:
+    def playing_embed(self, song_info: dict, is_looping: bool, is_playing: bool, current_time: int = 0, is_shuffling: bool = False) -> discord.Embed:
         """
         生成播放中的嵌入訊息
         :param song_info: dict, 包含歌曲相關資訊
         :param is_looping: bool, 是否循環播放
         :param is_playing: bool, 播放狀態（True 為正在播放，False 為暫停）
+        :param is_shuffling: bool, 是否隨機播放
         :param current_time: int, 已播放的秒數
         :return: discord.Embed
         """
@@ -33,12 +34,26 @@ class MusicEmbedManager:
                 inline=False
             )
             embed.set_thumbnail(url=song_info['thumbnail'])
-            embed.set_footer(text=f"循環播放: {'開啟' if is_looping else '關閉'}")
+            embed.set_footer(text=f"循環播放: {'開啟' if is_looping else '關閉'} | 隨機播放: {'開啟' if is_shuffling else '關閉'}")
             return embed
         except Exception as e:
             logger.error(f"生成播放嵌入時發生錯誤: {e}")
             return self.error_embed("無法生成播放嵌入")
 
+    @staticmethod
+    def format_duration(seconds) -> str:
+        """
+        將秒數格式化為 m:ss 或 h:mm:ss
+        :param seconds: int, 秒數
+        :return: str
+        """
+        seconds = max(0, int(seconds or 0))
+        hours, remainder = divmod(seconds, 3600)
+        minutes, secs = divmod(remainder, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{secs:02d}"
+        return f"{minutes}:{secs:02d}"
+
     @staticmethod
     def create_progress_bar(current, total, length=20):
         """
@@ -74,15 +89,24 @@ class MusicEmbedManager:
             if not playlist_page["songs"]:
                 embed.description = "目前播放清單中沒有音樂！"
             else:
-                song_descriptions = [
-                    f"{song['index']}. [{song['title']}]({song['url']})" for song in playlist_page["songs"]
-                ]
+                etas = playlist_page.get("etas") or [None] * len(playlist_page["songs"])
+                song_descriptions = []
+                for song, eta in zip(playlist_page["songs"], etas):
+                    line = f"{song['index']}. [{song['title']}]({song['url']}) `{self.format_duration(song.get('duration'))}`"
+                    if song['index'] - 1 == playlist_page.get("current_index"):
+                        line += " ▶️ 播放中"
+                    elif eta is not None:
+                        line += f" ⏱️ {self.format_duration(eta)} 後播放"
+                    song_descriptions.append(line)
                 embed.description = "\n".join(song_descriptions)
 
-            # 添加 Footer 提供頁數與總歌曲資訊
-            embed.set_footer(
-                text=f"目前頁數: {playlist_page['current_page']}/{playlist_page['total_pages']} | 總歌曲數: {playlist_page['total_songs']}"
-            )
+            # 添加 Footer 提供頁數、總歌曲數與總長度資訊
+            footer = f"目前頁數: {playlist_page['current_page']}/{playlist_page['total_pages']} | 總歌曲數: {playlist_page['total_songs']}"
+            if "total_duration" in playlist_page:
+                footer += f" | 總長度: {self.format_duration(playlist_page['total_duration'])}"
+            if playlist_page.get("remaining_duration") is not None:
+                footer += f" | 剩餘: {self.format_duration(playlist_page['remaining_duration'])}"
+            embed.set_footer(text=footer)
             return embed
 
         except Exception as e:
@@ -149,6 +173,24 @@ class MusicEmbedManager:
             logger.error(f"生成清空播放清單嵌入時發生錯誤: {e}")
             return self.error_embed("無法生成清空播放清單嵌入")
 
+    def idle_disconnect_embed(self, reason: str):
+        """
+        生成因閒置自動離開語音頻道的提示嵌入訊息
+        :param reason: str, 閒置原因
+        :return: discord.Embed
+        """
+        try:
+            logger.info(f"生成閒置離開嵌入：{reason}")
+            embed = discord.Embed(
+                title="💤 播放器已自動離開",
+                description=f"{reason}，已離開語音頻道並清空播放清單\n請透過指令 [音樂-啟動播放器] 重新開始",
+                color=discord.Color.light_grey()
+            )
+            return embed
+        except Exception as e:
+            logger.error(f"生成閒置離開嵌入時發生錯誤: {e}")
+            return self.error_embed("無法生成閒置離開嵌入")
+
     # ---------------------
     # 錯誤相關嵌入
     # ---------------------
@@ -4,6 +4,7 @@ import os
 import time
 from typing import Optional, Dict, Callable, Any
 from loguru import logger
+from .audio_cache import AudioCache
 
 
 class MusicPlayerController:
@@ -14,13 +15,14 @@ class MusicPlayerController:
     - 提供播放狀態查詢
     - 管理語音客戶端連接
     """
-    def __init__(self, ffmpeg_path, music_dir, loop: asyncio.AbstractEventLoop, on_song_end: Callable[[], asyncio.Future]):
+    def __init__(self, ffmpeg_path, music_dir, loop: asyncio.AbstractEventLoop, on_song_end: Callable[[], asyncio.Future], audio_cache: Optional[AudioCache] = None):
         """
         初始化 MusicPlayerController
         :param ffmpeg_path: str, FFmpeg 執行檔路徑
         :param music_dir: str, 音樂檔案資料夾
         :param loop: asyncio.AbstractEventLoop, 事件循環
         :param on_song_end: Callable, 歌曲播放完畢時的回調
+        :param audio_cache: AudioCache, 與下載器共用的音訊索引，未提供時自行建立
         """
         # 檢查 FFmpeg 路徑
         if not os.path.exists(ffmpeg_path):
@@ -44,8 +46,8 @@ class MusicPlayerController:
         self.loop = loop
         self.on_song_end = on_song_end
         
-        # 音頻緩存，提高效能
-        self._audio_cache = {}
+        # 音訊檔案索引，查詢歌曲檔案時不需要檢查資料夾
+        self.audio_cache = audio_cache or AudioCache(self.music_dir)
         
         # 新增：最後操作時間戳，用於判斷是否是手動操作導致的切換
         self.last_manual_operation_time = 0
@@ -60,10 +62,11 @@ class MusicPlayerController:
         self.voice_client = voice_client
         logger.info("已設定 voice_client")
 
-    async def play_song(self, song_id: str):
+    async def play_song(self, song_id: str, start_offset: int = 0):
         """
         播放指定歌曲
         :param song_id: str, 歌曲 ID
+        :param start_offset: int, 從第幾秒開始播放（還原工作階段時接續先前的進度）
         """
         # 檢查語音客戶端
         if not self.voice_client or not self.voice_client.is_connected():
@@ -86,16 +89,16 @@ class MusicPlayerController:
         self.is_playing = True
         self.is_paused = False
         self.start_time = time.time()  # 使用 time.time() 代替 asyncio.get_running_loop().time() 提高兼容性
-        self.paused_time = 0
+        self.paused_time = max(0, int(start_offset))  # 已播放秒數從起始位置開始計算
         
         # 更新手動操作時間戳
         self.last_manual_operation_time = time.time()
         
         # 創建音頻源
-        audio_source = self._create_audio_source(file_path)
+        audio_source = self._create_audio_source(file_path, start_offset=self.paused_time)
         
         # 開始播放
-        logger.info(f"開始播放歌曲: {song_id} ({file_path})")
+        logger.info(f"開始播放歌曲: {song_id} ({file_path})" + (f"，從 {self.paused_time} 秒開始" if self.paused_time else ""))
         self.voice_client.play(audio_source, after=self._play_finished_callback)
 
     async def stop(self):
@@ -171,24 +174,16 @@ class MusicPlayerController:
         :param song_id: 歌曲ID
         :return: 文件路徑或None
         """
-        # 優先查找 Opus 格式檔案
-        opus_path = os.path.join(self.music_dir, f"{song_id}.opus")
-        if os.path.exists(opus_path):
-            return opus_path
-            
-        # 檢查其他常見音頻格式
-        for extension in [".webm", ".mp3", ".m4a"]:
-            potential_path = os.path.join(self.music_dir, f"{song_id}{extension}")
-            if os.path.exists(potential_path):
-                return potential_path
-        return None
+        return self.audio_cache.get(song_id)
     
-    def _create_audio_source(self, file_path: str) -> discord.AudioSource:
+    def _create_audio_source(self, file_path: str, start_offset: int = 0) -> discord.AudioSource:
         """
         創建音頻源，優先使用 Opus 格式以提高效能
         :param file_path: 音頻文件路徑
+        :param start_offset: int, 從第幾秒開始播放（以 FFmpeg 輸入端 -ss 快速定位）
         :return: Discord音頻源
         """
+        before_options = f"-ss {start_offset}" if start_offset else None
         # 檢查檔案類型，如果是 Opus 使用專用的播放器
         if file_path.endswith(".opus"):
             logger.info("檢測到 Opus 音訊格式，使用 Opus 播放器")
@@ -197,6 +192,7 @@ class MusicPlayerController:
                     source=file_path,
                     executable=self.ffmpeg_path,
                     bitrate=192,  # 和下載時相同的比特率
+                    before_options=before_options,
                 )
             except Exception as e:
                 logger.error(f"使用 Opus 播放器失敗，退回至 PCM: {e}")
@@ -207,6 +203,7 @@ class MusicPlayerController:
         return discord.FFmpegPCMAudio(
             source=file_path,
             executable=self.ffmpeg_path,
+            before_options=before_options,
             # PCM 音質參數優化：
             # - 保持 48kHz 與立體聲以維持高音質
             # - 增加處理線程數提高效能
@@ -243,5 +240,5 @@ class MusicPlayerController:
         """
         清除音頻緩存
         """
-        self._audio_cache.clear()
+        self.audio_cache.clear()
         logger.debug("已清除音頻緩存")
@@ -1,16 +1,36 @@
-from typing import Optional
+import random
+from collections import Counter, deque
+from typing import Callable, Optional
 from loguru import logger
 
+from .duration_index import DurationIndex
+from .search_index import PlaylistSearchIndex
+
 class MusicPlaylistManager:
     """
     播放清單管理器：負責管理歌曲的新增、刪除、取得下一首、上一首、清單重排等功能
-    提供清晰的歌曲管理邏輯，包括支援循環播放模式與分頁查看
+    提供清晰的歌曲管理邏輯，包括支援循環播放模式、隨機播放模式與分頁查看
     """
 
+    REQUIRED_KEYS = frozenset({"id", "title", "url", "duration", "uploader", "thumbnail", "uploader_url"})
+
     def __init__(self):
         self.playlist = []  # 儲存歌曲資訊的列表
         self.current_index = -1  # 目前的播放的歌曲index
         self.loop = False  # 初始為非循環播放模式
+        self.version = 0  # 清單內容版本號，每次新增、移除或清空都會遞增，供分頁游標與渲染快取判斷是否過期
+        self.on_change: Optional[Callable[[dict], None]] = None  # 清單變更時的回調（例如寫入工作階段紀錄）
+        self._id_counts = Counter()  # 歌曲 ID 索引（ID -> 出現次數），與 playlist 同步維護
+        self._durations = DurationIndex()  # 歌曲時長的前綴和索引，用於計算預計播放時間與總長度
+        self._search_index = PlaylistSearchIndex()  # 歌曲標題的搜尋索引，用於 autocomplete
+
+        # 隨機播放：以稀疏的 Fisher–Yates 逐步產生位置排列，不複製或打亂 playlist 本身
+        self.shuffle = False
+        self._shuffle_swaps = {}  # 排列中被交換過的位置（虛擬位置 -> 實際位置），未出現的鍵代表位置本身
+        self._shuffle_cursor = 0  # 本輪已抽出的數量，[cursor, len) 為尚未播放的位置
+        self._shuffle_skip = None  # 本輪開始時正在播放的位置，抽到時直接略過
+        self._shuffle_next = None  # 預先抽出的下一首位置（供 get_next_song_info 查詢與預載）
+        self._shuffle_history = deque(maxlen=200)  # 隨機播放的歷史紀錄（歌曲 dict），供上一首使用
 
     def add(self, song: dict) -> dict:
         """
@@ -18,18 +38,22 @@ class MusicPlaylistManager:
         :param song: dict, 必須包含 id, title, url, duration, uploader, thumbnail, uploader_url
         :return: dict, 加入後的歌曲資訊（含 index）
         """
-        required_keys = {"id", "title", "url", "duration", "uploader", "thumbnail", "uploader_url"}
-        if not isinstance(song, dict) or not required_keys.issubset(song):
+        if not isinstance(song, dict) or not self.REQUIRED_KEYS.issubset(song):
             logger.error(f"新增歌曲失敗，資訊格式錯誤: {song}")
-            raise ValueError(f"歌曲資訊格式錯誤，必須包含以下欄位: {required_keys}")
+            raise ValueError(f"歌曲資訊格式錯誤，必須包含以下欄位: {set(self.REQUIRED_KEYS)}")
 
         song_with_index = {"index": len(self.playlist) + 1, **song}
         self.playlist.append(song_with_index)
+        self._id_counts[song_with_index["id"]] += 1
+        self._durations.append(self._duration_of(song_with_index))
+        self._search_index.add(song_with_index)
+        self.version += 1
         logger.info(f"已新增歌曲: {song_with_index['title']} (ID: {song_with_index['id']})，目前清單共 {len(self.playlist)} 首")
         # 如果是第一首，初始化 current_index
         if len(self.playlist) == 1:
             self.current_index = 0
             logger.debug("播放清單原本為空，current_index 初始化為 0")
+        self._emit({"op": "add", "songs": [song_with_index], "current_index": self.current_index})
         return song_with_index
 
     def remove(self, index: int) -> list:
@@ -59,6 +83,9 @@ class MusicPlaylistManager:
             return self.playlist
             
         removed_song = self.playlist.pop(remove_pos)
+        self._forget_id(removed_song["id"])
+        self._search_index.remove(removed_song)
+        self.version += 1
         logger.info(f"已移除歌曲: {removed_song['title']} (ID: {removed_song['id']})，剩餘 {len(self.playlist)} 首")
         
         # 修正 current_index
@@ -74,6 +101,9 @@ class MusicPlaylistManager:
             logger.debug("播放清單已清空，current_index 設為 -1")
             
         self._reindex_playlist()
+        self._durations.rebuild(self._duration_of(song) for song in self.playlist)
+        self._remap_shuffle_round(removed=remove_pos)
+        self._emit({"op": "remove", "position": remove_pos, "current_index": self.current_index})
         return self.playlist
 
     def clear(self) -> None:
@@ -83,6 +113,74 @@ class MusicPlaylistManager:
         logger.info(f"清空播放清單，原有 {len(self.playlist)} 首歌曲")
         self.playlist = []
         self.current_index = -1
+        self._id_counts.clear()
+        self._durations.rebuild([])
+        self._search_index.clear()
+        self.version += 1
+        self._reset_shuffle_round()
+        self._shuffle_history.clear()
+        self._emit({"op": "clear", "current_index": -1})
+
+    def contains(self, song_id: str) -> bool:
+        """
+        以 ID 索引判斷歌曲是否已在播放清單中（O(1)）
+        :param song_id: str, 歌曲 ID
+        :return: bool
+        """
+        return self._id_counts.get(song_id, 0) > 0
+
+    def search_songs(self, query: str, limit: int = 25) -> list:
+        """
+        依歌曲編號或標題搜尋歌曲，供 autocomplete 使用
+        - 數字查詢：先列出編號完全相符的歌曲，再列出編號以該數字開頭的歌曲
+        - 文字查詢：透過標題索引比對，不需逐首掃描播放清單
+        :param query: str, 使用者輸入
+        :param limit: int, 最多回傳幾首
+        :return: list[dict], 歌曲列表
+        """
+        query = (query or "").strip()
+        if not query:
+            return self.playlist[:limit]
+
+        results = []
+        if query.isdigit():
+            # 依序產生 n, n0~n9, n00~n99 ... 直到超出清單長度，每一步都是 O(1) 的位置查詢
+            low = high = int(query)
+            while low <= len(self.playlist) and len(results) < limit:
+                for index in range(max(low, 1), min(high, len(self.playlist)) + 1):
+                    results.append(self.playlist[index - 1])
+                    if len(results) >= limit:
+                        break
+                low, high = low * 10, high * 10 + 9
+                if low == 0:
+                    break
+
+        if len(results) < limit:
+            seen = {id(song) for song in results}
+            for song in self._search_index.search(query, limit=limit):
+                if id(song) not in seen:
+                    results.append(song)
+                    if len(results) >= limit:
+                        break
+        return results
+
+    @staticmethod
+    def _duration_of(song: dict) -> int:
+        """
+        取得歌曲秒數，缺少或格式錯誤時視為 0
+        """
+        try:
+            return max(0, int(song.get("duration") or 0))
+        except (TypeError, ValueError):
+            return 0
+
+    def _forget_id(self, song_id: str) -> None:
+        """
+        從 ID 索引中扣除一次出現次數，歸零時移除該鍵
+        """
+        self._id_counts[song_id] -= 1
+        if self._id_counts[song_id] <= 0:
+            del self._id_counts[song_id]
 
     def get_current_song(self) -> Optional[dict]:
         """
@@ -102,7 +200,17 @@ class MusicPlaylistManager:
         if not self.playlist or len(self.playlist) == 1:
             logger.debug("切換下一首失敗，播放清單為空或僅一首")
             return None
-        if self.loop:
+        if self.shuffle:
+            position = self._peek_shuffle_position()
+            if position is None:
+                logger.debug("切換下一首失敗，本輪隨機播放已結束且非循環模式")
+                return None
+            self._shuffle_next = None
+            current_song = self.get_current_song()
+            if current_song:
+                self._shuffle_history.append(current_song)
+            self.current_index = position
+        elif self.loop:
             self.current_index = (self.current_index + 1) % len(self.playlist)
         else:
             if self.current_index + 1 < len(self.playlist):
@@ -111,6 +219,7 @@ class MusicPlaylistManager:
                 logger.debug("切換下一首失敗，已到清單末尾且非循環模式")
                 return None
         logger.info(f"切換到下一首: {self.playlist[self.current_index]['title']} (index: {self.current_index})")
+        self._emit({"op": "update", "current_index": self.current_index})
         return self.playlist[self.current_index]
 
     def switch_to_previous_song(self) -> Optional[dict]:
@@ -121,7 +230,14 @@ class MusicPlaylistManager:
         if not self.playlist or len(self.playlist) == 1:
             logger.debug("切換上一首失敗，播放清單為空或僅一首")
             return None
-        if self.loop:
+        if self.shuffle:
+            previous_song = self._peek_shuffle_history()
+            if previous_song is None:
+                logger.debug("切換上一首失敗，隨機播放沒有可返回的歷史紀錄")
+                return None
+            self._shuffle_history.pop()
+            self.current_index = previous_song["index"] - 1
+        elif self.loop:
             self.current_index = (self.current_index - 1) % len(self.playlist)
         else:
             if self.current_index > 0:
@@ -130,15 +246,21 @@ class MusicPlaylistManager:
                 logger.debug("切換上一首失敗，已到清單開頭且非循環模式")
                 return None
         logger.info(f"切換到上一首: {self.playlist[self.current_index]['title']} (index: {self.current_index})")
+        self._emit({"op": "update", "current_index": self.current_index})
         return self.playlist[self.current_index]
 
     def get_next_song_info(self) -> Optional[dict]:
         """
         僅查詢下一首歌（不改變 current_index），若無下一首則回傳 None。
+        隨機播放時會預先抽出下一首並保留，之後的 switch_to_next_song 會切換到同一首
         """
         if not self.playlist or len(self.playlist) == 1:
             return None
-        if self.loop:
+        if self.shuffle:
+            idx = self._peek_shuffle_position()
+            if idx is None:
+                return None
+        elif self.loop:
             idx = (self.current_index + 1) % len(self.playlist)
         else:
             if self.current_index + 1 < len(self.playlist):
@@ -154,7 +276,12 @@ class MusicPlaylistManager:
         """
         if not self.playlist or len(self.playlist) == 1:
             return None
-        if self.loop:
+        if self.shuffle:
+            previous_song = self._peek_shuffle_history()
+            if previous_song is None:
+                return None
+            idx = previous_song["index"] - 1
+        elif self.loop:
             idx = (self.current_index - 1) % len(self.playlist)
         else:
             if self.current_index > 0:
@@ -164,6 +291,171 @@ class MusicPlaylistManager:
         logger.debug(f"查詢上一首: {self.playlist[idx]['title']} (index: {idx})")
         return self.playlist[idx]
 
+    def set_shuffle(self, enabled: bool) -> None:
+        """
+        開啟或關閉隨機播放模式，每次切換都會開始新的一輪並清除歷史紀錄
+        :param enabled: bool, 是否開啟隨機播放
+        """
+        self.shuffle = enabled
+        self._reset_shuffle_round()
+        self._shuffle_history.clear()
+        logger.info(f"隨機播放模式：{'開啟' if enabled else '關閉'}")
+        self._emit({"op": "update", "shuffle": enabled})
+
+    def set_loop(self, enabled: bool) -> None:
+        """
+        開啟或關閉循環播放模式
+        :param enabled: bool, 是否開啟循環播放
+        """
+        self.loop = enabled
+        logger.info(f"循環播放模式：{'開啟' if enabled else '關閉'}")
+        self._emit({"op": "update", "loop": enabled})
+
+    def jump_to(self, position: int) -> Optional[dict]:
+        """
+        直接切換到指定位置的歌曲（例如播放結束後新增歌曲時從新歌開始播放）
+        :param position: int, 歌曲在清單中的位置（0-based）
+        :return: dict or None, 切換後的歌曲，位置無效時回傳 None
+        """
+        if not (0 <= position < len(self.playlist)):
+            logger.warning(f"切換歌曲失敗，位置 {position} 超出清單範圍")
+            return None
+        self.current_index = position
+        self._remap_shuffle_round(played=position)
+        logger.debug(f"直接切換到位置 {position}: {self.playlist[position]['title']}")
+        self._emit({"op": "update", "current_index": position})
+        return self.playlist[position]
+
+    def restore_state(self, state: dict) -> None:
+        """
+        從工作階段狀態還原清單，直接使用保存的歌曲資訊，不需要重新解析
+        還原過程不會觸發 on_change
+        :param state: dict, 包含 playlist, current_index, loop, shuffle
+        """
+        on_change, self.on_change = self.on_change, None
+        try:
+            self.clear()
+            # 依原本的順序還原（不去除重複，清單中可能有同一首歌被加入多次），目前位置隨之對應
+            saved = state.get("playlist", [])
+            current_index = state.get("current_index", 0)
+            songs = []
+            for position, song in enumerate(saved):
+                if not isinstance(song, dict) or not self.REQUIRED_KEYS.issubset(song):
+                    logger.warning(f"還原時略過格式錯誤的歌曲：{song}")
+                    if position < current_index:
+                        current_index -= 1
+                    continue
+                songs.append({**song, "index": len(songs) + 1})
+            self._extend_playlist(songs)
+            self.current_index = current_index if 0 <= current_index < len(self.playlist) else (0 if self.playlist else -1)
+            self.loop = bool(state.get("loop", False))
+            self.set_shuffle(bool(state.get("shuffle", False)))
+        finally:
+            self.on_change = on_change
+        logger.info(f"已還原播放清單：{len(self.playlist)} 首，目前位置 {self.current_index}")
+
+    def _emit(self, op: dict) -> None:
+        """
+        通知清單變更，回調發生錯誤時只記錄不中斷操作
+        """
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(op)
+        except Exception as e:
+            logger.exception(f"清單變更回調發生錯誤：{e}")
+
+    def _reset_shuffle_round(self) -> None:
+        """
+        開始新一輪隨機排列（O(1)），目前播放中的歌曲在本輪中不會再被抽到
+        """
+        self._shuffle_swaps = {}
+        self._shuffle_cursor = 0
+        self._shuffle_skip = self.current_index if self.current_index >= 0 else None
+        self._shuffle_next = None
+
+    def _remap_shuffle_round(self, removed: Optional[int] = None, played: Optional[int] = None) -> None:
+        """
+        清單位置改變時保留本輪的進度，只重新對應尚未播放的位置（O(尚未播放的數量)），
+        已播放過的歌曲在本輪結束前不會再被抽到
+        :param removed: int, 被移除的位置（之後的位置往前移一格）
+        :param played: int, 直接切換到的位置（視為本輪已播放）
+        """
+        if not self.shuffle:
+            self._reset_shuffle_round()
+            return
+        old_length = len(self.playlist) + (1 if removed is not None else 0)
+
+        def remap(position):
+            if position is None or position == removed or position == played:
+                return None
+            return position - 1 if removed is not None and position > removed else position
+
+        unplayed = [remap(self._shuffle_swaps.get(v, v)) for v in range(self._shuffle_cursor, old_length)]
+        unplayed = [position for position in unplayed if position is not None]
+        self._shuffle_skip = remap(self._shuffle_skip)
+        self._shuffle_next = remap(self._shuffle_next)
+        # 以新的長度重建稀疏排列：[cursor, len) 依序對應尚未播放的位置
+        self._shuffle_cursor = len(self.playlist) - len(unplayed)
+        self._shuffle_swaps = {
+            self._shuffle_cursor + offset: position
+            for offset, position in enumerate(unplayed)
+            if position != self._shuffle_cursor + offset
+        }
+
+    def _draw_shuffle_position(self) -> Optional[int]:
+        """
+        以遞增式 Fisher–Yates 從尚未播放的位置中抽出一個（每步 O(1)）
+        本輪抽完時，循環模式會開始新的一輪，否則回傳 None
+        """
+        restarted = False
+        while True:
+            if self._shuffle_cursor >= len(self.playlist):
+                if not self.loop or restarted:
+                    return None
+                logger.debug("本輪隨機播放已結束，循環模式開始新的一輪")
+                self._reset_shuffle_round()
+                restarted = True
+                continue
+            cursor = self._shuffle_cursor
+            pick = random.randrange(cursor, len(self.playlist))
+            position = self._shuffle_swaps.pop(pick, pick)
+            if pick != cursor:
+                self._shuffle_swaps[pick] = self._shuffle_swaps.pop(cursor, cursor)
+            self._shuffle_cursor += 1
+            if position == self._shuffle_skip:
+                self._shuffle_skip = None
+                continue
+            return position
+
+    def _peek_shuffle_position(self) -> Optional[int]:
+        """
+        取得（必要時抽出）隨機播放的下一個位置，重複查詢會得到同一個結果
+        """
+        if self._shuffle_next is None:
+            self._shuffle_next = self._draw_shuffle_position()
+        return self._shuffle_next
+
+    def _peek_shuffle_history(self) -> Optional[dict]:
+        """
+        取得隨機播放歷史中最近一首仍在清單內的歌曲，順便丟棄已被移除的紀錄
+        """
+        while self._shuffle_history:
+            song = self._shuffle_history[-1]
+            if self._position_of(song) is not None:
+                return song
+            self._shuffle_history.pop()
+        return None
+
+    def _position_of(self, song: dict) -> Optional[int]:
+        """
+        以歌曲物件本身查詢它目前在清單中的位置（O(1)），已被移除時回傳 None
+        """
+        position = song.get("index", 0) - 1
+        if 0 <= position < len(self.playlist) and self.playlist[position] is song:
+            return position
+        return None
+
     def _reindex_playlist(self) -> None:
         """
         重新編號播放清單內所有歌曲的 index 欄位。
@@ -172,37 +464,173 @@ class MusicPlaylistManager:
             song["index"] = idx
         logger.debug("已重新編號播放清單 index")
 
-    def get_playlist_paginated(self, page: int = 1, per_page: int = 5) -> dict:
+    def get_playlist_paginated(self, page: int = 1, per_page: int = 5, current_sec: int = 0) -> dict:
         """
         取得分頁後的播放清單資訊。
+        預計播放時間與剩餘總長度透過時長前綴和索引計算，每首歌 O(log n)，不需逐首加總
         :param page: int, 目前頁數（從 1 開始）
         :param per_page: int, 每頁顯示幾首
-        :return: dict, 包含 songs, current_page, total_pages, total_songs
+        :param current_sec: int, 目前歌曲已播放的秒數
+        :return: dict, 包含 songs, etas, current_page, total_pages, total_songs, current_index, total_duration, remaining_duration
         """
-        total_songs = len(self.playlist)
-        total_pages = (total_songs + per_page - 1) // per_page if per_page > 0 else 1
+        total_pages = (len(self.playlist) + per_page - 1) // per_page if per_page > 0 else 1
         page = max(1, min(page, total_pages))
-        start = (page - 1) * per_page
-        end = start + per_page
+        return self.get_playlist_page(start=(page - 1) * per_page, per_page=per_page, current_sec=current_sec)
+
+    def resolve_page_range(self, cursor: Optional[dict], direction: str = "current", per_page: int = 5) -> tuple:
+        """
+        依分頁游標計算要顯示的頁面範圍，游標以上一次顯示的歌曲物件為錨點
+        瀏覽期間清單被新增或移除歌曲時，下一頁會從上次看到的最後一首之後開始、上一頁會在上次看到的第一首之前結束，不會跳過或重複歌曲
+        :param cursor: dict or None, 上一次 get_playlist_page 回傳的 cursor，None 表示從第一首開始
+        :param direction: str, "next"、"previous" 或 "current"（重新整理目前頁面）
+        :param per_page: int, 每頁顯示幾首
+        :return: tuple[int, int], 頁面範圍 [start, end)（0-based 位置）
+        """
+        total_songs = len(self.playlist)
+        if not cursor or total_songs == 0:
+            return 0, min(per_page, total_songs)
+
+        positions = [p for p in map(self._position_of, cursor["songs"]) if p is not None]
+        if direction == "previous":
+            end = positions[0] if positions else cursor["start"]
+            end = max(0, min(end, total_songs))
+            if end == 0:
+                return 0, min(per_page, total_songs)
+            return max(0, end - per_page), end
+
+        if direction == "next":
+            start = positions[-1] + 1 if positions else cursor["start"]
+        else:
+            start = positions[0] if positions else cursor["start"]
+        # 已超出清單尾端時（例如最後幾首被移除）退回最後一頁
+        if start >= total_songs:
+            start = max(0, total_songs - per_page)
+        return start, min(start + per_page, total_songs)
+
+    def get_playlist_page(self, start: int = 0, per_page: int = 5, current_sec: int = 0, end: Optional[int] = None) -> dict:
+        """
+        取得從指定位置開始的一頁播放清單資訊，並附上供下一次翻頁使用的游標
+        預計播放時間與剩餘總長度透過時長前綴和索引計算，每首歌 O(log n)，不需逐首加總
+        :param start: int, 頁面起點（0-based 位置）
+        :param per_page: int, 每頁顯示幾首
+        :param current_sec: int, 目前歌曲已播放的秒數
+        :param end: int or None, 頁面終點（不含），來自 resolve_page_range，None 表示顯示滿一頁
+        :return: dict, 包含 songs, etas, current_page, total_pages, total_songs, current_index, total_duration, remaining_duration, has_previous, has_next, cursor
+        """
+        total_songs = len(self.playlist)
+        total_pages = max(1, (total_songs + per_page - 1) // per_page) if per_page > 0 else 1
+        start = max(0, min(start, total_songs))
+        end = start + per_page if end is None else max(start, min(end, start + per_page))
         songs = self.playlist[start:end]
-        logger.debug(f"分頁查詢：第 {page}/{total_pages} 頁，每頁 {per_page} 首，共 {total_songs} 首")
+        end = start + len(songs)
+        # 游標翻頁時起點不一定對齊每頁的邊界，以頁面最後一首所在的頁數作為目前頁數
+        page = max(1, (end + per_page - 1) // per_page) if per_page > 0 else 1
+        logger.debug(f"分頁查詢：第 {page}/{total_pages} 頁（位置 {start}~{end}），每頁 {per_page} 首，共 {total_songs} 首")
         return {
             "songs": songs,
+            "etas": [self.get_song_eta(position, current_sec) for position in range(start, end)],
             "current_page": page,
             "total_pages": total_pages,
-            "total_songs": total_songs
+            "total_songs": total_songs,
+            "current_index": self.current_index,
+            "total_duration": self._durations.total,
+            "remaining_duration": self.get_remaining_duration(current_sec),
+            "has_previous": start > 0,
+            "has_next": end < total_songs,
+            "cursor": {"version": self.version, "start": start, "songs": tuple(songs)}
         }
 
-    def add_many(self, songs: list[dict]) -> list[dict]:
+    def get_song_eta(self, position: int, current_sec: int = 0) -> Optional[int]:
+        """
+        計算指定位置的歌曲還有多久開始播放，O(log n)
+        :param position: int, 歌曲在清單中的位置（0-based）
+        :param current_sec: int, 目前歌曲已播放的秒數
+        :return: int or None, 秒數（0 表示正在播放），無法預估時（隨機播放、非循環且已播過）回傳 None
+        """
+        current = self.current_index
+        if not (0 <= current < len(self.playlist)) or not (0 <= position < len(self.playlist)):
+            return None
+        if position == current:
+            return 0
+        if self.shuffle:
+            return None
+        remaining_current = max(0, self._durations.value_at(current) - current_sec)
+        if position > current:
+            return remaining_current + self._durations.range_sum(current + 1, position)
+        if not self.loop:
+            return None
+        # 循環模式：播完清單尾端後再從頭開始
+        return remaining_current + self._durations.range_sum(current + 1, len(self.playlist)) + self._durations.prefix_sum(position)
+
+    def get_remaining_duration(self, current_sec: int = 0) -> Optional[int]:
         """
-        批次新增多首歌曲到播放清單
+        計算從現在到清單結束的剩餘總長度，O(log n)
+        :param current_sec: int, 目前歌曲已播放的秒數
+        :return: int or None, 秒數，隨機播放時無法預估回傳 None
+        """
+        current = self.current_index
+        if not (0 <= current < len(self.playlist)):
+            return self._durations.total
+        if self.shuffle:
+            return None
+        remaining_current = max(0, self._durations.value_at(current) - current_sec)
+        return remaining_current + self._durations.range_sum(current + 1, len(self.playlist))
+
+    def add_many(self, songs: list[dict]) -> dict:
+        """
+        批次新增多首歌曲到播放清單：一次驗證、以 ID 索引去除重複、一次性附加到清單尾端
+        與 add() 不同，不會對每首歌寫入日誌，僅在完成後輸出一筆摘要
         :param songs: list[dict], 每首歌必須包含必要欄位
-        :return: list[dict], 每首歌加入後的資訊（含 index）
+        :return: dict, 包含 songs（加入後的歌曲資訊，含 index）, added, duplicate, invalid
         """
-        added = []
+        required_keys = self.REQUIRED_KEYS
+        seen = self._id_counts
+        batch_ids = set()
+        start = len(self.playlist)
+        new_songs = []
+        duplicate = 0
+        invalid = 0
+
         for song in songs:
-            added.append(self.add(song))
-        return added
+            if not isinstance(song, dict) or not required_keys.issubset(song):
+                invalid += 1
+                continue
+            song_id = song["id"]
+            if song_id in seen or song_id in batch_ids:
+                duplicate += 1
+                continue
+            batch_ids.add(song_id)
+            new_songs.append({**song, "index": start + len(new_songs) + 1})
+
+        self._extend_playlist(new_songs)
+
+        if new_songs and start == 0:
+            self.current_index = 0
+            logger.debug("播放清單原本為空，current_index 初始化為 0")
+        if invalid:
+            logger.warning(f"批次新增時略過 {invalid} 首格式錯誤的歌曲")
+        logger.info(f"批次新增 {len(new_songs)} 首歌曲（重複 {duplicate} 首、無效 {invalid} 首），目前清單共 {len(self.playlist)} 首")
+        if new_songs:
+            self._emit({"op": "add", "songs": new_songs, "current_index": self.current_index})
+        return {
+            "songs": new_songs,
+            "added": len(new_songs),
+            "duplicate": duplicate,
+            "invalid": invalid
+        }
+
+    def _extend_playlist(self, new_songs: list[dict]) -> None:
+        """
+        將已編號的歌曲附加到清單尾端並更新各索引（不驗證、不去除重複）
+        :param new_songs: list[dict], 含 index 的歌曲
+        """
+        if not new_songs:
+            return
+        self.playlist.extend(new_songs)
+        self._id_counts.update(song["id"] for song in new_songs)
+        self._durations.extend(self._duration_of(song) for song in new_songs)
+        self._search_index.add_many(new_songs)
+        self.version += 1
 
     def remove_by_id(self, song_id: str) -> list:
         """
@@ -221,6 +649,9 @@ class MusicPlaylistManager:
             return self.playlist
             
         removed_song = self.playlist.pop(remove_pos)
+        self._forget_id(removed_song["id"])
+        self._search_index.remove(removed_song)
+        self.version += 1
         logger.info(f"已通過 ID 移除歌曲: {removed_song['title']} (ID: {removed_song['id']})，剩餘 {len(self.playlist)} 首")
         
         # 修正 current_index
@@ -236,6 +667,9 @@ class MusicPlaylistManager:
             logger.debug("播放清單已清空，current_index 設為 -1")
             
         self._reindex_playlist()
+        self._durations.rebuild(self._duration_of(song) for song in self.playlist)
+        self._remap_shuffle_round(removed=remove_pos)
+        self._emit({"op": "remove", "position": remove_pos, "current_index": self.current_index})
         return self.playlist
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+import heapq
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Iterable
+
+
+# 中日韓文字（含假名與諺文）沒有空白分詞，改以單字與雙字 n-gram 建立索引
+CJK_RUN = re.compile(r"[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+")
+WORD = re.compile(r"[^\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    正規化文字：全形轉半形（NFKC）並忽略大小寫
+    :param text: str, 原始文字
+    :return: str
+    """
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+class PlaylistSearchIndex:
+    """
+    播放清單標題的倒排索引，供 autocomplete 以標題快速搜尋歌曲
+    - 英數單字：索引每個單字的前綴，輸入到一半也能匹配
+    - 中日韓文字：索引單字與雙字 n-gram
+    新增與移除歌曲時增量更新，搜尋只需走訪查詢詞對應的 posting，不必掃描整個清單
+    """
+
+    def __init__(self, max_prefix_length: int = 12):
+        self.max_prefix_length = max_prefix_length
+        self._postings = defaultdict(set)  # 詞 -> 歌曲鍵集合
+        self._songs = {}  # 歌曲鍵 -> (歌曲 dict, 索引詞)
+
+    def __len__(self) -> int:
+        return len(self._songs)
+
+    def _title_terms(self, title: str) -> set:
+        """從歌曲標題產生所有索引詞"""
+        text = normalize_text(title)
+        terms = set()
+        for run in CJK_RUN.findall(text):
+            terms.update(run)
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        for word in WORD.findall(CJK_RUN.sub(" ", text)):
+            for length in range(1, min(len(word), self.max_prefix_length) + 1):
+                terms.add(word[:length])
+        return terms
+
+    def _query_terms(self, query: str) -> set:
+        """從查詢字串產生要比對的索引詞"""
+        text = normalize_text(query)
+        terms = set()
+        for run in CJK_RUN.findall(text):
+            if len(run) == 1:
+                terms.add(run)
+            else:
+                terms.update(run[i:i + 2] for i in range(len(run) - 1))
+        for word in WORD.findall(CJK_RUN.sub(" ", text)):
+            terms.add(word[:self.max_prefix_length])
+        return terms
+
+    def add(self, song: dict) -> None:
+        """
+        將一首歌加入索引
+        :param song: dict, 播放清單中的歌曲（以物件本身作為識別）
+        """
+        key = id(song)
+        terms = self._title_terms(song.get("title", ""))
+        self._songs[key] = (song, terms)
+        for term in terms:
+            self._postings[term].add(key)
+
+    def add_many(self, songs: Iterable[dict]) -> None:
+        """
+        將多首歌加入索引
+        :param songs: Iterable[dict], 播放清單中的歌曲
+        """
+        for song in songs:
+            self.add(song)
+
+    def remove(self, song: dict) -> None:
+        """
+        將一首歌從索引移除
+        :param song: dict, 先前加入索引的歌曲
+        """
+        key = id(song)
+        entry = self._songs.pop(key, None)
+        if not entry:
+            return
+        for term in entry[1]:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.discard(key)
+            if not posting:
+                del self._postings[term]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._postings.clear()
+        self._songs.clear()
+
+    def search(self, query: str, limit: int = 25, budget_ms: float = 50) -> list:
+        """
+        依標題搜尋歌曲，符合的查詢詞越多排名越前，同分時依清單順序排列
+        :param query: str, 查詢字串
+        :param limit: int, 最多回傳幾首
+        :param budget_ms: float, 走訪 posting 的時間上限（毫秒），超過時以目前的結果回傳
+        :return: list[dict], 歌曲列表
+        """
+        terms = self._query_terms(query)
+        if not terms:
+            return []
+
+        deadline = time.perf_counter() + budget_ms / 1000
+        scores = defaultdict(int)
+        visited = 0
+        # 先走訪較短的 posting，時間不夠時至少保留最有鑑別度的結果
+        for term in sorted(terms, key=lambda t: len(self._postings.get(t, ()))):
+            for key in self._postings.get(term, ()):
+                scores[key] += 1
+                visited += 1
+                if visited % 1024 == 0 and time.perf_counter() > deadline:
+                    break
+            else:
+                continue
+            break
+
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], self._songs[item[0]][0].get("index", 0)))
+        return [self._songs[key][0] for key, _ in best]
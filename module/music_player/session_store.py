@@ -0,0 +1,199 @@
+import json
+import os
+from typing import Optional
+from loguru import logger
+
+
+class MusicSessionStore:
+    """
+    音樂播放工作階段的持久化儲存，讓播放清單、目前位置與播放進度在重新啟動後可以還原
+    每個伺服器使用兩個檔案：
+    - {guild_id}.json：快照，完整的工作階段狀態
+    - {guild_id}.journal：快照之後的變更紀錄（每行一筆 JSON），每次變更只附加一行
+    變更累積到 compact_every 筆時重寫快照（暫存檔 + fsync + rename）並清空變更紀錄
+    """
+
+    # 變更紀錄中會直接覆寫到狀態上的欄位
+    STATE_KEYS = ("current_index", "loop", "shuffle", "offset", "paused", "voice_channel_id", "channel_id", "message_id")
+
+    def __init__(self, directory: str = "./data/music_sessions", compact_every: int = 200):
+        """
+        :param directory: str, 儲存工作階段的資料夾
+        :param compact_every: int, 累積幾筆變更後重寫快照
+        """
+        self.directory = directory
+        self.compact_every = compact_every
+        self._states = {}  # guild_id -> 目前的狀態（與檔案內容一致）
+        self._journal_sizes = {}  # guild_id -> 快照之後的變更筆數
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def empty_state() -> dict:
+        """
+        建立空的工作階段狀態
+        :return: dict
+        """
+        return {
+            "playlist": [],
+            "current_index": -1,
+            "loop": False,
+            "shuffle": False,
+            "offset": 0,
+            "paused": False,
+            "voice_channel_id": None,
+            "channel_id": None,
+            "message_id": None
+        }
+
+    def _snapshot_path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{guild_id}.json")
+
+    def _journal_path(self, guild_id: int) -> str:
+        return os.path.join(self.directory, f"{guild_id}.journal")
+
+    def guild_ids(self) -> list:
+        """
+        列出有保存工作階段的伺服器，最近更新的排在前面
+        :return: list[int]
+        """
+        latest = {}
+        for name in os.listdir(self.directory):
+            stem, ext = os.path.splitext(name)
+            if ext in (".json", ".journal") and stem.isdigit():
+                mtime = os.path.getmtime(os.path.join(self.directory, name))
+                latest[int(stem)] = max(mtime, latest.get(int(stem), 0))
+        return sorted(latest, key=latest.get, reverse=True)
+
+    @classmethod
+    def apply(cls, state: dict, op: dict) -> None:
+        """
+        將一筆變更套用到狀態上
+        :param state: dict, 工作階段狀態
+        :param op: dict, 變更，op 欄位為 add / remove / clear / update
+        """
+        kind = op.get("op")
+        if kind == "add":
+            state["playlist"].extend(op.get("songs", []))
+        elif kind == "remove":
+            position = op.get("position", -1)
+            if 0 <= position < len(state["playlist"]):
+                del state["playlist"][position]
+        elif kind == "clear":
+            state["playlist"] = []
+        # 換歌時若沒有指定進度，從新歌曲的開頭開始
+        if op.get("current_index", state["current_index"]) != state["current_index"] and "offset" not in op:
+            state["offset"] = 0
+        for key in cls.STATE_KEYS:
+            if key in op:
+                state[key] = op[key]
+
+    def load(self, guild_id: int) -> Optional[dict]:
+        """
+        讀取快照並重播變更紀錄，還原工作階段
+        變更紀錄的最後一行若因當機只寫了一半，會被略過，並立即壓縮成新的快照，
+        避免之後附加的變更接在不完整的那一行後面而遺失
+        :param guild_id: int, 伺服器 ID
+        :return: dict or None, 沒有保存的工作階段或清單為空時回傳 None
+        """
+        state = self.empty_state()
+        try:
+            with open(self._snapshot_path(guild_id), "r", encoding="utf-8") as f:
+                state.update(json.load(f))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"[MusicSessionStore] 讀取伺服器 {guild_id} 的快照失敗，僅使用變更紀錄還原：{e}")
+
+        replayed = 0
+        corrupted = False
+        try:
+            with open(self._journal_path(guild_id), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"[MusicSessionStore] 伺服器 {guild_id} 的變更紀錄有不完整的一行，已略過")
+                        corrupted = True
+                        continue
+                    self.apply(state, op)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+
+        self._states[guild_id] = state
+        self._journal_sizes[guild_id] = replayed
+        if corrupted:
+            self.compact(guild_id)
+        if not state["playlist"]:
+            return None
+        logger.info(f"[MusicSessionStore] 已還原伺服器 {guild_id} 的工作階段：{len(state['playlist'])} 首歌曲（重播 {replayed} 筆變更）")
+        return state
+
+    def append(self, guild_id: int, op: dict) -> None:
+        """
+        記錄一筆變更：附加到變更紀錄檔並更新記憶體中的狀態，累積過多時自動壓縮
+        :param guild_id: int, 伺服器 ID
+        :param op: dict, 變更內容
+        """
+        state = self._states.setdefault(guild_id, self.empty_state())
+        if op.get("op") == "update" and all(state.get(key) == value for key, value in op.items() if key != "op"):
+            return  # 狀態沒有變化（例如暫停時的定期進度紀錄），不需要寫入
+        if op.get("op") == "add":
+            # 播放清單的 index 欄位會在還原時重新編號，不需要保存
+            op = {**op, "songs": [{k: v for k, v in song.items() if k != "index"} for song in op.get("songs", [])]}
+        self.apply(state, op)
+
+        if not state["playlist"] and op.get("op") in ("clear", "remove"):
+            self.discard(guild_id)
+            return
+
+        try:
+            with open(self._journal_path(guild_id), "a", encoding="utf-8") as f:
+                f.write(json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n")
+                f.flush()
+        except Exception as e:
+            logger.error(f"[MusicSessionStore] 寫入伺服器 {guild_id} 的變更紀錄失敗：{e}")
+            return
+
+        self._journal_sizes[guild_id] = self._journal_sizes.get(guild_id, 0) + 1
+        if self._journal_sizes[guild_id] >= self.compact_every:
+            self.compact(guild_id)
+
+    def compact(self, guild_id: int) -> None:
+        """
+        將目前狀態寫成新的快照（暫存檔 + fsync + rename，寫到一半當機也不會損毀舊快照），再清空變更紀錄
+        :param guild_id: int, 伺服器 ID
+        """
+        state = self._states.get(guild_id)
+        if state is None:
+            return
+        path = self._snapshot_path(guild_id)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            # 快照已包含所有變更，清空變更紀錄
+            open(self._journal_path(guild_id), "w", encoding="utf-8").close()
+            self._journal_sizes[guild_id] = 0
+            logger.debug(f"[MusicSessionStore] 已壓縮伺服器 {guild_id} 的工作階段（{len(state['playlist'])} 首歌曲）")
+        except Exception as e:
+            logger.error(f"[MusicSessionStore] 壓縮伺服器 {guild_id} 的工作階段失敗：{e}")
+
+    def discard(self, guild_id: int) -> None:
+        """
+        刪除伺服器的工作階段（例如使用者清空播放清單或離開頻道）
+        :param guild_id: int, 伺服器 ID
+        """
+        self._states.pop(guild_id, None)
+        self._journal_sizes.pop(guild_id, None)
+        for path in (self._snapshot_path(guild_id), self._journal_path(guild_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"[MusicSessionStore] 刪除工作階段檔案 {path} 失敗：{e}")
+        logger.debug(f"[MusicSessionStore] 已刪除伺服器 {guild_id} 的工作階段")
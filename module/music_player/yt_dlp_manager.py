@@ -1,20 +1,24 @@
 import os
+import shutil
 import subprocess
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 import time
+from module.executor import shared_executor
+from .audio_cache import AudioCache
 
 class YTDLPDownloader:
-    def __init__(self, download_folder: str, ffmpeg_path: str = None):
+    def __init__(self, download_folder: str, ffmpeg_path: str = None, audio_cache: AudioCache = None):
         """
         初始化 YTDLPDownloader，負責處理下載和提取
         :param download_folder: str, 下載資料夾路徑
         :param ffmpeg_path: str, FFmpeg 執行檔路徑
+        :param audio_cache: AudioCache, 與播放器共用的音訊索引，未提供時自行建立
         """
         self.download_folder = download_folder
         os.makedirs(self.download_folder, exist_ok=True)
+        self.audio_cache = audio_cache or AudioCache(self.download_folder)
         
         # 檢查 FFmpeg 路徑
         self.ffmpeg_path = ffmpeg_path
@@ -67,6 +71,16 @@ class YTDLPDownloader:
             "playable in embed"
         ]
             
+        # yt-dlp 自我更新的最新結果
+        self.update_status = {
+            "last_checked": None,  # 上次檢查的時間戳
+            "result": None,  # updated / up_to_date / failed / timeout / missing
+            "version_before": None,
+            "version_after": None,
+            "elapsed": None  # 更新花費的秒數
+        }
+        self._update_lock = asyncio.Lock()
+
         logger.info(f"YTDLPDownloader 初始化，下載資料夾: {self.download_folder}")
 
     def _is_valid_video(self, entry):
@@ -110,11 +124,12 @@ class YTDLPDownloader:
             thumb = max(entry["thumbnails"], key=lambda t: t.get("width", 0) * t.get("height", 0)).get("url", "")
         return thumb or ""
 
-    def _run_yt_dlp_with_progress(self, args):
+    def _run_yt_dlp_with_progress(self, args, token=None):
         """
         使用 subprocess 執行 yt-dlp，並即時顯示進度
         :param args: list, yt-dlp 執行參數
-        :return: bool, 是否成功
+        :param token: CancelToken, 取消時終止子行程
+        :return: (bool, list[str]), 是否成功與進度以外的輸出（例如 --print 印出的檔案路徑）
         """
         try:
             logger.debug(f"執行 yt-dlp 命令: {' '.join(args)}")
@@ -124,14 +139,18 @@ class YTDLPDownloader:
                 stderr=subprocess.STDOUT,
                 text=True,
             )
+            if token:
+                token.register(process)
             
             error_output = ""
+            output_lines = []
             for line in iter(process.stdout.readline, ""):
                 line = line.strip()
                 if "[download]" in line:
                     print(f"\r{line}", end="")
                 # 記錄錯誤輸出
-                else:
+                elif line:
+                    output_lines.append(line)
                     error_output += line + "\n"
                     # 檢查是否有錯誤模式
                     lower_line = line.lower()
@@ -141,7 +160,7 @@ class YTDLPDownloader:
                             error_type = self._detect_error_type(lower_line)
                             logger.error(f"影片無法下載 (含有錯誤模式 '{pattern}'): {line}")
                             process.terminate()
-                            return False
+                            return False, output_lines
                         
             process.stdout.close()
             return_code = process.wait()
@@ -149,17 +168,18 @@ class YTDLPDownloader:
             
             if return_code != 0:
                 logger.error(f"yt-dlp 執行失敗: {error_output.strip()}")
-                return False
+                return False, output_lines
                 
-            return True
+            return True, output_lines
         except Exception as e:
             logger.error(f"執行 yt-dlp 時發生錯誤：{e}")
-            return False
+            return False, []
             
-    def _convert_to_opus(self, input_file: str):
+    def _convert_to_opus(self, input_file: str, token=None):
         """
         將下載的檔案轉換為高品質 Opus 格式
         :param input_file: 輸入檔案路徑
+        :param token: CancelToken, 取消時終止 FFmpeg
         :return: 輸出檔案路徑或 None (失敗時)
         """
         try:
@@ -189,6 +209,8 @@ class YTDLPDownloader:
                 stderr=subprocess.PIPE,
                 text=True
             )
+            if token:
+                token.register(process)
             
             # 等待轉換完成
             stdout, stderr = process.communicate()
@@ -247,6 +269,7 @@ class YTDLPDownloader:
             "unavailable": "已不可用（可能已被刪除）",
             "account_terminated": "來源帳號已被終止",
             "region_blocked": "在您的地區無法觀看",
+            "cancelled": "處理逾時已取消",
             "unknown": "未知原因"
         }
         return messages.get(error_type, "未知問題")
@@ -328,30 +351,36 @@ class YTDLPDownloader:
             "downloaded": False  # 標記是否已下載
         }
         
-    def _run_yt_dlp_command(self, args: list, url: str):
+    def _run_yt_dlp_command(self, args: list, url: str, token=None):
         """
         執行 yt-dlp 命令並處理結果
         
         :param args: list, yt-dlp 命令參數
         :param url: str, 來源 URL
+        :param token: CancelToken, 取消時終止子行程
         :return: tuple(bool, str/list/dict), (成功與否, 輸出結果或錯誤資訊)
         """
         try:
-            process = subprocess.run(
+            process = subprocess.Popen(
                 args,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
             )
+            if token:
+                token.register(process)
+            stdout, stderr = process.communicate()
+            if token and token.cancelled:
+                return False, self._create_error_response("cancelled", "yt-dlp 執行已取消", url)
             
             if process.returncode == 0:
-                output_lines = process.stdout.strip().splitlines()
+                output_lines = stdout.strip().splitlines()
                 if not output_lines:
                     logger.error("yt-dlp 沒有輸出任何資訊")
                     return False, self._create_error_response("unknown", "yt-dlp 沒有輸出任何資訊", url)
                 return True, output_lines
             else:
-                error_msg = process.stderr.strip()
+                error_msg = stderr.strip()
                 logger.error(f"yt-dlp 執行失敗: {error_msg}")
                 has_error, error_data = self._check_error_messages(error_msg, url)
                 if has_error:
@@ -361,10 +390,11 @@ class YTDLPDownloader:
             logger.error(f"執行 yt-dlp 時發生錯誤: {e}")
             return False, self._create_error_response("unknown", str(e), url)
 
-    def extract_info(self, url: str):
+    def extract_info(self, url: str, token=None):
         """
         使用 subprocess 提取簡化的影片資訊
         :param url: str, 影片網址
+        :param token: CancelToken, 取消時終止子行程
         :return: dict or None - 成功時返回影片資訊，失敗時返回錯誤資訊
         """
         logger.info(f"提取影片資訊: {url}")
@@ -376,7 +406,7 @@ class YTDLPDownloader:
             url,
         ]
         
-        success, result = self._run_yt_dlp_command(args, url)
+        success, result = self._run_yt_dlp_command(args, url, token)
         if not success:
             return result  # 此時 result 是錯誤資訊
             
@@ -392,10 +422,11 @@ class YTDLPDownloader:
             logger.error(f"解析影片資訊時出錯: {e}")
             return self._create_error_response("parse_error", str(e), url)
 
-    def extract_playlist_info(self, url: str):
+    def extract_playlist_info(self, url: str, token=None):
         """
         提取播放清單的全部影片資訊
         :param url: str, 播放清單網址
+        :param token: CancelToken, 取消時終止子行程
         :return: list[dict] or dict - 成功時返回播放清單資訊，失敗時返回錯誤資訊
         """
         logger.info(f"提取播放清單資訊: {url}")
@@ -408,7 +439,7 @@ class YTDLPDownloader:
             url
         ]
         
-        success, result = self._run_yt_dlp_command(args, url)
+        success, result = self._run_yt_dlp_command(args, url, token)
         if not success:
             return result  # 此時 result 是錯誤資訊
             
@@ -460,13 +491,17 @@ class YTDLPDownloader:
         """
         return "playlist" in url or "list=" in url
 
-    def download(self, url: str, retries=0):
+    def download(self, url: str, retries=0, token=None):
         """
         使用 subprocess 下載影片並轉換為 Opus 格式
         :param url: str, 影片網址
         :param retries: int, 目前重試次數
+        :param token: CancelToken, 取消時終止子行程且不再重試
         :return: (dict, str) or (dict, None) - 成功時返回 (影片資訊, 檔案路徑)，失敗時返回 (錯誤資訊, None)
         """
+        if token and token.cancelled:
+            logger.warning(f"下載已取消: {url}")
+            return self._create_error_response("cancelled", "下載已取消", url), None
         try:
             # 檢查是否達到最大重試次數
             if retries >= self.max_retries:
@@ -475,7 +510,7 @@ class YTDLPDownloader:
                 
             logger.info(f"開始下載影片: {url} (第 {retries+1} 次嘗試)")
             # 先取得第一首的 id
-            info = self.extract_info(url)
+            info = self.extract_info(url, token)
             if isinstance(info, dict) and not info.get("success", True):
                 # 如果 extract_info 返回錯誤資訊
                 logger.error("無法取得影片資訊或 id")
@@ -485,46 +520,50 @@ class YTDLPDownloader:
                 logger.error("無法取得影片資訊或 id")
                 return self._create_error_response("invalid_info", "無法取得有效的影片資訊", url), None
                 
-            # 如果已經下載了這首歌，檢查文件是否存在
-            opus_path = os.path.join(self.download_folder, f"{info['id']}.opus")
-            if os.path.exists(opus_path):
+            # 如果已經下載了這首歌，直接使用索引中的檔案
+            cached_path = self.audio_cache.get(info["id"])
+            if cached_path:
                 logger.info(f"歌曲已存在，無需重新下載: {info['title']}")
                 info["downloaded"] = True
-                return info, opus_path
+                return info, cached_path
                 
             # 設定下載輸出範本
             output_template = os.path.join(self.download_folder, "%s.%%(ext)s" % info["id"])
             
-            # 下載最佳音訊格式
+            # 下載最佳音訊格式，由 yt-dlp 印出最終檔案路徑（--print 會隱藏進度，以 --progress 恢復）
             args = [
                 "yt-dlp",
                 "--format", "bestaudio/best",
                 "--output", output_template,
+                "--print", "after_move:filepath",
+                "--progress",
+                "--newline",
                 "--no-warnings",
                 info["url"],
             ]
             
-            success = self._run_yt_dlp_with_progress(args)
+            success, output_lines = self._run_yt_dlp_with_progress(args, token)
             if not success:
                 logger.error("yt-dlp 執行失敗")
                 # 嘗試重試
-                return self.download(url, retries + 1)
+                return self.download(url, retries + 1, token)
                 
-            # 查找下載的檔案
-            downloaded_file = self._find_downloaded_file(info["id"])
+            # yt-dlp 印出的最後一個實際存在的檔案就是下載結果
+            downloaded_file = next((line for line in reversed(output_lines) if os.path.isfile(line)), None)
             if not downloaded_file:
                 logger.error("找不到下載的檔案")
                 # 嘗試重試
-                return self.download(url, retries + 1)
+                return self.download(url, retries + 1, token)
                 
             # 轉換為 Opus 格式
-            opus_file = self._convert_to_opus(downloaded_file)
+            opus_file = self._convert_to_opus(downloaded_file, token)
             if not opus_file:
                 logger.error("轉換為 Opus 格式失敗")
                 # 嘗試重試
-                return self.download(url, retries + 1)
+                return self.download(url, retries + 1, token)
                 
             logger.info(f"成功下載並轉換為 Opus 格式: {opus_file}")
+            self.audio_cache.add(info["id"], opus_file)
             info["downloaded"] = True
             return info, opus_file
         except Exception as e:
@@ -532,70 +571,125 @@ class YTDLPDownloader:
             # 嘗試重試
             if retries < self.max_retries:
                 logger.info(f"嘗試第 {retries+2} 次下載...")
-                return self.download(url, retries + 1)
+                return self.download(url, retries + 1, token)
             return self._create_error_response("download_error", str(e), url), None
 
-    def _find_downloaded_file(self, file_id):
-        """
-        根據檔案ID在下載資料夾中尋找下載的原始檔案
-        
-        :param file_id: str, 檔案ID
-        :return: str or None, 找到的檔案完整路徑或None
-        """
-        for file in os.listdir(self.download_folder):
-            if file.startswith(file_id) and not file.endswith(".opus"):
-                file_path = os.path.join(self.download_folder, file)
-                logger.info(f"找到下載的原始檔案: {file_path}")
-                return file_path
-        return None
-
     async def async_extract_info(self, url: str, timeout: int = 30):
         """
-        提供異步方式調用同步的 extract_info 方法，並加上 timeout
+        在共用執行緒池中調用同步的 extract_info 方法，並加上 timeout（超時會終止 yt-dlp）
         :param url: str, 影片網址
         :param timeout: int, 超時秒數
         :return: dict or None
         """
         logger.debug(f"異步提取影片資訊: {url}")
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            try:
-                return await asyncio.wait_for(loop.run_in_executor(executor, self.extract_info, url), timeout=timeout)
-            except asyncio.TimeoutError:
-                logger.error(f"提取影片資訊超時: {url}")
-                return None
+        try:
+            return await shared_executor.run(self.extract_info, url, pool="io", timeout=timeout, cancellable=True)
+        except asyncio.TimeoutError:
+            logger.error(f"提取影片資訊超時: {url}")
+            return None
     
     async def async_extract_playlist_info(self, url: str, timeout: int = 60):
         """
-        提供異步方式調用同步的 extract_playlist_info 方法，並加上 timeout
+        在共用執行緒池中調用同步的 extract_playlist_info 方法，並加上 timeout（超時會終止 yt-dlp）
         :param url: str, 播放清單網址
         :param timeout: int, 超時秒數
         :return: list[dict] or None
         """
         logger.debug(f"異步提取播放清單資訊: {url}")
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            try:
-                return await asyncio.wait_for(loop.run_in_executor(executor, self.extract_playlist_info, url), timeout=timeout)
-            except asyncio.TimeoutError:
-                logger.error(f"提取播放清單資訊超時: {url}")
-                return None
+        try:
+            return await shared_executor.run(self.extract_playlist_info, url, pool="io", timeout=timeout, cancellable=True)
+        except asyncio.TimeoutError:
+            logger.error(f"提取播放清單資訊超時: {url}")
+            return None
 
     async def async_download(self, url: str, timeout: int = 120):
         """
-        提供異步方式調用同步的 download 方法，並加上 timeout
+        在共用執行緒池中調用同步的 download 方法，並加上 timeout（超時會終止 yt-dlp 與 FFmpeg）
         :param url: str, 影片網址
         :param timeout: int, 超時秒數
         :return: (dict, str) or (None, None)
         """
         logger.debug(f"異步下載影片: {url}")
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            try:
-                return await asyncio.wait_for(loop.run_in_executor(executor, self.download, url), timeout=timeout)
-            except asyncio.TimeoutError:
-                logger.error(f"下載影片超時: {url}")
-                return None, None
+        try:
+            return await shared_executor.run(self.download, url, pool="io", timeout=timeout, cancellable=True)
+        except asyncio.TimeoutError:
+            logger.error(f"下載影片超時: {url}")
+            return None, None
+
+    async def _run_yt_dlp_async(self, args: list, timeout: int):
+        """
+        以非同步子行程執行 yt-dlp，不佔用事件迴圈；超時會終止子行程
+        :param args: list, yt-dlp 參數（不含執行檔）
+        :param timeout: int, 超時秒數
+        :return: (int, str), 結束代碼與輸出內容
+        """
+        process = await asyncio.create_subprocess_exec(
+            "yt-dlp", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return process.returncode, stdout.decode("utf-8", errors="replace").strip()
+
+    async def get_version(self, timeout: int = 30):
+        """
+        取得目前 yt-dlp 的版本
+        :param timeout: int, 超時秒數
+        :return: str or None
+        """
+        try:
+            returncode, output = await self._run_yt_dlp_async(["--version"], timeout)
+            return output if returncode == 0 else None
+        except Exception as e:
+            logger.error(f"[YT-DLP] 取得版本失敗：{e}")
+            return None
+
+    async def self_update(self, timeout: int = 300):
+        """
+        執行 yt-dlp -U 更新至最新版，結果記錄在 update_status
+        yt-dlp 每次下載都會啟動新的子行程，更新完成後下一次呼叫就會使用新版本，
+        更新期間已在執行的下載仍使用舊的執行檔，不受影響
+        :param timeout: int, 更新超時秒數
+        :return: dict, 更新結果（同 update_status）
+        """
+        async with self._update_lock:
+            started = time.monotonic()
+            status = {"last_checked": time.time(), "result": None, "version_before": None, "version_after": None, "elapsed": None}
+            if not shutil.which("yt-dlp"):
+                logger.warning("[YT-DLP] 找不到 yt-dlp，可執行檔未加入 PATH 或尚未安裝。")
+                status["result"] = "missing"
+            else:
+                status["version_before"] = await self.get_version()
+                logger.info(f"[YT-DLP] 檢查 yt-dlp 是否需要更新，目前版本：{status['version_before']}")
+                try:
+                    returncode, output = await self._run_yt_dlp_async(["-U"], timeout)
+                    logger.debug(f"[YT-DLP] 更新輸出：\n{output}")
+                    status["version_after"] = await self.get_version()
+                    if returncode != 0:
+                        status["result"] = "failed"
+                    elif status["version_after"] != status["version_before"]:
+                        status["result"] = "updated"
+                    else:
+                        status["result"] = "up_to_date"
+                except asyncio.TimeoutError:
+                    status["result"] = "timeout"
+                    logger.error(f"[YT-DLP] 更新超過 {timeout} 秒，已終止更新程序")
+                except Exception as e:
+                    status["result"] = "failed"
+                    logger.error(f"[YT-DLP] 更新 yt-dlp 時發生錯誤：{e}")
+
+            status["elapsed"] = round(time.monotonic() - started, 2)
+            self.update_status = status
+            if status["result"] == "updated":
+                logger.info(f"[YT-DLP] 已更新 yt-dlp：{status['version_before']} -> {status['version_after']}（耗時 {status['elapsed']} 秒）")
+            else:
+                logger.info(f"[YT-DLP] 更新檢查完成：{status['result']}，版本 {status['version_after'] or status['version_before']}（耗時 {status['elapsed']} 秒）")
+            return status
 
     def clear_temp_files(self):
         """
@@ -607,6 +701,7 @@ class YTDLPDownloader:
                 file_path = os.path.join(self.download_folder, file_name)
                 if os.path.isfile(file_path):  # 確保只刪除檔案
                     os.remove(file_path)
+            self.audio_cache.clear()
             logger.info(f"已清空暫存檔案，目錄: {self.download_folder}")
         except Exception as e:
             logger.error(f"清除暫存檔案時發生錯誤: {e}")
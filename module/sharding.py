@@ -0,0 +1,64 @@
+"""
+分片（Sharding）設定與伺服器歸屬判斷
+-----------------------------------
+settings.json 的 sharding 區塊：
+- enabled：是否使用 AutoShardedBot
+- shard_count：總分片數，未設定時由 Discord 建議
+- shard_range：此行程負責的分片範圍 [起始, 結束]（含兩端），未設定時負責全部分片
+多個行程各自負責一段分片時，伺服器相關的狀態（音樂工作階段、論壇通知等）只應存在於負責該伺服器的行程
+"""
+from loguru import logger
+
+
+def shard_kwargs(settings: dict) -> dict:
+    """
+    依設定產生建立 AutoShardedBot 的參數
+    :param settings: dict, settings.json 的內容
+    :return: dict, 未啟用分片時為空字典；啟用時包含 shard_count 與 shard_ids
+    :raises ValueError: 設定不正確時
+    """
+    sharding = settings.get("sharding") or {}
+    if not sharding.get("enabled"):
+        return {}
+
+    shard_count = sharding.get("shard_count")
+    shard_range = sharding.get("shard_range")
+    if shard_count is not None and (not isinstance(shard_count, int) or shard_count < 1):
+        raise ValueError("sharding.shard_count 必須是正整數")
+
+    kwargs = {"shard_count": shard_count}
+    if shard_range is not None:
+        if shard_count is None:
+            raise ValueError("指定 sharding.shard_range 時必須同時設定 shard_count")
+        if not isinstance(shard_range, list) or len(shard_range) != 2:
+            raise ValueError("sharding.shard_range 必須是 [起始, 結束] 格式")
+        first, last = shard_range
+        if not 0 <= first <= last < shard_count:
+            raise ValueError(f"sharding.shard_range 超出範圍：{shard_range}（共 {shard_count} 個分片）")
+        kwargs["shard_ids"] = list(range(first, last + 1))
+
+    logger.info(f"[分片] 啟用分片模式：總數 {shard_count or '自動'}，負責分片 {kwargs.get('shard_ids', '全部')}")
+    return kwargs
+
+
+def shard_id_for(guild_id: int, shard_count: int) -> int:
+    """
+    計算伺服器所屬的分片（Discord 規則：(guild_id >> 22) % shard_count）
+    :param guild_id: int, 伺服器 ID
+    :param shard_count: int, 總分片數
+    :return: int
+    """
+    return (int(guild_id) >> 22) % shard_count
+
+
+def owns_guild(bot, guild_id: int) -> bool:
+    """
+    判斷伺服器是否由此行程負責
+    :param bot: commands.Bot / commands.AutoShardedBot
+    :param guild_id: int, 伺服器 ID
+    :return: bool, 未分片或負責全部分片時永遠為 True
+    """
+    shard_ids = getattr(bot, "shard_ids", None)
+    if not shard_ids or not bot.shard_count:
+        return True
+    return shard_id_for(guild_id, bot.shard_count) in shard_ids
@@ -0,0 +1,76 @@
+"""
+HTML 解析器效能比較
+------------------
+比較各解析器（lxml / html.parser）在解析整份文件與只解析需要節點（SoupStrainer）時，
+每個頁面的平均耗時與峰值記憶體。
+
+使用方式：
+    python tests/benchmark_parser.py listing:temp/forum-2-1.html thread:temp/thread-100-1-1.html
+參數格式為 <頁面類型>:<檔案路徑>，頁面類型為 listing / thread / profile。
+沒有指定檔案時，以測試資料組成約 100 篇文章的列表頁與 30 層樓的文章頁。
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.parser import parse_html, available_backends
+
+from unittest_scraper import LISTING_HTML, THREAD_HTML, PROFILE_HTML
+
+
+def sample_pages():
+    """以測試資料組成接近實際大小的頁面"""
+    head = LISTING_HTML.split("<tbody", 1)[0]
+    rows = "".join(LISTING_HTML[LISTING_HTML.index("<tbody"):LISTING_HTML.rindex("</tbody>") + len("</tbody>")]
+                   .replace("_100", f"_{1000 + i}").replace("_205", f"_{2000 + i}") for i in range(50))
+    filler = "<div class='nav'>" + "<a href='#'>連結</a>" * 500 + "</div>"
+    listing = f"<html><body>{filler}{head}{rows}</table></div></div>{filler}</body></html>"
+    posts = "".join(THREAD_HTML.replace("post_1", f"post_{i}").replace("authorposton1", f"authorposton{i}") for i in range(1, 31))
+    thread = f"<html><body>{filler}{posts}{filler}</body></html>"
+    profile = f"<html><body>{filler}{PROFILE_HTML}{filler}</body></html>"
+    return [("listing", "sample-listing", listing), ("thread", "sample-thread", thread), ("profile", "sample-profile", profile)]
+
+
+def load_pages(args):
+    """讀取 <頁面類型>:<檔案路徑> 參數指定的頁面"""
+    pages = []
+    for arg in args:
+        scope, path = arg.split(":", 1)
+        with open(path, "r", encoding="utf-8") as f:
+            pages.append((scope, os.path.basename(path), f.read()))
+    return pages
+
+
+def measure(html, scope, backend, repeat):
+    """
+    :return: (float, float), 平均耗時（毫秒）與峰值記憶體（KiB）
+    """
+    started = time.perf_counter()
+    for _ in range(repeat):
+        parse_html(html, scope, backend)
+    elapsed = (time.perf_counter() - started) / repeat * 1000
+
+    tracemalloc.start()
+    parse_html(html, scope, backend)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def main():
+    pages = load_pages(sys.argv[1:]) if len(sys.argv) > 1 else sample_pages()
+    repeat = int(os.environ.get("BENCHMARK_REPEAT", 20))
+    print(f"可用的解析器：{', '.join(available_backends())}，每個組合重複 {repeat} 次")
+    print(f"{'頁面':<20}{'大小(KiB)':>10}  {'解析器':<12}{'範圍':<8}{'耗時(ms)':>10}{'峰值記憶體(KiB)':>16}")
+    for scope, name, html in pages:
+        for backend in available_backends():
+            for label, page_scope in (("整份", None), ("限定", scope)):
+                elapsed, peak = measure(html, page_scope, backend, repeat)
+                print(f"{name:<20}{len(html.encode('utf-8')) / 1024:>10.1f}  {backend:<12}{label:<8}{elapsed:>10.2f}{peak:>16.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.music_player.audio_cache import AudioCache
+
+
+class TestAudioCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def touch(self, name, size=0):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+        return path
+
+    def test_rebuild_matches_exact_id(self):
+        """測試：重建索引時以完整 ID 對應檔案，不會被前綴相同的 ID 混淆，且優先使用 Opus"""
+        self.touch("abc.webm")
+        opus = self.touch("abc.opus")
+        longer = self.touch("abcd.m4a")
+        self.touch("notes.txt")
+
+        cache = AudioCache(self.directory)
+        self.assertEqual(cache.get("abc"), opus)
+        self.assertEqual(cache.get("abcd"), longer)
+        self.assertIsNone(cache.get("ab"))
+        self.assertEqual(len(cache), 2)
+
+    def test_add_and_missing_file(self):
+        """測試：登記的檔案可以查到，檔案被刪除後會自動移出索引"""
+        cache = AudioCache(self.directory)
+        path = self.touch("xyz.opus")
+        cache.add("xyz", path)
+        self.assertTrue(cache.contains("xyz"))
+
+        os.remove(path)
+        self.assertFalse(cache.contains("xyz"))
+        self.assertEqual(len(cache), 0)
+
+    def test_evicts_least_recently_used(self):
+        """測試：超過大小上限時刪除最久未使用的檔案，最近播放過的檔案保留"""
+        cache = AudioCache(self.directory, max_bytes=250)
+        first = self.touch("a.opus", 100)
+        cache.add("a", first)
+        cache.add("b", self.touch("b.opus", 100))
+        cache.get("a")
+        cache.add("c", self.touch("c.opus", 100))
+
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "b.opus")))
+        self.assertEqual(len(cache), 2)
+
+    def test_retained_songs_survive_until_released(self):
+        """測試：被引用的歌曲不會被淘汰，釋放引用後才依大小上限刪除"""
+        cache = AudioCache(self.directory, max_bytes=150)
+        queue = ["a", "b"]
+        cache.retain(1, lambda: queue)
+        cache.add("a", self.touch("a.opus", 100))
+        cache.add("b", self.touch("b.opus", 100))
+        self.assertEqual(len(cache), 2)
+
+        cache.release(1)
+        self.assertFalse(cache.contains("a"))
+        self.assertTrue(cache.contains("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.author_cache import AuthorCache, MISSING, extract_uid
+from module.forum_notifier.scraper import Scraper
+
+
+class TestAuthorCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "authors.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_extract_uid(self):
+        """測試：可從兩種 Discuz 個人空間網址提取 UID"""
+        self.assertEqual(extract_uid("https://forum.net/space-uid-42.html"), "42")
+        self.assertEqual(extract_uid("https://forum.net/home.php?mod=space&uid=7"), "7")
+        self.assertIsNone(extract_uid("https://forum.net/thread-1-1-1.html"))
+
+    def test_ttl_and_disk_layer(self):
+        """測試：快取寫入磁碟後重新載入仍可使用，過期後視為沒有快取"""
+        cache = AuthorCache(ttl=60, file_path=self.file_path)
+        cache.set("42", "https://forum.net/avatar/42.jpg")
+        cache.set("43", None)
+
+        reloaded = AuthorCache(ttl=60, file_path=self.file_path)
+        self.assertEqual(reloaded.get("42"), "https://forum.net/avatar/42.jpg")
+        self.assertIsNone(reloaded.get("43"), "沒有頭貼的作者也要快取，避免重複抓取")
+        self.assertIs(reloaded.get("44"), MISSING)
+
+        reloaded._entries["42"]["fetched_at"] = time.time() - 120
+        self.assertIs(reloaded.get("42"), MISSING)
+
+    def test_avatar_from_uid_without_request(self):
+        """測試：設定頭貼網址範本時，直接以 UID 組成頭貼網址"""
+        scraper = Scraper("https://forum.net/", avatar_url_template="uc_server/avatar.php?uid={uid}&size=middle")
+        avatar = asyncio.run(scraper._fetch_author_avatar("https://forum.net/space-uid-42.html"))
+        self.assertEqual(avatar, "https://forum.net/uc_server/avatar.php?uid=42&size=middle")
+
+
+if __name__ == "__main__":
+    unittest.main()
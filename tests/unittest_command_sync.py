@@ -0,0 +1,81 @@
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import discord
+from module.command_sync import compute_tree_hash, sync_command_tree
+
+
+def build_tree(order=("a", "b"), description="說明"):
+    """建立只含兩個斜線指令的指令樹"""
+    client = discord.Client(intents=discord.Intents.none())
+    tree = discord.app_commands.CommandTree(client)
+
+    async def callback(interaction: discord.Interaction):
+        pass
+
+    for name in order:
+        tree.add_command(discord.app_commands.Command(name=name, description=description, callback=callback))
+    return tree
+
+
+class CountingTree:
+    """記錄 sync 呼叫次數的指令樹包裝"""
+    def __init__(self, tree):
+        self.tree = tree
+        self.sync_calls = 0
+
+    def __getattr__(self, name):
+        return getattr(self.tree, name)
+
+    async def sync(self, guild=None):
+        self.sync_calls += 1
+        return self.tree.get_commands(guild=guild)
+
+
+class TestCommandSync(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.hash_file = os.path.join(self.directory, "hash.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_hash_is_deterministic(self):
+        """測試：雜湊與註冊順序無關，指令內容改變時雜湊也改變"""
+        self.assertEqual(compute_tree_hash(build_tree(("a", "b"))), compute_tree_hash(build_tree(("b", "a"))))
+        self.assertNotEqual(compute_tree_hash(build_tree()), compute_tree_hash(build_tree(description="新說明")))
+
+    def test_sync_only_when_changed(self):
+        """測試：雜湊相同時略過同步，強制同步或指令變更時才呼叫 sync"""
+        tree = CountingTree(build_tree())
+        results = [asyncio.run(sync_command_tree(tree, file_path=self.hash_file)) for _ in range(2)]
+        self.assertEqual([r["synced"] for r in results], [True, False])
+        asyncio.run(sync_command_tree(tree, force=True, file_path=self.hash_file))
+        self.assertEqual(tree.sync_calls, 2)
+
+        changed = CountingTree(build_tree(description="新說明"))
+        self.assertTrue(asyncio.run(sync_command_tree(changed, file_path=self.hash_file))["synced"])
+
+    def test_guild_sync_leaves_tree_unchanged(self):
+        """測試：同步到開發用伺服器後還原指令樹，之後的全域同步不會帶到複製的指令"""
+        tree = CountingTree(build_tree())
+        guild = discord.Object(id=42)
+        result = asyncio.run(sync_command_tree(tree, guild_id=42, file_path=self.hash_file))
+        self.assertEqual(result["count"], 2)
+        self.assertEqual(tree.get_commands(guild=guild), [])
+        self.assertEqual(len(tree.get_commands()), 2)
+
+        again = asyncio.run(sync_command_tree(tree, guild_id=42, file_path=self.hash_file))
+        self.assertFalse(again["synced"], "還原後再次計算的雜湊應該相同")
+        self.assertEqual(tree.get_commands(guild=guild), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,7 +9,8 @@ from loguru import logger
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from module.forum_notifier.data_manager import ensure_data_file, load_data, save_data, update_data
+from module.forum_notifier import data_manager
+from module.forum_notifier.data_manager import ensure_data_file, load_data, save_data, update_data, get_high_water_mark
 
 
 class TestDataManager(unittest.IsolatedAsyncioTestCase):
@@ -24,11 +25,13 @@ class TestDataManager(unittest.IsolatedAsyncioTestCase):
         }
         if not os.path.exists("tests/data"):
             os.makedirs("tests/data")
+        data_manager._cache.clear()
 
     async def asyncTearDown(self):
         """在每個測試後執行，清理測試用檔案"""
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
+        for name in os.listdir("tests/data"):
+            if name.startswith(os.path.basename(self.test_file)):
+                os.remove(os.path.join("tests/data", name))
 
     async def test_ensure_data_file_creates_file(self):
         """測試：檔案不存在時自動創建"""
@@ -59,6 +62,39 @@ class TestDataManager(unittest.IsolatedAsyncioTestCase):
             content = json.loads(await f.read())
         self.assertEqual(content, self.test_data, "檔案內容應該與儲存的資料一致")
 
+    async def test_save_data_is_atomic_and_skips_unchanged(self):
+        """測試：寫入後不留下暫存檔，內容未變更時不重寫檔案"""
+        self.assertTrue(await save_data(self.test_file, self.test_data))
+        self.assertFalse(os.path.exists(self.test_file + ".tmp"), "暫存檔應該已經取代原檔")
+        mtime = os.stat(self.test_file).st_mtime_ns
+
+        self.assertFalse(await save_data(self.test_file, json.loads(json.dumps(self.test_data))), "內容相同時應該略過寫入")
+        self.assertEqual(os.stat(self.test_file).st_mtime_ns, mtime)
+
+        self.test_data["板塊A"]["normalthread"].append("54322")
+        self.assertTrue(await save_data(self.test_file, self.test_data), "內容變更時應該寫入")
+        self.assertEqual(await load_data(self.test_file), self.test_data)
+
+    async def test_load_data_uses_cache_until_file_changes(self):
+        """測試：檔案未變更時使用快取（回傳複本），檔案被外部修改後重新讀取"""
+        await save_data(self.test_file, self.test_data)
+        data = await load_data(self.test_file)
+        data["板塊A"]["stickthread"].append("99999")
+        self.assertEqual(await load_data(self.test_file), self.test_data, "修改回傳的資料不應影響快取")
+
+        changed = {"板塊B": {"stickthread": [], "normalthread": ["1"]}}
+        with open(self.test_file, "w", encoding="utf-8") as f:
+            json.dump(changed, f)
+        self.assertEqual(await load_data(self.test_file), changed)
+
+    async def test_corrupt_file_is_preserved(self):
+        """測試：損毀的資料檔會改名保留，不會被直接覆蓋"""
+        with open(self.test_file, "w", encoding="utf-8") as f:
+            f.write('{"板塊A": {"stickthread": ["123')
+        self.assertEqual(await load_data(self.test_file), {})
+        preserved = [name for name in os.listdir("tests/data") if name.startswith("test_data.json.corrupt-")]
+        self.assertEqual(len(preserved), 1, "應該保留損毀的資料檔")
+
     def test_update_data(self):
         """測試：更新資料邏輯"""
         existing_data = {
@@ -69,7 +105,7 @@ class TestDataManager(unittest.IsolatedAsyncioTestCase):
         }
         new_threads = {
             "stickthread": ["12345", "67890"],
-            "normalthread": ["54321", "09876"]
+            "normalthread": ["54321", "54330"]
         }
         updated, updated_data = update_data(existing_data, new_threads, "板塊A")
 
@@ -77,10 +113,37 @@ class TestDataManager(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(len(updated["stickthread"]), 1, "應該只有一篇新的置頂文章")
         self.assertEqual(updated["stickthread"][0], "67890", "新增的置頂文章 ID 應該是 67890")
         self.assertEqual(len(updated["normalthread"]), 1, "應該只有一篇新的非置頂文章")
-        self.assertEqual(updated["normalthread"][0], "09876", "新增的非置頂文章 ID 應該是 09876")
+        self.assertEqual(updated["normalthread"][0], "54330", "新增的非置頂文章 ID 應該是 54330")
 
         self.assertIn("67890", updated_data["板塊A"]["stickthread"], "應該新增置頂文章到板塊資料中")
-        self.assertIn("09876", updated_data["板塊A"]["normalthread"], "應該新增非置頂文章到板塊資料中")
+        self.assertIn("54330", updated_data["板塊A"]["normalthread"], "應該新增非置頂文章到板塊資料中")
+        self.assertEqual(updated_data["板塊A"]["hwm"], 54330, "高水位應該更新為最大的文章 ID")
+
+    def test_update_data_ignores_bumped_threads(self):
+        """測試：被回覆頂上來的舊文章（ID 不大於高水位）不算新文章，即使不在上次的列表中"""
+        existing_data = {"板塊A": {"stickthread": [], "normalthread": ["500", "510"], "hwm": 520}}
+        new_threads = {"stickthread": [], "normalthread": ["521", "300", "510", "522"]}
+        updated, updated_data = update_data(existing_data, new_threads, "板塊A")
+        self.assertEqual(updated["normalthread"], ["521", "522"])
+        self.assertEqual(updated_data["板塊A"]["hwm"], 522)
+
+    def test_incomplete_listing_keeps_high_water_mark(self):
+        """測試：列表不完整時不提高高水位，已推播的文章下次不會重複推播，較舊的新文章仍會推播"""
+        existing_data = {"板塊A": {"stickthread": [], "normalthread": ["100"], "hwm": 100}}
+        updated, existing_data = update_data(existing_data, {"normalthread": ["140", "139", "50"]}, "板塊A", complete=False)
+        self.assertEqual(updated["normalthread"], ["140", "139"])
+        self.assertEqual(existing_data["板塊A"]["hwm"], 100)
+
+        updated, existing_data = update_data(existing_data, {"normalthread": ["140", "139", "111", "101", "99"]}, "板塊A")
+        self.assertEqual(updated["normalthread"], ["111", "101"])
+        self.assertEqual(existing_data["板塊A"]["hwm"], 140)
+        self.assertNotIn("announced", existing_data["板塊A"])
+
+    def test_high_water_mark_from_legacy_data(self):
+        """測試：舊版資料沒有 hwm 時以保存的列表推算，沒有紀錄的板塊為 None"""
+        existing_data = {"板塊A": {"stickthread": ["1"], "normalthread": ["98", "120", "99"]}}
+        self.assertEqual(get_high_water_mark(existing_data, "板塊A"), 120)
+        self.assertIsNone(get_high_water_mark(existing_data, "板塊B"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+import unittest
+import asyncio
+import os
+import discord
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.embed_batcher import EmbedBatcher
+
+
+class TestEmbedBatcher(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.sent = []
+
+        async def send(embeds):
+            self.sent.append([embed.title for embed in embeds])
+
+        self.send = send
+
+    async def test_full_batch_is_sent_immediately(self):
+        """測試：滿 10 個 Embed 時立即送出，剩餘的在 close 時送出且順序不變"""
+        batcher = EmbedBatcher(self.send, window=60)
+        for i in range(12):
+            await batcher.add(discord.Embed(title=str(i)))
+        self.assertEqual(self.sent, [[str(i) for i in range(10)]])
+
+        await batcher.close()
+        self.assertEqual(self.sent[1], ["10", "11"])
+        self.assertEqual(batcher.stats, {"embeds": 12, "messages": 2})
+
+    async def test_character_limit_splits_batch(self):
+        """測試：再加入會超過字元上限時，先送出目前的批次"""
+        batcher = EmbedBatcher(self.send, window=60, max_chars=6000)
+        for title in ("a", "b", "c"):
+            await batcher.add(discord.Embed(title=title, description="x" * 2500))
+        await batcher.close()
+        self.assertEqual(self.sent, [["a", "b"], ["c"]])
+
+    async def test_flush_after_window(self):
+        """測試：時間窗內沒有新的 Embed 時自動送出"""
+        batcher = EmbedBatcher(self.send, window=0.05)
+        await batcher.add(discord.Embed(title="a"))
+        await batcher.add(discord.Embed(title="b"))
+        self.assertEqual(self.sent, [])
+
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.sent, [["a", "b"]])
+        await batcher.close()
+        self.assertEqual(len(self.sent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
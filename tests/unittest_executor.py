@@ -0,0 +1,75 @@
+import unittest
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+# 設定模組路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.executor import SharedExecutor
+
+
+def run_sleep_process(seconds, token=None):
+    """啟動會卡住的子行程，並登記到取消權杖"""
+    process = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"])
+    if token:
+        token.register(process)
+    process.wait()
+    return process.returncode
+
+
+class TestSharedExecutor(unittest.TestCase):
+    def setUp(self):
+        self.executor = SharedExecutor(io_workers=1, cpu_workers=1)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_timeout_kills_process_and_frees_slot(self):
+        """測試：超時會終止子行程，唯一的執行緒馬上可以執行下一個工作"""
+        async def scenario():
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor.run(run_sleep_process, 30, pool="io", timeout=0.5, cancellable=True)
+            started = time.perf_counter()
+            result = await self.executor.run(lambda: "done", pool="io", timeout=5)
+            return result, time.perf_counter() - started
+
+        result, elapsed = asyncio.run(scenario())
+        self.assertEqual(result, "done")
+        self.assertLess(elapsed, 3, f"超時後執行緒沒有被釋放：{elapsed:.2f} 秒")
+        stats = self.executor.stats()["io"]
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual((stats["queued"], stats["active"]), (0, 0))
+
+    def test_queue_depth_metrics(self):
+        """測試：超過執行緒數量的工作會排隊，並記錄最大排隊數"""
+        async def scenario():
+            return await asyncio.gather(*(self.executor.run(time.sleep, 0.05, pool="cpu") for _ in range(4)))
+
+        asyncio.run(scenario())
+        stats = self.executor.stats()["cpu"]
+        self.assertEqual(stats["completed"], 4)
+        self.assertGreaterEqual(stats["max_queued"], 3, "只有一個執行緒時至少有 3 個工作在排隊")
+        self.assertEqual((stats["queued"], stats["active"]), (0, 0))
+
+    def test_abandoned_queued_work_is_skipped(self):
+        """測試：還在排隊就超時的工作不會再被執行"""
+        calls = []
+
+        async def scenario():
+            blocker = asyncio.ensure_future(self.executor.run(time.sleep, 0.5, pool="io"))
+            await asyncio.sleep(0.05)
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.executor.run(calls.append, "late", pool="io", timeout=0.1)
+            await blocker
+            await self.executor.run(lambda: None, pool="io")
+
+        asyncio.run(scenario())
+        self.assertEqual(calls, [])
+        self.assertEqual(self.executor.stats()["io"]["queued"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cogs.forum_notifier import ForumNotifier
+from module.forum_notifier import data_manager
+from module.forum_notifier.data_manager import load_data, save_data
+from module.forum_notifier.response_cache import ResponseCache
+
+
+LISTING_URL = "https://forum.net/forum-2-1.html"
+
+
+class FakeBot:
+    def get_channel(self, channel_id):
+        return object()
+
+
+class FakeScraper:
+    """回傳固定文章列表，並像實際抓取一樣把列表頁記錄到回應快取"""
+    def __init__(self, response_cache):
+        self.response_cache = response_cache
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def FetchThreadIDs(self, settings, high_water_marks=None):
+        self.response_cache.store(LISTING_URL, {}, "<html>listing</html>")
+        return {"2": {"stickthread": [], "normalthread": [{"id": "101"}, {"id": "100"}], "complete": True}}
+
+
+class TestCheckNewThreadsFailure(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        data_manager._cache.clear()
+        self.cog = object.__new__(ForumNotifier)
+        self.cog.bot = FakeBot()
+        self.cog.settings = {"channel_id": 1}
+        self.cog.data_file = os.path.join(self.directory, "forum_notifier.json")
+        self.cog.response_cache = ResponseCache()
+        self.cog.connection_stats = {}
+        self.cog.stage_stats = {}
+        self.cog._create_scraper = lambda: FakeScraper(self.cog.response_cache)
+        self.notified = []
+
+        async def notify(jobs):
+            self.notified.extend(job[1] for job in jobs)
+        self.cog._notify_new_threads = notify
+        await save_data(self.cog.data_file, {"2": {"stickthread": [], "normalthread": ["100"], "hwm": 100}})
+
+    async def asyncTearDown(self):
+        data_manager._cache.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    async def test_success_keeps_cache(self):
+        """測試：推播與保存都成功時保留列表頁快取"""
+        await self.cog.check_new_threads.coro(self.cog)
+        self.assertEqual(self.notified, ["101"])
+        self.assertIn(LISTING_URL, self.cog.response_cache._entries)
+
+    async def test_notify_failure_clears_cache(self):
+        """測試：推播失敗時清空列表頁快取，下次不會因頁面未變更而略過該板塊"""
+        async def notify(jobs):
+            raise RuntimeError("send failed")
+        self.cog._notify_new_threads = notify
+
+        await self.cog.check_new_threads.coro(self.cog)
+        self.assertEqual(self.cog.response_cache._entries, {})
+        self.assertEqual((await load_data(self.cog.data_file))["2"]["hwm"], 100)
+
+    async def test_save_failure_clears_cache(self):
+        """測試：資料檔寫入失敗時清空列表頁快取"""
+        with patch.object(data_manager, "_write_atomic", side_effect=OSError("disk full")):
+            await self.cog.check_new_threads.coro(self.cog)
+        self.assertEqual(self.notified, ["101"])
+        self.assertEqual(self.cog.response_cache._entries, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
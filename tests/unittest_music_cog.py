@@ -0,0 +1,238 @@
+import unittest
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from cogs.music_cog import MusicPlayerCog
+from module.music_player.audio_cache import AudioCache
+from module.music_player.playlist_manager import MusicPlaylistManager
+
+
+def make_song(i):
+    """建立測試用的歌曲資訊"""
+    return {
+        "id": f"id_{i}",
+        "title": f"Song {i}",
+        "uploader": f"Uploader {i}",
+        "uploader_url": f"http://example.com/channel{i}",
+        "duration": 210,
+        "url": f"http://example.com/song{i}",
+        "thumbnail": f"http://example.com/thumbnail{i}.jpg"
+    }
+
+
+class FakeDownloader:
+    """回傳固定結果的下載器"""
+    def __init__(self, entries):
+        self.entries = entries
+
+    async def async_extract_playlist_info(self, url):
+        return self.entries
+
+    async def async_download(self, url):
+        song = next(entry for entry in self.entries if entry["url"] == url)
+        return dict(song), f"/tmp/{song['id']}.mp3"
+
+
+class FakeController:
+    """記錄播放的歌曲"""
+    def __init__(self):
+        self.played = []
+
+    async def set_voice_client(self, voice_client):
+        pass
+
+    async def play_song(self, song_id, start_offset=0):
+        self.played.append(song_id)
+
+
+class FakeEmbeds:
+    """記錄 playing_embed 收到的歌曲"""
+    def __init__(self):
+        self.playing = []
+
+    def playing_embed(self, song, **kwargs):
+        self.playing.append(song)
+        return song
+
+    def error_embed(self, message):
+        return message
+
+    def playlist_embed(self, playlist_page):
+        return playlist_page
+
+
+class FakeProgress:
+    """回傳可調整播放進度的播放控制器"""
+    def __init__(self):
+        self.is_playing = True
+        self.current_sec = 0
+
+    def get_current_status(self):
+        return {"current_sec": self.current_sec}
+
+
+class FakeMessage:
+    async def edit(self, **kwargs):
+        self.last_edit = kwargs
+
+
+class FakeChannel:
+    async def connect(self):
+        return object()
+
+
+class FakeVoice:
+    channel = FakeChannel()
+
+
+class FakeUser:
+    voice = FakeVoice()
+
+
+class FakeInteraction:
+    user = FakeUser()
+
+
+class FakeLoop:
+    def is_running(self):
+        return True
+
+
+class TestPlayerStartWithRestoredQueue(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cog = object.__new__(MusicPlayerCog)
+        self.cog.playlist_manager = MusicPlaylistManager()
+        # 還原的工作階段：兩首歌，目前在第 2 首
+        self.cog.playlist_manager.add_many([make_song(0), make_song(1)])
+        self.cog.playlist_manager.jump_to(1)
+        self.cog.player_controller = FakeController()
+        self.cog.embed_manager = FakeEmbeds()
+        self.cog.player_message = FakeMessage()
+        self.cog.update_task = FakeLoop()
+        self.cog.buttons_view = None
+        self.cog._persist_player_state = lambda: None
+
+        async def update_buttons_view():
+            pass
+        self.cog.update_buttons_view = update_buttons_view
+
+    async def test_new_playlist_moves_cursor_to_played_song(self):
+        """測試：已有還原的清單時啟動新的播放清單，目前位置會指向實際播放的歌曲"""
+        self.cog.yt_dlp_manager = FakeDownloader([make_song(5), make_song(6)])
+        await self.cog._handle_playlist_start(FakeInteraction(), "playlist")
+
+        current = self.cog.playlist_manager.get_current_song()
+        self.assertEqual(self.cog.player_controller.played, ["id_5"])
+        self.assertEqual(current["id"], "id_5")
+        self.assertIs(self.cog.embed_manager.playing[-1], current)
+
+    async def test_playlist_already_queued(self):
+        """測試：播放清單的歌曲都已在清單中時，播放既有的那一首而不是傳入 None"""
+        self.cog.yt_dlp_manager = FakeDownloader([make_song(0), make_song(1)])
+        await self.cog._handle_playlist_start(FakeInteraction(), "playlist")
+
+        self.assertEqual(len(self.cog.playlist_manager.playlist), 2)
+        self.assertEqual(self.cog.player_controller.played, ["id_0"])
+        self.assertEqual(self.cog.playlist_manager.current_index, 0)
+        self.assertIsNotNone(self.cog.embed_manager.playing[-1])
+
+    async def test_single_song_moves_cursor_to_added_song(self):
+        """測試：已有還原的清單時啟動單曲，目前位置會指向新增的歌曲"""
+        self.cog.yt_dlp_manager = FakeDownloader([make_song(7)])
+        await self.cog._handle_single_song_start(FakeInteraction(), make_song(7)["url"])
+
+        self.assertEqual(self.cog.player_controller.played, ["id_7"])
+        self.assertEqual(self.cog.playlist_manager.get_current_song()["id"], "id_7")
+        self.assertEqual(self.cog.playlist_manager.current_index, 2)
+
+
+class TestPlaylistRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.cog = object.__new__(MusicPlayerCog)
+        self.cog.playlist_manager = MusicPlaylistManager()
+        self.cog.playlist_manager.add_many([make_song(i) for i in range(8)])
+        self.cog.player_controller = FakeProgress()
+        self.cog.embed_manager = FakeEmbeds()
+        self.cog.playlist_per_page = 5
+        self.cog.playlist_render_cache = OrderedDict()
+        self.cog.playlist_render_cache_size = 32
+
+    def test_progress_does_not_split_cache(self):
+        """測試：播放進度改變時沿用同一筆快取，但預計播放時間以目前進度計算"""
+        manager = self.cog.playlist_manager
+        first = self.cog._render_playlist_page(*manager.resolve_page_range(None, per_page=5))
+        self.cog.player_controller.current_sec = 123
+        second = self.cog._render_playlist_page(*manager.resolve_page_range(None, per_page=5))
+
+        self.assertEqual(len(self.cog.playlist_render_cache), 1)
+        self.assertEqual(first["embed"]["etas"][1], 210)
+        self.assertEqual(second["embed"]["etas"][1], 210 - 123)
+        self.assertEqual(second["embed"]["remaining_duration"], 8 * 210 - 123)
+
+    def test_mode_change_updates_etas(self):
+        """測試：切換隨機播放後，快取命中的頁面也不會顯示過期的預計播放時間"""
+        manager = self.cog.playlist_manager
+        self.cog._render_playlist_page(*manager.resolve_page_range(None, per_page=5))
+        manager.set_shuffle(True)
+        page = self.cog._render_playlist_page(*manager.resolve_page_range(None, per_page=5))
+        self.assertEqual(page["embed"]["etas"][1:], [None] * 4)
+
+
+class FakeEmptyLoop:
+    def is_running(self):
+        return False
+
+
+class FakeButtons:
+    guild_id = 1
+
+
+class FakeIdleEmbeds:
+    def idle_disconnect_embed(self, reason_text):
+        return reason_text
+
+
+class TestIdleReap(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cog = object.__new__(MusicPlayerCog)
+        self.cog.audio_cache = AudioCache(self.directory, max_bytes=10 ** 6)
+        self.cog.playlist_manager = MusicPlaylistManager()
+        self.cog.buttons_view = FakeButtons()
+        self.cog.guild_id = None
+        self.cog.resume_task = None
+        self.cog.player_controller = None
+        self.cog.yt_dlp_manager = None
+        self.cog.update_task = FakeEmptyLoop()
+        self.cog.voice_reconnect_loop = FakeEmptyLoop()
+        self.cog.embed_manager = FakeIdleEmbeds()
+        self.cog.player_message = None
+        self.cog.playlist_render_cache = OrderedDict()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    async def test_reap_keeps_downloaded_files(self):
+        """測試：閒置離開只釋放本伺服器的引用，不刪除下載的音訊檔案"""
+        self.cog._bind_guild(1)
+        self.cog.playlist_manager.add(make_song(0))
+        path = os.path.join(self.directory, "id_0.opus")
+        open(path, "wb").close()
+        self.cog.audio_cache.add("id_0", path)
+
+        await self.cog._reap_idle_session("finished", 300)
+
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(self.cog.audio_cache.contains("id_0"))
+        self.assertNotIn(1, self.cog.audio_cache._owners)
+        self.assertEqual(self.cog.playlist_manager.playlist, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
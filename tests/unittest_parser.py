@@ -0,0 +1,53 @@
+import unittest
+import os
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.parser import parse_html, available_backends, DEFAULT_BACKEND
+from module.forum_notifier.scraper import Scraper
+
+from unittest_scraper import BASE_URL, LISTING_HTML, THREAD_HTML, PROFILE_HTML
+
+
+PAGE_TEMPLATE = """<html><head><title>論壇</title><script>var x = 1;</script></head>
+<body><div id="hd"><a href="space-uid-5.html" class="xw1">登入者</a></div>{content}<div id="ft">頁尾</div></body></html>"""
+
+
+class TestParser(unittest.TestCase):
+    def test_default_backend(self):
+        """測試：預設解析器是可用的最快解析器，html.parser 一定可用"""
+        self.assertEqual(DEFAULT_BACKEND, available_backends()[0])
+        self.assertIn("html.parser", available_backends())
+
+    def test_unknown_backend_falls_back(self):
+        """測試：指定不存在的解析器時改用預設解析器"""
+        soup = parse_html(PROFILE_HTML, "profile", backend="no-such-parser")
+        self.assertIsNotNone(soup.select_one("div#uhd img"))
+
+    def test_scoped_listing_keeps_records(self):
+        """測試：只解析文章列表時，提取的文章資訊與解析整份文件相同"""
+        page = PAGE_TEMPLATE.format(content=LISTING_HTML)
+        scraper = Scraper(BASE_URL)
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                scoped = parse_html(page, "listing", backend)
+                self.assertIsNone(scoped.find("div", id="hd"))
+                self.assertEqual(scraper._extract_thread_ids(scoped), scraper._extract_thread_ids(parse_html(page, backend=backend)))
+
+    def test_scoped_thread_page(self):
+        """測試：只解析標題與樓層時，不會取到頁首的連結"""
+        page = PAGE_TEMPLATE.format(content=THREAD_HTML)
+        scraper = Scraper(BASE_URL)
+        for backend in available_backends():
+            with self.subTest(backend=backend):
+                soup = parse_html(page, "thread", backend)
+                self.assertEqual(scraper._extract_text(soup.find("span", id="thread_subject")), "文章標題")
+                self.assertEqual(scraper._extract_post_time(soup), "2025-2-2 12:00")
+                self.assertEqual(scraper._extract_author_info(soup)["name"], "作者二")
+                self.assertIsNone(soup.find("script"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,274 @@
+import unittest
+import os
+import random
+import time
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.music_player.playlist_manager import MusicPlaylistManager
+from module.music_player.duration_index import DurationIndex
+
+
+def make_song(i, **overrides):
+    """建立測試用的歌曲資訊"""
+    song = {
+        "id": f"id_{i}",
+        "title": f"Song {i}",
+        "uploader": f"Uploader {i}",
+        "uploader_url": f"http://example.com/channel{i}",
+        "duration": 210,
+        "url": f"http://example.com/song{i}",
+        "thumbnail": f"http://example.com/thumbnail{i}.jpg"
+    }
+    song.update(overrides)
+    return song
+
+
+class TestPlaylistManagerBulkAdd(unittest.TestCase):
+    def setUp(self):
+        self.manager = MusicPlaylistManager()
+
+    def test_add_many_counts_duplicates_and_invalid(self):
+        """測試：批次新增會回報新增、重複與無效的數量"""
+        self.manager.add(make_song(1))
+        songs = [make_song(1), make_song(2), make_song(2), {"id": "broken"}, make_song(3)]
+        result = self.manager.add_many(songs)
+
+        self.assertEqual(result["added"], 2, "應該只新增 id_2 與 id_3")
+        self.assertEqual(result["duplicate"], 2, "清單內已有的 id_1 與批次內重複的 id_2 都算重複")
+        self.assertEqual(result["invalid"], 1, "缺少欄位的歌曲應該被視為無效")
+        self.assertEqual([s["index"] for s in self.manager.playlist], [1, 2, 3])
+        self.assertEqual([s["id"] for s in result["songs"]], ["id_2", "id_3"])
+
+    def test_add_many_initializes_current_index(self):
+        """測試：清單原本為空時，批次新增會把 current_index 設為 0"""
+        self.manager.add_many([make_song(i) for i in range(3)])
+        self.assertEqual(self.manager.current_index, 0)
+
+    def test_id_index_follows_removal(self):
+        """測試：移除歌曲後，同一首歌可以再次加入"""
+        self.manager.add_many([make_song(1), make_song(2)])
+        self.manager.remove_by_id("id_1")
+        self.assertFalse(self.manager.contains("id_1"))
+        result = self.manager.add_many([make_song(1)])
+        self.assertEqual(result["added"], 1)
+
+        self.manager.clear()
+        self.assertFalse(self.manager.contains("id_2"), "清空後 ID 索引也應該清空")
+
+    def test_add_many_large_playlist_is_fast(self):
+        """測試：一次匯入 5000 首歌曲應該在很短時間內完成"""
+        songs = [make_song(i) for i in range(5000)]
+        started = time.perf_counter()
+        result = self.manager.add_many(songs)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(result["added"], 5000)
+        self.assertLess(elapsed, 0.5, f"匯入 5000 首歌曲耗時過久：{elapsed:.3f} 秒")
+
+
+class TestPlaylistManagerShuffle(unittest.TestCase):
+    def setUp(self):
+        random.seed(1234)
+        self.manager = MusicPlaylistManager()
+        self.manager.add_many([make_song(i) for i in range(10)])
+        self.manager.set_shuffle(True)
+
+    def test_shuffle_plays_every_song_once(self):
+        """測試：非循環的隨機播放一輪會播放每首歌恰好一次"""
+        played = [self.manager.get_current_song()["id"]]
+        while (song := self.manager.switch_to_next_song()) is not None:
+            played.append(song["id"])
+        self.assertEqual(sorted(played), sorted(s["id"] for s in self.manager.playlist))
+        self.assertIsNone(self.manager.get_next_song_info(), "一輪結束後應該沒有下一首")
+
+    def test_peek_matches_next_switch(self):
+        """測試：get_next_song_info 預覽的歌曲就是下一次切換的歌曲"""
+        for _ in range(5):
+            peeked = self.manager.get_next_song_info()
+            self.assertIs(self.manager.get_next_song_info(), peeked, "重複預覽應該得到同一首")
+            self.assertIs(self.manager.switch_to_next_song(), peeked)
+
+    def test_previous_uses_history(self):
+        """測試：隨機播放時上一首會依照實際播放順序返回"""
+        order = [self.manager.get_current_song()]
+        for _ in range(3):
+            order.append(self.manager.switch_to_next_song())
+        for expected in reversed(order[:-1]):
+            self.assertIs(self.manager.switch_to_previous_song(), expected)
+        self.assertIsNone(self.manager.switch_to_previous_song())
+
+    def test_loop_starts_new_round(self):
+        """測試：循環模式下一輪結束後會繼續抽下一輪"""
+        self.manager.loop = True
+        for _ in range(35):
+            self.assertIsNotNone(self.manager.switch_to_next_song())
+
+    def test_removed_song_skipped_in_history(self):
+        """測試：已移除的歌曲不會出現在上一首"""
+        first = self.manager.get_current_song()
+        second = self.manager.switch_to_next_song()
+        self.manager.switch_to_next_song()
+        self.manager.remove_by_id(second["id"])
+        self.assertIs(self.manager.switch_to_previous_song(), first)
+
+    def test_remove_keeps_round_progress(self):
+        """測試：移除歌曲後本輪已播放的歌曲不會再被抽到，其餘歌曲仍各播放一次"""
+        played = [self.manager.get_current_song()["id"]]
+        for _ in range(4):
+            played.append(self.manager.switch_to_next_song()["id"])
+        unplayed = [s["id"] for s in self.manager.playlist if s["id"] not in played]
+        self.manager.remove_by_id(unplayed.pop())
+        self.manager.remove_by_id(played[1])
+
+        rest = []
+        while (song := self.manager.switch_to_next_song()) is not None:
+            rest.append(song["id"])
+        self.assertEqual(sorted(rest), sorted(unplayed))
+
+    def test_jump_to_keeps_round_progress(self):
+        """測試：直接切換歌曲不會開始新的一輪，切換到的歌曲視為已播放"""
+        played = [self.manager.get_current_song()["id"]]
+        for _ in range(3):
+            played.append(self.manager.switch_to_next_song()["id"])
+        target = next(i for i, s in enumerate(self.manager.playlist) if s["id"] not in played)
+        played.append(self.manager.jump_to(target)["id"])
+
+        while (song := self.manager.switch_to_next_song()) is not None:
+            played.append(song["id"])
+        self.assertEqual(sorted(played), sorted(s["id"] for s in self.manager.playlist))
+
+
+class TestPlaylistManagerRestore(unittest.TestCase):
+    def test_restore_keeps_duplicates_and_index(self):
+        """測試：還原時保留重複的歌曲與原本的順序及目前位置"""
+        manager = MusicPlaylistManager()
+        for i in (0, 1, 0, 2):
+            manager.add(make_song(i))
+        state = {"playlist": manager.playlist, "current_index": 3}
+
+        restored = MusicPlaylistManager()
+        restored.restore_state(state)
+        self.assertEqual([s["id"] for s in restored.playlist], ["id_0", "id_1", "id_0", "id_2"])
+        self.assertEqual([s["index"] for s in restored.playlist], [1, 2, 3, 4])
+        self.assertEqual(restored.get_current_song()["id"], "id_2")
+        restored.remove_by_id("id_0")
+        self.assertTrue(restored.contains("id_0"), "重複的歌曲移除一首後仍在清單中")
+
+
+class TestPlaylistManagerDurations(unittest.TestCase):
+    def setUp(self):
+        self.manager = MusicPlaylistManager()
+        self.manager.add_many([make_song(i, duration=60 * (i + 1)) for i in range(6)])
+
+    def test_duration_index_matches_naive_sum(self):
+        """測試：前綴和索引的結果與直接加總一致（含逐首附加）"""
+        values = [random.randint(0, 600) for _ in range(257)]
+        index = DurationIndex(values[:100])
+        index.extend(values[100:])
+        for count in (0, 1, 7, 64, 100, 200, 257):
+            self.assertEqual(index.prefix_sum(count), sum(values[:count]))
+        self.assertEqual(index.range_sum(13, 77), sum(values[13:77]))
+        self.assertEqual(index.total, sum(values))
+
+    def test_paginated_etas(self):
+        """測試：分頁會回傳每首歌的預計播放時間與剩餘總長度"""
+        self.manager.switch_to_next_song()  # 目前播放第 2 首（120 秒）
+        page = self.manager.get_playlist_paginated(page=1, per_page=4, current_sec=20)
+
+        self.assertEqual(page["etas"], [None, 0, 100, 100 + 180])
+        self.assertEqual(page["total_duration"], sum(60 * (i + 1) for i in range(6)))
+        self.assertEqual(page["remaining_duration"], 100 + 180 + 240 + 300 + 360)
+
+    def test_etas_follow_removal_and_loop(self):
+        """測試：移除歌曲後索引同步更新，循環模式會計算繞回開頭的時間"""
+        self.manager.remove_by_id("id_2")  # 移除 180 秒的歌曲
+        self.manager.loop = True
+        self.manager.current_index = 4  # 最後一首（360 秒）
+        self.assertEqual(self.manager.get_song_eta(0, current_sec=60), 300)
+        self.assertEqual(self.manager.get_song_eta(1, current_sec=60), 300 + 60)
+        self.assertEqual(self.manager.get_remaining_duration(current_sec=60), 300)
+
+
+class TestPlaylistManagerSearch(unittest.TestCase):
+    def setUp(self):
+        self.manager = MusicPlaylistManager()
+        titles = ["九藏喵窩 主題曲", "Never Gonna Give You Up", "喵窩 片尾曲 Ending", "ＦＵＬＬ Version 主題曲"]
+        self.manager.add_many([make_song(i, title=title) for i, title in enumerate(titles)])
+
+    def test_search_by_cjk_and_prefix(self):
+        """測試：可用中文片段、英文前綴與全形字搜尋標題"""
+        self.assertEqual([s["index"] for s in self.manager.search_songs("主題")], [1, 4])
+        self.assertEqual(self.manager.search_songs("gon")[0]["index"], 2)
+        self.assertEqual(self.manager.search_songs("full")[0]["index"], 4)
+        self.assertEqual(self.manager.search_songs("喵窩 ending")[0]["index"], 3, "符合較多查詢詞的歌曲應該排在前面")
+
+    def test_search_by_index(self):
+        """測試：輸入數字時優先列出對應編號的歌曲"""
+        self.manager.add_many([make_song(i) for i in range(10, 30)])
+        self.assertEqual([s["index"] for s in self.manager.search_songs("2", limit=5)], [2, 20, 21, 22, 23])
+
+    def test_search_follows_removal(self):
+        """測試：移除歌曲後不會再被搜尋到"""
+        self.manager.remove_by_id("id_0")
+        self.assertEqual([s["title"] for s in self.manager.search_songs("主題曲")], ["ＦＵＬＬ Version 主題曲"])
+
+    def test_search_large_playlist_is_fast(self):
+        """測試：一萬首歌的清單搜尋仍在延遲預算內"""
+        self.manager.add_many([make_song(i, title=f"喵窩精選 第{i}首 Track {i}") for i in range(10, 10010)])
+        started = time.perf_counter()
+        results = self.manager.search_songs("喵窩精選 track")
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), 25)
+        self.assertLess(elapsed, 0.2, f"搜尋耗時過久：{elapsed:.3f} 秒")
+
+
+class TestPlaylistManagerCursorPaging(unittest.TestCase):
+    def setUp(self):
+        self.manager = MusicPlaylistManager()
+        self.manager.add_many([make_song(i) for i in range(12)])
+
+    def turn_page(self, page, direction):
+        start, end = self.manager.resolve_page_range(page["cursor"], direction, per_page=5)
+        return self.manager.get_playlist_page(start=start, end=end, per_page=5)
+
+    def test_version_changes_on_mutation(self):
+        """測試：新增、移除與清空都會改變清單版本號"""
+        versions = [self.manager.version]
+        self.manager.add(make_song(100))
+        versions.append(self.manager.version)
+        self.manager.remove_by_id("id_100")
+        versions.append(self.manager.version)
+        self.manager.clear()
+        versions.append(self.manager.version)
+        self.assertEqual(len(set(versions)), 4)
+
+    def test_removal_while_browsing_does_not_skip(self):
+        """測試：瀏覽時移除前面的歌曲，下一頁仍從上次看到的最後一首之後開始"""
+        first = self.manager.get_playlist_page(per_page=5)
+        self.manager.remove_by_id("id_0")
+        self.manager.remove_by_id("id_1")
+        second = self.turn_page(first, "next")
+        self.assertEqual([s["id"] for s in second["songs"]], [f"id_{i}" for i in range(5, 10)])
+
+        back = self.turn_page(second, "previous")
+        self.assertEqual([s["id"] for s in back["songs"]], ["id_2", "id_3", "id_4"])
+        self.assertFalse(back["has_previous"])
+
+    def test_removed_anchor_falls_back_to_position(self):
+        """測試：目前頁面的歌曲全部被移除時，退回到原本的位置繼續瀏覽"""
+        first = self.manager.get_playlist_page(per_page=5)
+        second = self.turn_page(first, "next")
+        for song in list(second["songs"]):
+            self.manager.remove_by_id(song["id"])
+        third = self.turn_page(second, "next")
+        self.assertEqual([s["id"] for s in third["songs"]], ["id_10", "id_11"])
+        self.assertFalse(third["has_next"])
+        self.assertEqual(third["current_page"], third["total_pages"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import os
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.response_cache import ResponseCache
+
+
+URL = "https://forum.net/forum-1-1.html"
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+
+    def test_conditional_headers(self):
+        """測試：保存 ETag 與 Last-Modified 後，下次請求會帶上條件式標頭"""
+        self.assertEqual(self.cache.request_headers(URL), {})
+        self.cache.store(URL, {"ETag": '"abc"', "Last-Modified": "Sun, 19 Oct 2025 00:00:00 GMT"}, "<html></html>")
+        self.assertEqual(self.cache.request_headers(URL), {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Sun, 19 Oct 2025 00:00:00 GMT"
+        })
+
+    def test_content_hash(self):
+        """測試：沒有快取標頭時以內容雜湊判斷頁面是否變更"""
+        self.assertTrue(self.cache.store(URL, {}, "<html>1</html>"), "第一次請求視為已變更")
+        self.assertFalse(self.cache.store(URL, {}, "<html>1</html>"))
+        self.assertTrue(self.cache.store(URL, {}, "<html>2</html>"))
+        self.assertEqual(self.cache.stats, {"not_modified": 0, "unchanged": 1, "changed": 2})
+
+        self.cache.clear()
+        self.assertTrue(self.cache.store(URL, {}, "<html>2</html>"), "清空後需要重新解析")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,250 @@
+import unittest
+import asyncio
+import os
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bs4 import BeautifulSoup
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.forum_notifier.scraper import Scraper, format_stage_latency
+from module.forum_notifier.author_cache import AuthorCache, MISSING
+from module.forum_notifier.response_cache import ResponseCache
+from module.forum_notifier.data_manager import update_data, get_high_water_mark
+
+
+BASE_URL = "https://forum.net/"
+
+LISTING_HTML = """
+<div id="threadlist"><div class="bm_c"><table id="threadlisttableid">
+<tbody id="stickthread_100"><tr>
+  <th class="common"><em>[<a href="forum.php?mod=forumdisplay&fid=2&typeid=1">公告</a>]</em>
+    <a href="thread-100-1-1.html" class="s xst">置頂公告</a></th>
+  <td class="by"><cite><a href="space-uid-1.html">管理員</a></cite><em><span title="2025-1-1">2025-1-1</span></em></td>
+  <td class="by"><cite><a href="space-uid-9.html">回覆者</a></cite><em><a href="forum.php?mod=redirect">3 分鐘前</a></em></td>
+</tr></tbody>
+<tbody id="separatorline"><tr><td></td></tr></tbody>
+<tbody id="normalthread_205"><tr>
+  <th class="new"><a href="thread-205-1-1.html" class="s xst">沒有分類的文章</a></th>
+  <td class="by"><cite><a href="space-uid-2.html">作者二</a></cite><em><span>2025-2-2 12:00</span></em></td>
+  <td class="by"><cite><a href="space-uid-9.html">回覆者</a></cite><em><a href="forum.php?mod=redirect">1 小時前</a></em></td>
+</tr></tbody>
+</table></div></div>
+"""
+
+
+class TestScraperListing(unittest.TestCase):
+    def setUp(self):
+        self.scraper = Scraper(BASE_URL)
+        self.threads = self.scraper._extract_thread_ids(BeautifulSoup(LISTING_HTML, "html.parser"))
+
+    def test_records_capture_listing_metadata(self):
+        """測試：一次解析列表頁即可取得分類、標題、作者與時間"""
+        stick = self.threads["stickthread"][0]
+        self.assertEqual(stick["id"], "100")
+        self.assertTrue(stick["stick"])
+        self.assertEqual(stick["title"], "置頂公告")
+        self.assertEqual(stick["category"]["name"], "公告")
+        self.assertEqual(stick["category"]["url"], BASE_URL + "forum.php?mod=forumdisplay&fid=2&typeid=1")
+        self.assertEqual(stick["author"], {"name": "管理員", "url": BASE_URL + "space-uid-1.html"})
+        self.assertEqual(stick["post_time"], "2025-1-1")
+
+    def test_thread_without_category(self):
+        """測試：沒有分類的文章不會把最後回覆欄位誤判為分類"""
+        normal = self.threads["normalthread"][0]
+        self.assertEqual(normal["id"], "205")
+        self.assertFalse(normal["stick"])
+        self.assertEqual(normal["category"], {"name": None, "url": None})
+        self.assertEqual(normal["post_time"], "2025-2-2 12:00")
+        self.assertEqual(normal["url"], BASE_URL + "thread-205-1-1.html")
+
+
+THREAD_HTML = """
+<span id="thread_subject">文章標題</span>
+<div id="post_1"><a class="xw1" href="space-uid-2.html">作者二</a>
+<em id="authorposton1"><span title="2025-2-2 12:00">1 小時前</span></em></div>
+"""
+
+PROFILE_HTML = """<div id="uhd"><div class="icn avt"><img src="uc_server/avatar.php?uid=2"></div></div>"""
+
+
+class TestFetchThreadDetail(unittest.IsolatedAsyncioTestCase):
+    DELAY = 0.3
+
+    async def asyncSetUp(self):
+        def delayed(body):
+            async def handler(request):
+                await asyncio.sleep(self.DELAY)
+                return web.Response(text=body, content_type="text/html")
+            return handler
+
+        app = web.Application()
+        app.router.add_get("/thread-205-1-1.html", delayed(THREAD_HTML))
+        app.router.add_get("/space-uid-2.html", delayed(PROFILE_HTML))
+        app.router.add_get("/forum-2-1.html", delayed(LISTING_HTML))
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("/"))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    def _record(self):
+        scraper = Scraper(self.base_url)
+        return scraper._extract_thread_ids(BeautifulSoup(LISTING_HTML, "html.parser"))["normalthread"][0]
+
+    async def test_avatar_fetched_alongside_thread_page(self):
+        """測試：列表頁已有作者網址時，頭貼與文章頁同時抓取，並記錄各階段耗時"""
+        stats = {}
+        async with Scraper(self.base_url, stage_stats=stats) as scraper:
+            started = time.perf_counter()
+            detail = await scraper.FetchThreadDetail("2", "205", record=self._record())
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(detail["title"], "文章標題")
+        self.assertEqual(detail["author"]["avatar"], self.base_url + "uc_server/avatar.php?uid=2")
+        self.assertLess(elapsed, self.DELAY * 2)
+        self.assertEqual(set(stats), {"thread", "avatar"})
+        self.assertIn("thread 1 次", format_stage_latency(stats))
+
+    async def test_without_record_fetches_category_and_author_afterwards(self):
+        """測試：沒有 record 時分類與文章頁並行，頭貼等文章頁解析出作者後才抓取"""
+        stats = {}
+        async with Scraper(self.base_url, stage_stats=stats) as scraper:
+            started = time.perf_counter()
+            detail = await scraper.FetchThreadDetail("2", "205")
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(detail["category"], {"name": None, "url": None})
+        self.assertEqual(detail["author"]["url"], self.base_url + "space-uid-2.html")
+        self.assertIsNotNone(detail["author"]["avatar"])
+        self.assertGreaterEqual(elapsed, self.DELAY * 2)
+        self.assertLess(elapsed, self.DELAY * 3)
+        self.assertEqual(set(stats), {"category", "thread", "avatar"})
+
+
+class TestAuthorAvatarCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.profiles = {"1": web.Response(status=500), "2": web.Response(text="<div id='uhd'></div>", content_type="text/html")}
+
+        async def profile(request):
+            return self.profiles[request.match_info["uid"]]
+
+        app = web.Application()
+        app.router.add_get("/space-uid-{uid}.html", profile)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("/"))
+        self.cache = AuthorCache()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_failed_profile_is_not_cached(self):
+        """測試：作者頁面抓取失敗時不寫入快取；頁面正常但沒有頭貼時才快取 None"""
+        async with Scraper(self.base_url, author_cache=self.cache) as scraper:
+            self.assertIsNone(await scraper._fetch_author_avatar(self.base_url + "space-uid-1.html"))
+            self.assertIsNone(await scraper._fetch_author_avatar(self.base_url + "space-uid-2.html"))
+        self.assertIs(self.cache.get("1"), MISSING)
+        self.assertIsNone(self.cache.get("2"))
+
+
+def listing_page(thread_ids):
+    rows = "".join(f"""<tbody id="normalthread_{thread_id}"><tr><th class="new">
+  <a href="thread-{thread_id}-1-1.html" class="s xst">文章 {thread_id}</a></th></tr></tbody>""" for thread_id in thread_ids)
+    return f"<table id=\"threadlisttableid\">{rows}</table>"
+
+
+class TestListingPagination(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pages = {1: [130, 129, 128], 2: [127, 126, 120], 3: [119, 118, 117]}
+        self.requested = []
+
+        async def page(request):
+            number = int(request.match_info["page"])
+            self.requested.append(number)
+            if number not in self.pages and number > max(self.pages):
+                number = max(self.pages)  # 超過最後一頁時 Discuz 回傳最後一頁
+            if self.pages.get(number) is None:
+                return web.Response(status=500)
+            return web.Response(text=listing_page(self.pages[number]), content_type="text/html")
+
+        app = web.Application()
+        app.router.add_get("/forum-2-{page}.html", page)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.settings = {"forums": {"站務": {"url": "forum-2-1.html", "color": "#000000"}}}
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def _fetch(self, high_water_marks, response_cache=None):
+        async with Scraper(str(self.server.make_url("/")), self.settings, response_cache=response_cache) as scraper:
+            threads = await scraper.FetchThreadIDs(self.settings, high_water_marks)
+        if "2" not in threads:
+            return None, None
+        return [record["id"] for record in threads["2"]["normalthread"]], threads["2"].get("complete", True)
+
+    async def test_pages_while_new_threads_visible(self):
+        """測試：頁面仍有大於高水位的文章時翻頁，直到某一頁沒有新文章"""
+        ids, complete = await self._fetch({"2": 125})
+        self.assertEqual(ids, ["130", "129", "128", "127", "126", "120", "119", "118", "117"])
+        self.assertTrue(complete)
+        self.assertEqual(self.requested, [1, 2, 3])
+
+    async def test_bumped_thread_does_not_stop_paging(self):
+        """測試：被回覆頂上來的舊文章排在第一頁最後時，仍會翻頁取得第二頁的新文章"""
+        self.pages = {1: [140, 139, 112, 50], 2: [111, 105, 101], 3: [99, 98]}
+        ids, complete = await self._fetch({"2": 100})
+        self.assertIn("111", ids)
+        self.assertIn("101", ids)
+        self.assertTrue(complete)
+        self.assertEqual(self.requested, [1, 2, 3])
+
+    async def test_no_paging_without_new_threads_or_high_water_mark(self):
+        """測試：第一頁沒有新文章，或沒有高水位（第一次抓取）時不翻頁"""
+        self.assertEqual(len((await self._fetch({"2": 130}))[0]), 3)
+        self.assertEqual(len((await self._fetch({}))[0]), 3)
+        self.assertEqual(self.requested, [1, 1])
+
+    async def test_max_pages_and_failed_page_are_incomplete(self):
+        """測試：達到 max_pages 或翻頁失敗時標記為不完整；超過最後一頁時正常停止"""
+        self.settings["max_pages"] = 2
+        ids, complete = await self._fetch({"2": 100})
+        self.assertEqual((len(ids), complete), (6, False))
+
+        self.settings["max_pages"] = 10
+        self.requested.clear()
+        ids, complete = await self._fetch({"2": 100})
+        self.assertEqual((len(ids), complete), (9, True))
+        self.assertEqual(self.requested, [1, 2, 3, 4])
+
+        self.pages[2] = None
+        ids, complete = await self._fetch({"2": 100})
+        self.assertEqual((len(ids), complete), (3, False))
+
+    async def test_incomplete_listing_is_refetched_when_first_page_unchanged(self):
+        """測試：翻頁失敗後即使第一頁內容沒變，下次仍會重新抓取並推播先前漏掉的文章"""
+        response_cache = ResponseCache()
+        data = {"2": {"stickthread": [], "normalthread": ["125"], "hwm": 125}}
+        missing_page = self.pages[2]
+        self.pages[2] = None
+        ids, complete = await self._fetch({"2": 125}, response_cache)
+        updated, data = update_data(data, {"normalthread": ids}, "2", complete=complete)
+        self.assertEqual(sorted(updated["normalthread"]), ["128", "129", "130"])
+
+        self.pages[2] = missing_page
+        ids, complete = await self._fetch({"2": get_high_water_mark(data, "2")}, response_cache)
+        self.assertIsNotNone(ids, "不完整的板塊不應被視為未變更")
+        updated, data = update_data(data, {"normalthread": ids}, "2", complete=complete)
+        self.assertEqual(sorted(updated["normalthread"]), ["126", "127"])
+
+        # 完整抓取後第一頁沒變就略過
+        self.assertEqual(await self._fetch({"2": get_high_water_mark(data, "2")}, response_cache), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
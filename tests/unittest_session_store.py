@@ -0,0 +1,121 @@
+import unittest
+import os
+import shutil
+import tempfile
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.music_player.playlist_manager import MusicPlaylistManager
+from module.music_player.session_store import MusicSessionStore
+
+
+GUILD_ID = 123456789
+
+
+def make_song(i):
+    """建立測試用的歌曲資訊"""
+    return {
+        "id": f"id_{i}",
+        "title": f"Song {i}",
+        "uploader": f"Uploader {i}",
+        "uploader_url": f"http://example.com/channel{i}",
+        "duration": 210,
+        "url": f"http://example.com/song{i}",
+        "thumbnail": f"http://example.com/thumbnail{i}.jpg"
+    }
+
+
+class TestMusicSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = MusicSessionStore(self.directory, compact_every=5)
+        self.manager = MusicPlaylistManager()
+        self.manager.on_change = lambda op: self.store.append(GUILD_ID, op)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def restore(self):
+        """以新的 store 與播放清單模擬重新啟動後的還原"""
+        state = MusicSessionStore(self.directory).load(GUILD_ID)
+        manager = MusicPlaylistManager()
+        if state:
+            manager.restore_state(state)
+        return state, manager
+
+    def test_restore_queue_cursor_and_offset(self):
+        """測試：重新啟動後播放清單、目前歌曲、模式與進度都能還原"""
+        self.manager.add_many([make_song(i) for i in range(6)])
+        self.manager.remove_by_id("id_1")
+        self.manager.switch_to_next_song()
+        self.manager.switch_to_next_song()
+        self.manager.set_loop(True)
+        self.store.append(GUILD_ID, {"op": "update", "offset": 42, "voice_channel_id": 1, "message_id": 2})
+
+        state, manager = self.restore()
+        self.assertEqual([s["id"] for s in manager.playlist], [s["id"] for s in self.manager.playlist])
+        self.assertEqual(manager.current_index, self.manager.current_index)
+        self.assertTrue(manager.loop)
+        self.assertEqual(state["offset"], 42)
+        self.assertEqual(state["message_id"], 2)
+
+    def test_song_change_resets_offset(self):
+        """測試：換歌後還原的進度從新歌曲開頭開始"""
+        self.manager.add_many([make_song(i) for i in range(3)])
+        self.store.append(GUILD_ID, {"op": "update", "offset": 100})
+        self.manager.switch_to_next_song()
+        state, _ = self.restore()
+        self.assertEqual(state["offset"], 0)
+
+    def test_compaction_and_truncated_journal(self):
+        """測試：壓縮後仍可還原，變更紀錄最後一行不完整時會被略過"""
+        for i in range(12):
+            self.manager.add(make_song(i))
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f"{GUILD_ID}.json")), "變更累積後應該寫入快照")
+        with open(os.path.join(self.directory, f"{GUILD_ID}.journal"), "a", encoding="utf-8") as f:
+            f.write('{"op":"remove","posi')
+
+        _, manager = self.restore()
+        self.assertEqual(len(manager.playlist), 12)
+        self.assertEqual([s["index"] for s in manager.playlist], list(range(1, 13)))
+
+    def test_append_after_truncated_journal(self):
+        """測試：還原時遇到不完整的一行，之後附加的變更在下次重新啟動後仍然保留"""
+        self.manager.add_many([make_song(i) for i in range(1)])
+        with open(os.path.join(self.directory, f"{GUILD_ID}.journal"), "a", encoding="utf-8") as f:
+            f.write('{"op":"add","son')
+
+        store = MusicSessionStore(self.directory)
+        manager = MusicPlaylistManager()
+        manager.restore_state(store.load(GUILD_ID))
+        manager.on_change = lambda op: store.append(GUILD_ID, op)
+        manager.add(make_song(1))
+        manager.add(make_song(2))
+        self.assertEqual(len(manager.playlist), 3)
+
+        _, restored = self.restore()
+        self.assertEqual([s["id"] for s in restored.playlist], ["id_0", "id_1", "id_2"])
+
+    def test_restore_queue_with_duplicate_ids(self):
+        """測試：同一首歌被加入多次時，重新啟動後清單與目前位置不變"""
+        for i in (0, 1, 0, 2):
+            self.manager.add(make_song(i))
+        self.manager.jump_to(3)
+
+        _, manager = self.restore()
+        self.assertEqual([s["id"] for s in manager.playlist], ["id_0", "id_1", "id_0", "id_2"])
+        self.assertEqual(manager.current_index, 3)
+
+    def test_clear_discards_session(self):
+        """測試：清空播放清單後不會留下工作階段"""
+        self.manager.add_many([make_song(i) for i in range(3)])
+        self.manager.clear()
+        state, _ = self.restore()
+        self.assertIsNone(state)
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
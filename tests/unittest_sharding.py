@@ -0,0 +1,47 @@
+import unittest
+import os
+
+# 設定模組路徑
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from module.sharding import shard_kwargs, shard_id_for, owns_guild
+
+
+class FakeBot:
+    """只提供分片屬性的測試用 Bot"""
+    def __init__(self, shard_count=None, shard_ids=None):
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+
+class TestSharding(unittest.TestCase):
+    def test_shard_kwargs(self):
+        """測試：未啟用時不帶參數，啟用時把範圍轉成分片 ID 列表"""
+        self.assertEqual(shard_kwargs({}), {})
+        self.assertEqual(shard_kwargs({"sharding": {"enabled": False, "shard_count": 4}}), {})
+        self.assertEqual(
+            shard_kwargs({"sharding": {"enabled": True, "shard_count": 4, "shard_range": [2, 3]}}),
+            {"shard_count": 4, "shard_ids": [2, 3]}
+        )
+        self.assertEqual(shard_kwargs({"sharding": {"enabled": True}}), {"shard_count": None})
+
+    def test_invalid_settings(self):
+        """測試：範圍超出總數或缺少總數時拒絕啟動"""
+        with self.assertRaises(ValueError):
+            shard_kwargs({"sharding": {"enabled": True, "shard_count": 2, "shard_range": [1, 2]}})
+        with self.assertRaises(ValueError):
+            shard_kwargs({"sharding": {"enabled": True, "shard_range": [0, 1]}})
+
+    def test_owns_guild(self):
+        """測試：只有落在負責範圍內的伺服器屬於此行程"""
+        guild_id = (123456 << 22) | 99
+        shard_id = shard_id_for(guild_id, 4)
+        self.assertEqual(shard_id, 123456 % 4)
+        self.assertTrue(owns_guild(FakeBot(4, [shard_id]), guild_id))
+        self.assertFalse(owns_guild(FakeBot(4, [(shard_id + 1) % 4]), guild_id))
+        self.assertTrue(owns_guild(FakeBot(), guild_id), "未分片時負責所有伺服器")
+
+
+if __name__ == "__main__":
+    unittest.main()